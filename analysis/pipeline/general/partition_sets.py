@@ -0,0 +1,133 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""research-processing partition sets."""
+
+import os
+from typing import Dict, List, Optional
+
+from dagster import Partition, PartitionSetDefinition
+
+from research_processing import toolbox
+from research_processing.partitions import list_partitions
+
+
+def data_directory_run_config(data_dir: str) -> Dict:
+    """Define the run configuration of a data directory (See the `Data directory` section of the documentation).
+
+    Args:
+        data_dir (str): Data directory, with the `raw_data` (inputs) and `derived_data` (outputs) directories.
+
+    Returns:
+        Dict: Run configuration of the `repository` and `lasrc_data` resources and of the
+        `load_and_standardize_sceneids_input` solid.
+    """
+    raw_data_dir = os.path.join(data_dir, "raw_data")
+
+    return {
+        "resources": {
+            "lasrc_data": {
+                "config": {
+                    "lasrc_auxiliary_data_dir": os.path.join(raw_data_dir, "lasrc_auxiliary_data"),
+                    "sentinel2_sceneid_list": os.path.join(raw_data_dir, "scene_id_list", "s2-sceneids.txt")
+                }
+            },
+            "repository": {
+                "config": {
+                    "derived_data_dir": os.path.join(data_dir, "derived_data"),
+                    "landsat8_input_dir": os.path.join(raw_data_dir, "landsat8_data"),
+                    "sentinel2_input_dir": os.path.join(raw_data_dir, "sentinel2_data")
+                }
+            }
+        },
+        "solids": {
+            "load_and_standardize_sceneids_input": {
+                "config": {
+                    "landsat8_sceneid_list": os.path.join(raw_data_dir, "scene_id_list", "l8-sceneids.txt"),
+                    "sentinel2_sceneid_list": os.path.join(raw_data_dir, "scene_id_list", "s2-sceneids.txt")
+                }
+            }
+        }
+    }
+
+
+def _data_directory_sceneids(data_dir: str) -> List[str]:
+    """Load the Landsat-8 and Sentinel-2 scene ids of a data directory."""
+    solid_config = data_directory_run_config(data_dir)["solids"]["load_and_standardize_sceneids_input"]["config"]
+
+    scene_ids = []
+    for sceneid_list in solid_config.values():
+        with open(sceneid_list) as file:
+            scene_ids.extend(toolbox.standardize_filename(file.readlines()))
+    return scene_ids
+
+
+def research_partition_set(pipeline_name: str, partition_by: str,
+                           data_dir: Optional[str] = None) -> PartitionSetDefinition:
+    """Define the partitions (acquisition month or tile) of the scenes of a data directory.
+
+    The partitions are listed from the scene id files of the data directory, so the partitions of new scenes are
+    available as soon as the files are updated. Each partition run processes only the scenes of the partition and
+    validates only the pairs whose latest scene is in the partition (See the `partition` resource). The scenes of the
+    previous partitions must be already processed (e.g., with a backfill of the partitions, in order), otherwise
+    their pairs are skipped.
+
+    Args:
+        pipeline_name (str): Name of the pipeline executed for each partition.
+
+        partition_by (str): Partition criteria (See `research_processing.partitions.PARTITION_KINDS`).
+
+        data_dir (Optional[str]): Data directory. When `None`, the `DATA_DIRECTORY` environment variable is used.
+
+    Returns:
+        PartitionSetDefinition: Partition set named `<pipeline_name>_by_<partition_by>`.
+    """
+    def partition_fn() -> List[Partition]:
+        partition_data_dir = data_dir or os.environ.get("DATA_DIRECTORY")
+
+        if not partition_data_dir:
+            return []
+
+        return [
+            Partition(partition) for partition in list_partitions(_data_directory_sceneids(partition_data_dir),
+                                                                  partition_by)
+        ]
+
+    def run_config_fn_for_partition(partition: Partition) -> Dict:
+        run_config = data_directory_run_config(data_dir or os.environ["DATA_DIRECTORY"])
+
+        run_config["resources"]["partition"] = {
+            "config": {
+                "partition_by": partition_by,
+                "partition": partition.value
+            }
+        }
+        return run_config
+
+    return PartitionSetDefinition(
+        name=f"{pipeline_name}_by_{partition_by}",
+        pipeline_name=pipeline_name,
+        partition_fn=partition_fn,
+        run_config_fn_for_partition=run_config_fn_for_partition
+    )
+
+
+__all__ = (
+    "data_directory_run_config",
+    "research_partition_set"
+)
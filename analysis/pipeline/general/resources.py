@@ -1,134 +1,489 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-"""research-processing resources."""
-
-import os
-
-from dagster import resource
-from dagster import Field, Dict, String
-from dagster import DagsterResourceFunctionError
-
-
-@resource(config_schema={
-    "landsat8_input_dir": Field(
-        config=String,
-        description="Directory path where the Landsat-8/OLI scenes for processing are available. "
-                    "The scenes must be in separate directories with unzipped content."
-    ),
-    "sentinel2_input_dir": Field(
-        config=String,
-        description="Directory path where the Sentinel-2/MSI scenes for processing are available. "
-                    "The scenes must be in separate .SAFE directories with unzipped content."
-    ),
-    "derived_data_dir": Field(
-        config=String,
-        description="Base directory where the result of the processing steps will be saved."
-    )
-},
-    description="Data Access Resource. Registers the directories to be used as input/output for the "
-                "processing stream. This ResourceDefinition returns a dictionary with the input keys and also "
-                "the `outdir_landsat8` and `outdir_sentinel2` keys. The extra keys added, represent the base "
-                "directory where the result of processing each of the sensors will be saved.")
-def resource_repository(_init_context) -> Dict:
-    """Data Access Resource.
-
-    Returns:
-        Dict: Dictionary with the input keys and also the `outdir_landsat8`, `outdir_sentinel2`, `outdir_validation`
-              keys. The extra keys added, represent the base directory where the result of processing each of the
-              sensors will be saved. The output looks like:
-                {
-                    "landsat8_input_dir": "...",
-                    "sentinel2_input_dir": "...",
-                    "derived_data_dir": "...",
-                    "outdir_landsat8": "...",
-                    "outdir_sentinel2": "...",
-                    "outdir_validation": "..."
-                }
-    """
-    # validate the defined resources
-    for resource_dir in _init_context.resource_config.keys():
-        if not os.path.isdir(_init_context.resource_config[resource_dir]):
-            raise DagsterResourceFunctionError(
-                f"The {resource_dir} directory, does not exist or cannot be found.")
-
-    # create base output directories (for each sensor)
-    base_out_dir = _init_context.resource_config["derived_data_dir"]
-
-    s2_outputs = os.path.join(base_out_dir, "s2")
-    lc8_outputs = os.path.join(base_out_dir, "l8")
-    validation_outputs = os.path.join(base_out_dir, "validation")
-
-    return {
-        **_init_context.resource_config,
-        **{
-            "outdir_landsat8": lc8_outputs,
-            "outdir_sentinel2": s2_outputs,
-            "outdir_validation": validation_outputs
-        }
-    }
-
-
-@resource(config_schema={
-    "lasrc_auxiliary_data_dir": Field(
-        config=String,
-        description="Directory where the LaSRC auxiliary data is stored. The contents of this directory should follow "
-                    "the structure definition found on the `USGS` website "
-                    "(L8 directory - https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/L8/)"
-    ),
-})
-def resource_lasrc_auxiliary_data(_init_context) -> Dict:
-    """LaSRC auxiliary data resource.
-
-    Resource for defining the directory where the LaSRC auxiliary data is stored. This directory is 
-    expected to be valid and contains the files, directories, and subdirectories provided by the 
-    USGS (https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/L8/). As such, 
-    the expected directory should look like the content shown below:
-
-            lasrc_auxiliary/L8/
-                - LADS/
-                - LDCMLUT/
-                - MSILUT/ 
-                - CMGDEM.hdf
-                - ratiomapndwiexp.hdf
-
-    Note: 
-        You **don't** need to have all LADS data. You only need to have available the data that concerns your input data.
-
-    Returns:
-        Dict: Dict with the `lasrc_auxiliary_directory` key, which contains the reference to the LaSRC auxiliary 
-        data directory.
-
-    See:
-        https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/L8/
-    """
-    lasrc_auxiliary_directory = _init_context.resource_config["lasrc_auxiliary_data_dir"]
-
-    if not os.path.isdir(lasrc_auxiliary_directory):
-        raise DagsterResourceFunctionError(
-            f"The directory {lasrc_auxiliary_directory} indicated as a resource does not exist or cannot be found.")
-
-    return {
-        "lasrc_auxiliary_directory": lasrc_auxiliary_directory
-    }
-
-
-__all__ = (
-    "resource_repository",
-    "resource_lasrc_auxiliary_data"
-)
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""research-processing resources."""
+
+import functools
+import inspect
+import os
+import tempfile
+from contextlib import ExitStack
+from typing import Any, Callable, List, Optional
+
+from dagster import resource
+from dagster import Field, Dict, Noneable, String
+from dagster import DagsterResourceFunctionError
+
+from research_processing import toolbox
+from research_processing.auxiliary import prepare_lasrc_auxiliary_data
+from research_processing.config import EnvironmentConfig
+from research_processing.memoization import MemoStore
+from research_processing.partitions import PARTITION_KINDS, partition_scenes
+from research_processing.scheduler import parse_memory
+from research_processing.slots import ProcessSlots, host_memory, memory_slots, slots_for_memory
+from research_processing.version import __version__
+
+# Resources whose configuration is part of the memoization keys (e.g., the input and output directories).
+_MEMOIZED_RESOURCES = ("repository", "lasrc_data", "partition")
+
+# Memory of each slot of the memory shared by the per-scene solids (See `resource_concurrency_limits`).
+_MEMORY_SLOT = "512m"
+
+
+@resource(config_schema={
+    "landsat8_input_dir": Field(
+        config=String,
+        description="Directory path where the Landsat-8/OLI scenes for processing are available. "
+                    "The scenes must be in separate directories with unzipped content."
+    ),
+    "sentinel2_input_dir": Field(
+        config=String,
+        description="Directory path where the Sentinel-2/MSI scenes for processing are available. "
+                    "The scenes must be in separate .SAFE directories with unzipped content."
+    ),
+    "derived_data_dir": Field(
+        config=String,
+        description="Base directory where the result of the processing steps will be saved."
+    )
+},
+    description="Data Access Resource. Registers the directories to be used as input/output for the "
+                "processing stream. This ResourceDefinition returns a dictionary with the input keys and also "
+                "the `outdir_landsat8` and `outdir_sentinel2` keys. The extra keys added, represent the base "
+                "directory where the result of processing each of the sensors will be saved.")
+def resource_repository(_init_context) -> Dict:
+    """Data Access Resource.
+
+    Returns:
+        Dict: Dictionary with the input keys and also the `outdir_landsat8`, `outdir_sentinel2`, `outdir_validation`
+              keys. The extra keys added, represent the base directory where the result of processing each of the
+              sensors will be saved. The output looks like:
+                {
+                    "landsat8_input_dir": "...",
+                    "sentinel2_input_dir": "...",
+                    "derived_data_dir": "...",
+                    "outdir_landsat8": "...",
+                    "outdir_sentinel2": "...",
+                    "outdir_validation": "..."
+                }
+    """
+    # validate the defined resources
+    for resource_dir in _init_context.resource_config.keys():
+        if not os.path.isdir(_init_context.resource_config[resource_dir]):
+            raise DagsterResourceFunctionError(
+                f"The {resource_dir} directory, does not exist or cannot be found.")
+
+    # create base output directories (for each sensor)
+    base_out_dir = _init_context.resource_config["derived_data_dir"]
+
+    s2_outputs = os.path.join(base_out_dir, "s2")
+    lc8_outputs = os.path.join(base_out_dir, "l8")
+    validation_outputs = os.path.join(base_out_dir, "validation")
+
+    return {
+        **_init_context.resource_config,
+        **{
+            "outdir_landsat8": lc8_outputs,
+            "outdir_sentinel2": s2_outputs,
+            "outdir_validation": validation_outputs
+        }
+    }
+
+
+@resource(config_schema={
+    "lasrc_auxiliary_data_dir": Field(
+        config=String,
+        description="Directory where the LaSRC auxiliary data is stored. The contents of this directory should follow "
+                    "the structure definition found on the `USGS` website "
+                    "(L8 directory - https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/L8/)"
+    ),
+    "sentinel2_sceneid_list": Field(
+        config=Noneable(String),
+        description="Path to the txt file with the Sentinel-2 scene ids of the run (the same file of the "
+                    "`load_and_standardize_sceneids_input` solid). When defined, a minimal subset of the auxiliary "
+                    "data, with the LADS files of the scenes (of the partition, when the run is partitioned), is "
+                    "created once and mounted by all the `apply_lasrc` steps.",
+        default_value=None
+    ),
+    "subset_dir": Field(
+        config=Noneable(String),
+        description="Directory where the subset of the auxiliary data is created. It should be in the file system "
+                    "of the auxiliary data directory, so the files are hardlinked. When not defined, the "
+                    "`RESEARCH_PROCESSING_LASRC_AUX_SUBSET_DIR` (or a directory alongside the auxiliary data "
+                    "directory) is used.",
+        default_value=None
+    )
+}, required_resource_keys={"partition"})
+def resource_lasrc_auxiliary_data(_init_context) -> Dict:
+    """LaSRC auxiliary data resource.
+
+    Resource for defining the directory where the LaSRC auxiliary data is stored. This directory is 
+    expected to be valid and contains the files, directories, and subdirectories provided by the 
+    USGS (https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/L8/). As such, 
+    the expected directory should look like the content shown below:
+
+            lasrc_auxiliary/L8/
+                - LADS/
+                - LDCMLUT/
+                - MSILUT/ 
+                - CMGDEM.hdf
+                - ratiomapndwiexp.hdf
+
+    Note: 
+        You **don't** need to have all LADS data. You only need to have available the data that concerns your input data.
+
+    When the `sentinel2_sceneid_list` is defined, the subset of the auxiliary data of the scenes is created (or
+    reused, when it already exists) once for the run (See `research_processing.auxiliary.prepare_lasrc_auxiliary_data`).
+
+    Returns:
+        Dict: Dict with the `lasrc_auxiliary_directory` key, which contains the reference to the LaSRC auxiliary 
+        data directory, and the `lasrc_auxiliary_subset` key, with the subset directory (or `None`).
+
+    See:
+        https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/L8/
+    """
+    lasrc_auxiliary_directory = _init_context.resource_config["lasrc_auxiliary_data_dir"]
+
+    if not os.path.isdir(lasrc_auxiliary_directory):
+        raise DagsterResourceFunctionError(
+            f"The directory {lasrc_auxiliary_directory} indicated as a resource does not exist or cannot be found.")
+
+    lasrc_auxiliary_subset = None
+    sentinel2_sceneid_list = _init_context.resource_config["sentinel2_sceneid_list"]
+
+    if sentinel2_sceneid_list is not None:
+        with open(sentinel2_sceneid_list) as file:
+            scene_ids = toolbox.standardize_filename(file.readlines())
+
+        partition = _init_context.resources.partition
+        if partition is not None:
+            scene_ids = partition_scenes(scene_ids, partition["partition_by"], partition["partition"])
+
+        lasrc_auxiliary_subset, symlinked = prepare_lasrc_auxiliary_data(
+            lasrc_auxiliary_directory, scene_ids,
+            _init_context.resource_config["subset_dir"] or EnvironmentConfig.LASRC_AUX_SUBSET_DIR
+        )
+
+        if symlinked:
+            _init_context.log.warning(f"The LaSRC auxiliary data subset ({lasrc_auxiliary_subset}) uses symbolic "
+                                      "links (it is not in the file system of the auxiliary data directory), so the "
+                                      "whole auxiliary data directory is also mounted in the containers.")
+
+    return {
+        "lasrc_auxiliary_directory": lasrc_auxiliary_directory,
+        "lasrc_auxiliary_subset": lasrc_auxiliary_subset
+    }
+
+
+@resource(config_schema={
+    "partition_by": Field(
+        config=String,
+        description=f"Criteria used to partition the scenes ({', '.join(PARTITION_KINDS)}). The `month` partitions "
+                    "are named with the acquisition month (e.g., `2020-07`) and the `tile` partitions with the "
+                    "Landsat-8 path/row (e.g., `223081`) or the Sentinel-2 tile (e.g., `T22KFU`).",
+        default_value="month"
+    ),
+    "partition": Field(
+        config=Noneable(String),
+        description="Partition processed in the run. Only the scenes of the partition are processed and only the "
+                    "pairs whose latest scene is in the partition are validated (the scenes of the previous "
+                    "partitions must be already processed). When not defined, all the scenes are processed.",
+        default_value=None
+    )
+},
+    description="Partition Resource. Defines the partition (acquisition month or tile) of the scenes processed in "
+                "an incremental run.")
+def resource_partition(_init_context) -> Optional[Dict]:
+    """Partition Resource.
+
+    Returns:
+        Optional[Dict]: Dictionary with the `partition_by` and `partition` keys. `None` is returned when the
+        `partition` is not defined (all the scenes are processed).
+
+    Raises:
+        DagsterResourceFunctionError: If the `partition_by` is not valid.
+    """
+    config = _init_context.resource_config
+
+    if config["partition_by"] not in PARTITION_KINDS:
+        raise DagsterResourceFunctionError(
+            f"Invalid partition criteria `{config['partition_by']}` (available: {', '.join(PARTITION_KINDS)})."
+        )
+
+    if config["partition"] is None:
+        return None
+
+    return {
+        "partition_by": config["partition_by"],
+        "partition": config["partition"]
+    }
+
+
+@resource(config_schema={
+    "lock_dir": Field(
+        config=String,
+        description="Directory of the lock files used to share the concurrency limits between the processes.",
+        default_value=os.path.join(tempfile.gettempdir(), "research-processing-slots")
+    ),
+    "validation_solids": Field(
+        config=int,
+        description="Maximum number of validation solids executed concurrently. Use `0` to define it from the host "
+                    "memory and the `validation_memory` (limited to the number of CPUs).",
+        default_value=0
+    ),
+    "validation_memory": Field(
+        config=String,
+        description="Memory used by each validation solid, in bytes or in the Docker format (e.g., `8g`).",
+        default_value="8g"
+    ),
+    "scene_solids": Field(
+        config=int,
+        description="Maximum number of per-scene solids (e.g., the `apply_sen2cor` steps mapped over the scenes) "
+                    "executed concurrently. Each one runs a single container. Use `0` to use the number of CPUs.",
+        default_value=0
+    ),
+    "scene_memory": Field(
+        config=String,
+        description="Memory shared by the per-scene solids, in bytes or in the Docker format (e.g., `64g`). Each "
+                    "solid reserves the memory of the resource profile of its image "
+                    "(`EnvironmentConfig.RESOURCE_PROFILES`). Use an empty value to use the host memory.",
+        default_value=""
+    )
+},
+    description="Concurrency Limits Resource. Defines how many per-scene and validation solids are "
+                "executed concurrently, in all the processes of the host (e.g., with the multiprocess executor).")
+def resource_concurrency_limits(_init_context) -> Dict:
+    """Concurrency Limits Resource.
+
+    Returns:
+        Dict: Dictionary with the `scene`, `scene_memory` and `validation` keys, which contain the slots
+        (`research_processing.slots.ProcessSlots`) held by each kind of solid (See `limit_concurrency`). The
+        `scene_memory` slots are units of `_MEMORY_SLOT` of the memory shared by the per-scene solids.
+    """
+    config = _init_context.resource_config
+
+    validation_solids = config["validation_solids"] or slots_for_memory(config["validation_memory"])
+    scene_solids = config["scene_solids"] or os.cpu_count() or 1
+    scene_memory = parse_memory(config["scene_memory"] or EnvironmentConfig.HOST_MEMORY or host_memory())
+
+    return {
+        "scene": ProcessSlots(config["lock_dir"], "scene", scene_solids),
+        "scene_memory": ProcessSlots(config["lock_dir"], "scene-memory",
+                                     max(1, scene_memory // parse_memory(_MEMORY_SLOT))),
+        "validation": ProcessSlots(config["lock_dir"], "validation", validation_solids)
+    }
+
+
+def limit_concurrency(kind: str, image: Optional[str] = None) -> Callable:
+    """Decorator that executes a solid holding a slot of the `concurrency_limits` resource.
+
+    Args:
+        kind (str): Kind of the solid (`scene` or `validation`).
+
+        image (Optional[str]): Image of the container executed by a per-scene solid. The solid also holds the
+        `scene_memory` slots of the memory of its resource profile (`EnvironmentConfig.RESOURCE_PROFILES`).
+
+    Returns:
+        Callable: Decorator applied to the solid compute function (below the `solid` decorator).
+    """
+    def decorator(compute_function: Callable) -> Callable:
+        @functools.wraps(compute_function)
+        def compute_with_slot(context, *args, **kwargs):
+            concurrency_limits = context.resources.concurrency_limits
+
+            with ExitStack() as stack:
+                stack.enter_context(concurrency_limits[kind].acquire())
+
+                if image is not None:
+                    image_slots = memory_slots(EnvironmentConfig.RESOURCE_PROFILES[image]["memory"], _MEMORY_SLOT)
+                    stack.enter_context(concurrency_limits["scene_memory"].acquire(image_slots))
+
+                return compute_function(context, *args, **kwargs)
+
+        return compute_with_slot
+    return decorator
+
+
+def scene_solids_concurrency(context, image: str) -> int:
+    """Define how many per-scene solids of an image can be executed concurrently (See `resource_concurrency_limits`).
+
+    The processing functions share the CPUs among these solids when planning the threads of their containers (See
+    `research_processing.parallelism.plan_parallelism`).
+
+    Args:
+        context: Execution context of the solid (with the `concurrency_limits` resource).
+
+        image (str): Image of the container executed by the solid.
+
+    Returns:
+        int: Number of per-scene solids (at least 1).
+    """
+    concurrency_limits = context.resources.concurrency_limits
+    image_slots = memory_slots(EnvironmentConfig.RESOURCE_PROFILES[image]["memory"], _MEMORY_SLOT)
+
+    return max(1, min(concurrency_limits["scene"].slots, concurrency_limits["scene_memory"].slots // image_slots))
+
+
+@resource(config_schema={
+    "enabled": Field(
+        config=bool,
+        description="Skip the solids already executed with the same configuration, inputs, images and library "
+                    "version, returning their stored outputs. Use `False` to execute all the solids.",
+        default_value=True
+    ),
+    "memo_dir": Field(
+        config=Noneable(String),
+        description="Directory where the outputs of the solids are stored. When not defined, the `.memoized` "
+                    "directory of the derived data directory is used.",
+        default_value=None
+    )
+},
+    required_resource_keys={"repository"},
+    description="Memoization Resource. Stores the outputs of the solids, keyed by the solid configuration, the "
+                "versions of its inputs, the images used and the library version (See `memoize`).")
+def resource_memoization(_init_context) -> Optional[MemoStore]:
+    """Memoization Resource.
+
+    Returns:
+        Optional[MemoStore]: Store of the solid outputs (`research_processing.memoization.MemoStore`). `None` is
+        returned when the memoization is disabled.
+    """
+    config = _init_context.resource_config
+
+    if not config["enabled"]:
+        return None
+
+    memo_dir = config["memo_dir"] or os.path.join(_init_context.resources.repository["derived_data_dir"],
+                                                  ".memoized")
+    return MemoStore(memo_dir)
+
+
+def _output_id(context, step_key: str, output_name: str, mapping_key: Optional[str] = None) -> str:
+    """Define the id of a step output in the memoization versions (scoped by the root run of the re-executions)."""
+    run_id = context.pipeline_run.root_run_id or context.run_id
+
+    return ":".join([run_id, step_key, output_name, mapping_key or ""])
+
+
+class IncompleteOutputs(Exception):
+    """Signal raised by a memoized solid whose outputs are incomplete (e.g., scenes that failed with
+    `continue_on_failure`). The outputs are returned by the solid, but they are not memoized, so the solid is executed
+    again in the next run (See `memoize`).
+
+    Args:
+        outputs (Any): Outputs of the solid.
+    """
+
+    def __init__(self, outputs: Any):
+        super().__init__("The outputs of the solid are incomplete.")
+        self.outputs = outputs
+
+
+def memoize(*images: str, paths: Optional[Callable[..., List[str]]] = None) -> Callable:
+    """Decorator that skips a solid already executed with the same key, returning its stored outputs.
+
+    The key combines the solid name and configuration, the configuration of the `repository`, `lasrc_data` and
+    `partition` resources, the versions of the solid inputs (See `research_processing.memoization.MemoStore`), the
+    images used by the solid and the library version. The version of each input is read from the outputs of the
+    upstream steps of the execution plan (the steps mapped over the scenes have one step per scene).
+
+    The solids with incomplete outputs raise `IncompleteOutputs`, so their outputs are returned without being
+    stored.
+
+    Args:
+        images (str): Images used by the solid (e.g., `EnvironmentConfig.SEN2COR_IMAGE`). The images are pinned by
+        digest, so a new image version changes the key.
+
+        paths (Optional[Callable[..., List[str]]]): Function called with the solid context that lists the paths
+        written by the solid besides the paths contained in its outputs (e.g., the output directory of the solids that
+        return `Nothing`). Their fingerprints are also checked before the stored outputs are returned.
+
+    Returns:
+        Callable: Decorator applied to the solid compute function (below the `solid` decorator and above the
+        `limit_concurrency` decorator, so the memoized solids do not wait for a slot).
+    """
+    code_version = "\n".join([__version__, *images])
+
+    def decorator(compute_function: Callable) -> Callable:
+        signature = inspect.signature(compute_function)
+
+        @functools.wraps(compute_function)
+        def compute_memoized(context, *args, **kwargs):
+            memo = context.resources.memoization
+
+            if memo is None:
+                try:
+                    return compute_function(context, *args, **kwargs)
+                except IncompleteOutputs as incomplete:
+                    return incomplete.outputs
+
+            inputs = signature.bind(context, *args, **kwargs).arguments
+            inputs.pop(next(iter(signature.parameters)))
+
+            step = context.get_step_execution_context().step
+            input_versions = {
+                step_input.name: memo.input_version(inputs[step_input.name], [
+                    _output_id(context, *output_handle)
+                    for output_handle in step_input.get_step_output_handle_dependencies()
+                ]) for step_input in step.step_inputs if step_input.name in inputs
+            }
+
+            name = context.solid_def.name
+            key = memo.key(name, {
+                "solid": context.solid_config,
+                "resources": {
+                    resource_key: getattr(context.resources, resource_key) for resource_key in _MEMOIZED_RESOURCES
+                    if resource_key in context.solid_def.required_resource_keys
+                }
+            }, input_versions, code_version)
+
+            output_ids = [
+                _output_id(context, step.key, output_def.name) for output_def in context.solid_def.output_defs
+            ]
+            memoized, outputs = memo.load(name, key)
+
+            if memoized:
+                memo.register(key, output_ids)
+                context.log.info(f"Skipping `{name}`, already executed with the key {key}.")
+                return outputs
+
+            try:
+                outputs = compute_function(context, *args, **kwargs)
+            except IncompleteOutputs as incomplete:
+                context.log.info(f"The outputs of `{name}` are incomplete and were not memoized.")
+                return incomplete.outputs
+
+            memo.store(name, key, outputs, paths(context) if paths is not None else None)
+            memo.register(key, output_ids)
+
+            return outputs
+
+        return compute_memoized
+    return decorator
+
+
+__all__ = (
+    "resource_repository",
+    "resource_lasrc_auxiliary_data",
+    "resource_concurrency_limits",
+    "resource_memoization",
+    "resource_partition",
+    "limit_concurrency",
+    "scene_solids_concurrency",
+    "memoize",
+    "IncompleteOutputs"
+)
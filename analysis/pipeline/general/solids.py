@@ -1,78 +1,209 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-"""research-processing analysis general use solids."""
-
-from dagster import solid, OutputDefinition
-from dagster import Field, String, Tuple, List
-
-from research_processing import toolbox
-
-
-@solid(
-    config_schema={
-        "landsat8_sceneid_list": Field(
-            config=String,
-            description="path to a txt file that contains the ids that are to be processed. These ids must be "
-                        "equivalent to the scene directory names that are contained in Landsat-8 data repository.",
-        ),
-        "sentinel2_sceneid_list": Field(
-            config=String,
-            description="path to a txt file that contains the ids that are to be processed. These ids must be "
-                        "equivalent to the scene directory names that are contained in Sentinel-2 data repository.",
-        )
-    },
-    output_defs=[
-        # Landsat-8
-        OutputDefinition(name="landsat8_sceneid_list",
-                         dagster_type=List[String],
-                         description="List with the name of the Landsat-8 scenes that should be used for processing."),
-
-        # Sentinel-2
-        OutputDefinition(name="sentinel2_sceneid_list",
-                         dagster_type=List[String],
-                         description="List with the name of the Sentinel-2 scenes that should be used for processing.")
-    ],
-    description="Load and standardize files with the scene ids that are to be used in the analysis pipeline. "
-                "The defined scenes will be retrieved from the Landsat-8 and Sentinel-2 data directories. Scenes "
-                "that do not have their scene ids mapped into the input files "
-                "(`landsat8_sceneid_list` and `sentinel2_sceneid_list`) will not be processed."
-)
-def load_and_standardize_sceneids_input(context) -> Tuple[String, String]:
-    """Load and Standardize Satellite Scene ids."""
-
-    #
-    # Load Landsat-8 scenes
-    #
-    with open(context.solid_config["landsat8_sceneid_list"]) as file:
-        scene_list = file.readlines()
-        landsat8_sceneids = toolbox.standardize_filename(scene_list)
-
-    #
-    # Load Sentinel-2 scenes
-    #
-    with open(context.solid_config["sentinel2_sceneid_list"]) as file:
-        scene_list = file.readlines()
-        sentinel2_sceneids = toolbox.standardize_filename(scene_list)
-
-    return landsat8_sceneids, sentinel2_sceneids
-
-
-__all__ = (
-    "load_and_standardize_sceneids_input"
-)
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""research-processing analysis general use solids."""
+
+import os
+
+from dagster import solid, Failure, InputDefinition, OutputDefinition
+from dagster import Field, String, Tuple, List
+
+from research_processing import inventory, partitions, toolbox
+
+
+@solid(
+    config_schema={
+        "landsat8_sceneid_list": Field(
+            config=String,
+            description="path to a txt file that contains the ids that are to be processed. These ids must be "
+                        "equivalent to the scene directory names that are contained in Landsat-8 data repository.",
+        ),
+        "sentinel2_sceneid_list": Field(
+            config=String,
+            description="path to a txt file that contains the ids that are to be processed. These ids must be "
+                        "equivalent to the scene directory names that are contained in Sentinel-2 data repository.",
+        )
+    },
+    output_defs=[
+        # Landsat-8
+        OutputDefinition(name="landsat8_sceneid_list",
+                         dagster_type=List[String],
+                         description="List with the name of the Landsat-8 scenes that should be used for processing."),
+
+        # Sentinel-2
+        OutputDefinition(name="sentinel2_sceneid_list",
+                         dagster_type=List[String],
+                         description="List with the name of the Sentinel-2 scenes that should be used for processing.")
+    ],
+    description="Load and standardize files with the scene ids that are to be used in the analysis pipeline. "
+                "The defined scenes will be retrieved from the Landsat-8 and Sentinel-2 data directories. Scenes "
+                "that do not have their scene ids mapped into the input files "
+                "(`landsat8_sceneid_list` and `sentinel2_sceneid_list`) will not be processed."
+)
+def load_and_standardize_sceneids_input(context) -> Tuple[String, String]:
+    """Load and Standardize Satellite Scene ids."""
+
+    #
+    # Load Landsat-8 scenes
+    #
+    with open(context.solid_config["landsat8_sceneid_list"]) as file:
+        scene_list = file.readlines()
+        landsat8_sceneids = toolbox.standardize_filename(scene_list)
+
+    #
+    # Load Sentinel-2 scenes
+    #
+    with open(context.solid_config["sentinel2_sceneid_list"]) as file:
+        scene_list = file.readlines()
+        sentinel2_sceneids = toolbox.standardize_filename(scene_list)
+
+    return landsat8_sceneids, sentinel2_sceneids
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="landsat8_sceneid_list",
+                        dagster_type=List[String],
+                        description="List with the name of the Landsat-8 scenes that should be used for processing."),
+        InputDefinition(name="sentinel2_sceneid_list",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2 scenes that should be used for processing.")
+    ],
+    config_schema={
+        "max_workers": Field(
+            config=int,
+            description="Maximum number of scene directories scanned concurrently.",
+            default_value=8
+        ),
+        "drop_invalid_scenes": Field(
+            config=bool,
+            description="Drop the scenes that are not available or are incomplete (e.g., a `.SAFE` directory without "
+                        "some band files) and process the other scenes. By default, the pipeline fails before any "
+                        "processing step when an invalid scene is found.",
+            default_value=False
+        )
+    },
+    output_defs=[
+        # Landsat-8
+        OutputDefinition(name="landsat8_sceneid_list",
+                         dagster_type=List[String],
+                         description="List with the name of the valid Landsat-8 scenes."),
+
+        # Sentinel-2
+        OutputDefinition(name="sentinel2_sceneid_list",
+                         dagster_type=List[String],
+                         description="List with the name of the valid Sentinel-2 scenes.")
+    ],
+    required_resource_keys={"repository"},
+    description="Pre-flight inventory of the scenes. The Landsat-8 and Sentinel-2 scene directories are scanned in "
+                "parallel to check that each scene has the band files and the metadata required by the processing. "
+                "The files and sizes of the scenes are saved in the `inventory.json` file, in the derived data "
+                "directory. The invalid scenes fail the pipeline (or are dropped, with `drop_invalid_scenes`) before "
+                "any container is executed."
+)
+def inventory_sceneids_input(context, landsat8_sceneid_list: List[String],
+                             sentinel2_sceneid_list: List[String]) -> Tuple[String, String]:
+    """Pre-flight inventory of the Satellite Scenes."""
+    repository = context.resources.repository
+    max_workers = context.solid_config["max_workers"]
+
+    #
+    # Scan the scene directories
+    #
+    inventories = {
+        "landsat8": inventory.inventory_scenes(repository["landsat8_input_dir"], landsat8_sceneid_list,
+                                               inventory.landsat8_required_files, max_workers),
+        "sentinel2": inventory.inventory_scenes(repository["sentinel2_input_dir"], sentinel2_sceneid_list,
+                                                inventory.sentinel2_required_files, max_workers)
+    }
+
+    inventory_file = os.path.join(repository["derived_data_dir"], "inventory.json")
+    inventory.write_inventory(inventory_file, inventories)
+
+    #
+    # Check the scenes
+    #
+    invalid_scenes = [
+        scene_inventory for collection_inventories in inventories.values()
+        for scene_inventory in collection_inventories.values() if not scene_inventory.valid
+    ]
+
+    for scene_inventory in invalid_scenes:
+        context.log.warning(f"Invalid scene {scene_inventory.scene_id}: {scene_inventory.problem}")
+
+    if invalid_scenes and not context.solid_config["drop_invalid_scenes"]:
+        raise Failure(
+            description=f"{len(invalid_scenes)} scene(s) are not available or are incomplete "
+                        f"(See {inventory_file}). Fix the input directories or set `drop_invalid_scenes` to process "
+                        "only the valid scenes."
+        )
+
+    return (
+        [scene_id for scene_id in landsat8_sceneid_list if inventories["landsat8"][scene_id].valid],
+        [scene_id for scene_id in sentinel2_sceneid_list if inventories["sentinel2"][scene_id].valid]
+    )
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="landsat8_sceneid_list",
+                        dagster_type=List[String],
+                        description="List with the name of all the Landsat-8 scenes."),
+        InputDefinition(name="sentinel2_sceneid_list",
+                        dagster_type=List[String],
+                        description="List with the name of all the Sentinel-2 scenes.")
+    ],
+    output_defs=[
+        # Landsat-8
+        OutputDefinition(name="landsat8_sceneid_list",
+                         dagster_type=List[String],
+                         description="List with the name of the Landsat-8 scenes of the partition."),
+
+        # Sentinel-2
+        OutputDefinition(name="sentinel2_sceneid_list",
+                         dagster_type=List[String],
+                         description="List with the name of the Sentinel-2 scenes of the partition.")
+    ],
+    required_resource_keys={"partition"},
+    description="Select the scenes of the partition processed in the run (See the `partition` resource). When the "
+                "run is not partitioned, all the scenes are selected."
+)
+def select_partition_sceneids(context, landsat8_sceneid_list: List[String],
+                              sentinel2_sceneid_list: List[String]) -> Tuple[String, String]:
+    """Select the Satellite Scenes of the partition."""
+    partition = context.resources.partition
+
+    if partition is None:
+        return landsat8_sceneid_list, sentinel2_sceneid_list
+
+    landsat8_sceneids, sentinel2_sceneids = [
+        partitions.partition_scenes(scene_ids, partition["partition_by"], partition["partition"])
+        for scene_ids in (landsat8_sceneid_list, sentinel2_sceneid_list)
+    ]
+
+    context.log.info(f"Partition {partition['partition']} ({partition['partition_by']}): "
+                     f"{len(landsat8_sceneids)} Landsat-8 and {len(sentinel2_sceneids)} Sentinel-2 scene(s).")
+
+    return landsat8_sceneids, sentinel2_sceneids
+
+
+__all__ = (
+    "load_and_standardize_sceneids_input",
+    "inventory_sceneids_input",
+    "select_partition_sceneids"
+)
@@ -1,108 +1,150 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-from dagster import pipeline, ModeDefinition, fs_io_manager
-
-from validation.solids import *
-from preprocessing.solids import *
-
-from general.solids import load_and_standardize_sceneids_input
-from general.resources import resource_repository, resource_lasrc_auxiliary_data
-
-
-@pipeline(
-    mode_defs=[
-        ModeDefinition(
-            resource_defs={
-                "io_manager": fs_io_manager,
-                "repository": resource_repository,
-                "lasrc_data": resource_lasrc_auxiliary_data
-            }
-        )
-    ],
-    description="analysis pipeline."
-)
-def research_pipeline():
-    """analysis pipeline."""
-    #
-    # Load and validate the input config
-    #
-    landsat8_sceneids, sentinel2_sceneids = load_and_standardize_sceneids_input()
-
-    #
-    # Sentinel-2 Atmosphere correction (with sen2cor and LaSRC)
-    #
-
-    # sen2cor
-    sen2cor_dir, sen2cor_sceneids = apply_sen2cor(sentinel2_sceneids)
-
-    # LaSRC
-    lasrc_dir, lasrc_sceneids = apply_lasrc(sentinel2_sceneids)
-
-    #
-    # NBAR (with Landsat-8/OLI and Sentinel-2/MSI)
-    #
-
-    # Landsat-8 NBAR
-    angles_lc8_dir, scene_angles_lc8 = lc8_nbar_angles(landsat8_sceneids)
-    lc8_nbar_dir, lc8_nbar_sceneids = lc8_nbar(angles_lc8_dir, landsat8_sceneids)
-
-    # Sentinel-2/MSI (Sen2Cor)
-    s2_sen2cor_nbar_dir, s2_sen2cor_nbar_sceneids = s2_sen2cor_nbar(sen2cor_dir, sen2cor_sceneids)
-
-    # Sentinel-2/MSI (LaSRC)
-    s2_lasrc_nbar_dir, s2_lasrc_nbar_sceneids = s2_lasrc_nbar(lasrc_dir, lasrc_sceneids)
-
-    #
-    # Validations
-    #
-
-    # Landsat-8 Surface Reflectance
-    v1 = validation_sr_l8(landsat8_sceneids)
-
-    # Landsat-8 NBAR
-    v2 = validation_nbar_l8(lc8_nbar_dir, landsat8_sceneids)
-
-    # Sentinel-2/MSI Surface Reflectance (Sen2Cor)
-    v3 = validation_sr_s2_sen2cor(sen2cor_dir, sen2cor_dir, sentinel2_sceneids)
-
-    # Sentinel-2/MSI NBAR (Sen2Cor)
-    v4 = validation_nbar_s2_sen2cor(s2_sen2cor_nbar_dir, sen2cor_dir, sentinel2_sceneids)
-
-    # Sentinel-2/MSI (LaSRC)
-    v5 = validation_sr_s2_lasrc(lasrc_dir, sen2cor_dir, sentinel2_sceneids)
-
-    # Sentinel-2/MSI NBAR (LaSRC)
-    v6 = validation_nbar_s2_lasrc(s2_lasrc_nbar_dir, sen2cor_dir, sentinel2_sceneids)
-
-    # Compare Sen2Cor SR (Landsat-8 and Sentinel-2)
-    v7 = validation_sr_l8_s2_sen2cor(sen2cor_dir, sen2cor_dir, landsat8_sceneids, sentinel2_sceneids)
-
-    # Compare LaSRC SR (Landsat-8 and Sentinel-2)
-    v8 = validation_sr_l8_s2_lasrc(lasrc_dir, sen2cor_dir, landsat8_sceneids, sentinel2_sceneids)
-
-    # Compare Sen2Cor NBAR (Landsat-8 and Sentinel-2)
-    v9 = validation_nbar_l8_s2_sen2cor(lc8_nbar_dir, s2_sen2cor_nbar_dir, sen2cor_dir, landsat8_sceneids,
-                                       sentinel2_sceneids)
-
-    # Compare LaSRC NBAR (Landsat-8 and Sentinel-2)
-    v10 = validation_nbar_l8_s2_lasrc(lc8_nbar_dir, s2_lasrc_nbar_dir, sen2cor_dir, landsat8_sceneids,
-                                      sentinel2_sceneids)
-
-    # Merge the results and save it
-    validation_data_to_tidy([v1, v2, v3, v4, v5, v6, v7, v8, v9, v10])
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+from dagster import pipeline, repository, ModeDefinition, fs_io_manager, multiprocess_executor
+
+from validation.solids import *
+from preprocessing.solids import *
+
+from general.solids import load_and_standardize_sceneids_input, inventory_sceneids_input, select_partition_sceneids
+from general.resources import resource_repository, resource_lasrc_auxiliary_data, resource_concurrency_limits, \
+    resource_memoization, resource_partition
+from general.partition_sets import research_partition_set
+
+from research_processing.partitions import PARTITION_KINDS
+
+RESOURCE_DEFS = {
+    "io_manager": fs_io_manager,
+    "repository": resource_repository,
+    "lasrc_data": resource_lasrc_auxiliary_data,
+    "concurrency_limits": resource_concurrency_limits,
+    "memoization": resource_memoization,
+    "partition": resource_partition
+}
+
+MODE_DEFS = [
+    ModeDefinition(
+        resource_defs=RESOURCE_DEFS
+    ),
+    ModeDefinition(
+        name="production",
+        resource_defs=RESOURCE_DEFS,
+        executor_defs=[multiprocess_executor],
+        description="Independent solids (e.g., the per-scene steps and the validations) executed in parallel "
+                    "processes. The concurrency of the per-scene and validation solids is limited by the "
+                    "`concurrency_limits` resource."
+    )
+]
+
+
+@pipeline(
+    mode_defs=MODE_DEFS,
+    description="analysis pipeline."
+)
+def research_pipeline():
+    """analysis pipeline.
+
+    Each preprocessing step is executed once per scene (one Dagster step per scene), so the scenes are processed in
+    parallel by the executor (e.g., in the `production` mode) and a failed scene can be re-executed alone.
+    """
+    #
+    # Load and validate the input config (pre-flight inventory of the scenes, before any container is executed)
+    #
+    landsat8_sceneids, sentinel2_sceneids = load_and_standardize_sceneids_input()
+    landsat8_sceneids, sentinel2_sceneids = inventory_sceneids_input(landsat8_sceneids, sentinel2_sceneids)
+
+    #
+    # Select the scenes of the partition (all the scenes, when the run is not partitioned). The validations use all
+    # the scenes, to find the pairs of the partition scenes with the scenes of the previous partitions.
+    #
+    landsat8_partition_sceneids, sentinel2_partition_sceneids = select_partition_sceneids(landsat8_sceneids,
+                                                                                          sentinel2_sceneids)
+
+    sentinel2_scene = fan_out_scene_ids.alias("fan_out_sentinel2_scene_ids")(sentinel2_partition_sceneids)
+    landsat8_scene = fan_out_scene_ids.alias("fan_out_landsat8_scene_ids")(landsat8_partition_sceneids)
+
+    #
+    # Sentinel-2 Atmosphere correction (with sen2cor and LaSRC) and NBAR, per scene
+    #
+    # The NBAR of each scene starts as soon as its atmosphere correction is complete.
+    #
+    sen2cor_scene = sentinel2_scene.map(apply_sen2cor)
+    sen2cor_dir, sen2cor_scenes = collect_sen2cor(sen2cor_scene.collect())
+    s2_sen2cor_nbar_dir, s2_sen2cor_nbar_scenes = collect_s2_sen2cor_nbar(sen2cor_scene.map(s2_sen2cor_nbar).collect())
+
+    lasrc_scene = sentinel2_scene.map(apply_lasrc)
+    lasrc_dir, lasrc_scenes = collect_lasrc(lasrc_scene.collect())
+    s2_lasrc_nbar_dir, s2_lasrc_nbar_scenes = collect_s2_lasrc_nbar(lasrc_scene.map(s2_lasrc_nbar).collect())
+
+    #
+    # Landsat-8 NBAR, per scene
+    #
+    angles_lc8_scene = landsat8_scene.map(lc8_nbar_angles)
+    angles_lc8_dir, scene_angles_lc8 = collect_lc8_nbar_angles(angles_lc8_scene.collect())
+    lc8_nbar_dir, lc8_nbar_scenes = collect_lc8_nbar(angles_lc8_scene.map(lc8_nbar).collect())
+
+    #
+    # Validations
+    #
+    # The masks of the scenes are prepared once (for the scenes of the partition) and shared by all the validations.
+    #
+    cloud_masks = prepare_cloud_masks(sen2cor_dir, landsat8_partition_sceneids, sentinel2_partition_sceneids)
+
+    # Landsat-8 Surface Reflectance
+    v1 = validation_sr_l8(landsat8_sceneids, cloud_masks)
+
+    # Landsat-8 NBAR
+    v2 = validation_nbar_l8(lc8_nbar_dir, landsat8_sceneids, cloud_masks)
+
+    # Sentinel-2/MSI Surface Reflectance (Sen2Cor)
+    v3 = validation_sr_s2_sen2cor(sen2cor_dir, sen2cor_dir, sentinel2_sceneids, cloud_masks)
+
+    # Sentinel-2/MSI NBAR (Sen2Cor)
+    v4 = validation_nbar_s2_sen2cor(s2_sen2cor_nbar_dir, sen2cor_dir, sentinel2_sceneids, cloud_masks)
+
+    # Sentinel-2/MSI (LaSRC)
+    v5 = validation_sr_s2_lasrc(lasrc_dir, sen2cor_dir, sentinel2_sceneids, cloud_masks)
+
+    # Sentinel-2/MSI NBAR (LaSRC)
+    v6 = validation_nbar_s2_lasrc(s2_lasrc_nbar_dir, sen2cor_dir, sentinel2_sceneids, cloud_masks)
+
+    # Compare Sen2Cor SR (Landsat-8 and Sentinel-2)
+    v7 = validation_sr_l8_s2_sen2cor(sen2cor_dir, sen2cor_dir, landsat8_sceneids, sentinel2_sceneids, cloud_masks)
+
+    # Compare LaSRC SR (Landsat-8 and Sentinel-2)
+    v8 = validation_sr_l8_s2_lasrc(lasrc_dir, sen2cor_dir, landsat8_sceneids, sentinel2_sceneids, cloud_masks)
+
+    # Compare Sen2Cor NBAR (Landsat-8 and Sentinel-2)
+    v9 = validation_nbar_l8_s2_sen2cor(lc8_nbar_dir, s2_sen2cor_nbar_dir, sen2cor_dir, landsat8_sceneids,
+                                       sentinel2_sceneids, cloud_masks)
+
+    # Compare LaSRC NBAR (Landsat-8 and Sentinel-2)
+    v10 = validation_nbar_l8_s2_lasrc(lc8_nbar_dir, s2_lasrc_nbar_dir, sen2cor_dir, landsat8_sceneids,
+                                      sentinel2_sceneids, cloud_masks)
+
+    # Merge the results and save it
+    validation_data_to_tidy([v1, v2, v3, v4, v5, v6, v7, v8, v9, v10])
+
+
+@repository
+def research_repository():
+    """analysis repository, with the pipeline and its partitions (acquisition month and tile) for incremental runs."""
+    return [
+        research_pipeline,
+        *[research_partition_set("research_pipeline", partition_by) for partition_by in PARTITION_KINDS]
+    ]
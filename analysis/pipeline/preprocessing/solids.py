@@ -1,294 +1,526 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-"""research-processing analysis processing solids."""
-
-import os
-
-from dagster import List, Tuple, String
-from dagster import solid, OutputDefinition, InputDefinition
-
-from research_processing import toolbox
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for `sen2cor` processing.")
-    ],
-    output_defs=[
-        OutputDefinition(name="s2_sen2cor_scene_path",
-                         dagster_type=String,
-                         description="Full path to the directory where the Sentinel-2/MSI scenes processed with "
-                                    "`sen2cor` were saved."),
-        OutputDefinition(name="s2_sen2cor_scene_ids",
-                         dagster_type=List[String],
-                         description="List with the name of each of the scenes that were processed. These names are"
-                                     " equivalent to the name of the directories where each of the processed scenes "
-                                     "were saved (Usually, you have the id of each of the scenes as the name of the "
-                                     "directories)."),
-    ],
-    required_resource_keys={"repository"},
-    description="Apply atmospheric correction using the `sen2cor` algorithm. The solid input indicates which scenes are "
-                "to be processed from the Sentinel-2/MSI data repository."
-)
-def apply_sen2cor(context, s2_scene_ids: List[String]) -> Tuple[String, List[String]]:
-    """Sen2Cor (Sentinel-2/MSI) Atmosphere correction."""
-    from research_processing.surface_reflectance import sen2cor
-
-    #
-    # Prepare input/output directory.
-    #
-    input_dir = context.resources.repository["sentinel2_input_dir"]
-    output_dir = context.resources.repository["outdir_sentinel2"]
-
-    output_dir = toolbox.prepare_output_directory(output_dir, "s2_sen2cor_sr")
-
-    #
-    # Apply sen2cor.
-    #
-    sen2cor(input_dir, output_dir, s2_scene_ids)
-    sen2cor_scene_ids = toolbox.filename(os.listdir(output_dir))
-
-    return output_dir, sen2cor_scene_ids
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for `LaSRC` processing.")
-    ],
-    output_defs=[
-        OutputDefinition(name="s2_lasrc_scene_path",
-                         dagster_type=String,
-                         description="Full path to the directory where the Sentinel-2/MSI scenes processed with `LaSRC` were saved."),
-        OutputDefinition(name="s2_lasrc_scene_ids",
-                         dagster_type=List[String],
-                         description="List with the name of each of the scenes that were processed. These names are"
-                                     " equivalent to the name of the directories where each of the processed scenes "
-                                     "were saved (Usually, you have the id of each of the scenes as the name of the "
-                                     "directories)."
-                         ),
-    ],
-    required_resource_keys={"lasrc_data", "repository"},
-    description="Apply atmospheric correction using the `LaSRC` algorithm. The solid input indicates which scenes are "
-                "to be processed from the Sentinel-2/MSI data repository."
-)
-def apply_lasrc(context, s2_scene_ids: List[String]) -> Tuple[String, List[String]]:
-    """LaSRC (Sentinel-2/MSI) Atmosphere correction."""
-    from research_processing.surface_reflectance import lasrc
-
-    #
-    # Prepare input/output directory.
-    #
-    input_dir = context.resources.repository["sentinel2_input_dir"]
-    output_dir = context.resources.repository["outdir_sentinel2"]
-
-    output_dir = toolbox.prepare_output_directory(output_dir, "s2_lasrc_sr")
-
-    #
-    # Defining the LaSRC auxiliary data.
-    #
-    auxiliary_data = context.resources.lasrc_data["lasrc_auxiliary_directory"]
-
-    #
-    # Applying LaSRC.
-    #
-    lasrc(input_dir, output_dir, s2_scene_ids, auxiliary_data)
-    lasrc_scene_ids = toolbox.filename(os.listdir(output_dir))
-
-    return output_dir, lasrc_scene_ids
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="lc8_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Landsat-8/OLI Level 2 scenes that should be used "
-                                    "for NBAR Angles processing (Required step for NBAR processing "
-                                    "on Landsat-8/OLI images).")
-    ],
-    output_defs=[
-        OutputDefinition(name="lc8_nbar_angles_dir",
-                        dagster_type=String,
-                        description="Path to the each generated angle directory."),
-        OutputDefinition(name="lc8_nbar_angles",
-                         dagster_type=List[String],
-                         description="Name of each scene that had the angles generated.")
-    ],
-    required_resource_keys={"repository"},
-    description="Generate the angles of the Landsat-8/OLI scenes used for processing the NBAR products. The generated "
-                "angles are saved in the scene directory."
-)
-def lc8_nbar_angles(context, lc8_scene_ids: List[String]) -> List[String]:
-    """Landsat-8/OLI Angles for NBAR."""
-    from research_processing.nbar import lc8_generate_angles
-
-    #
-    # Prepare input/output directory.
-    #
-    input_dir = context.resources.repository["landsat8_input_dir"]
-    output_dir = context.resources.repository["outdir_landsat8"]
-
-    output_dir = toolbox.prepare_output_directory(output_dir, "lc8_nbar_angles")
-
-    #
-    # Generate Landsat-8 Angles for NBAR calculation.
-    #
-    return output_dir, lc8_generate_angles(input_dir, output_dir, lc8_scene_ids)
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="lc8_nbar_angles_dir",
-                        dagster_type=String,
-                        description="Path to the directory where the generated scene angles are stored."),
-        InputDefinition(name="lc8_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Landsat-8/OLI scenes that should be used "
-                                    "for NBAR processing.")
-    ],
-    output_defs=[
-        OutputDefinition(name="lc8_nbar_scene_path",
-                         dagster_type=String,
-                         description="Full path to the directory where the Landsat-8/OLI NBAR products were saved."),
-        OutputDefinition(name="lc8_nbar_sceneid",
-                         dagster_type=List[String],
-                         description="List with the name of each NBAR product that were processed. These names are"
-                                     " equivalent to the name of the directories where each of the processed scenes "
-                                     "were saved."
-                         ),
-    ],
-    required_resource_keys={"repository"},
-    description="Generate the NBAR products using Landsat-8/OLI scenes."
-)
-def lc8_nbar(context, lc8_nbar_angles_dir: String, lc8_scene_ids: List[String]) -> Tuple[String, List[String]]:
-    """Landsat-8/OLI NBAR."""
-    from research_processing.nbar import lc8_nbar
-
-    #
-    # Prepare input/output directory.
-    #
-    input_dir = context.resources.repository["landsat8_input_dir"]
-    output_dir = context.resources.repository["outdir_landsat8"]
-
-    output_dir = toolbox.prepare_output_directory(output_dir, "lc8_nbar")
-
-    #
-    # Generate NBAR product for Landsat-8 scenes.
-    #
-    lc8_nbar(input_dir, lc8_nbar_angles_dir, output_dir, lc8_scene_ids)
-    lc8_nbar_scene_ids = toolbox.filename(os.listdir(output_dir))
-
-    return output_dir, lc8_nbar_scene_ids
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_sen2cor_dir",
-                        dagster_type=String,
-                        description="Path to the directory where the Sentinel-2/MSI scenes corrected "
-                                    "with Sen2Cor are located. It is expected that the scenes used as input will have "
-                                    "the influence of the atmosphere corrected with `sen2cor`."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for NBAR processing. The scene name must be equivalent to the name of the "
-                                    "scene directories in the `sen2cor_dir` directory.")
-    ],
-    output_defs=[
-        OutputDefinition(name="s2_sen2cor_nbar_scene_path",
-                         dagster_type=String,
-                         description="Full path to the directory where the NBAR products were saved."),
-        OutputDefinition(name="s2_sen2cor_nbar_sceneid",
-                         dagster_type=List[String],
-                         description="List with the name of each NBAR product that were processed with "
-                                     "Sentinel-2/MSI scenes. These names are equivalent to the name of the directories "
-                                     "where each of the processed scenes were saved."
-                         ),
-    ],
-    required_resource_keys={"repository"},
-    description="Generate the NBAR products using Sentinel-2/MSI scenes (with sen2cor atmosphere correction)."
-)
-def s2_sen2cor_nbar(context, s2_sen2cor_dir: String, s2_scene_ids: List[String]) -> Tuple[String, List[String]]:
-    """Sentinel-2 (with sen2cor atmosphere correction) NBAR."""
-    from research_processing.nbar import s2_sen2cor_nbar
-
-    #
-    # Prepare output directory.
-    #
-    output_dir = context.resources.repository["outdir_sentinel2"]
-    output_dir = toolbox.prepare_output_directory(output_dir, "s2_sen2cor_nbar")
-
-    #
-    # Generate NBAR product for Sentinel-2 scenes (corrected with LaSRC).
-    #
-    s2_sen2cor_nbar(s2_sen2cor_dir, output_dir, s2_scene_ids)
-    s2_sen2cor_nbar_scene_ids = toolbox.filename(os.listdir(output_dir))
-
-    return output_dir, s2_sen2cor_nbar_scene_ids
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_lasrc_dir",
-                        dagster_type=String,
-                        description="Path to the directory where the Sentinel-2/MSI scenes corrected "
-                                    "with LaSRC are located. It is expected that the scenes used as input will have "
-                                    "the influence of the atmosphere corrected with LaSRC."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for NBAR processing. The scene name must be equivalent to the name of the "
-                                    "scene directories in the `lasrc_dir` directory.")
-    ],
-    output_defs=[
-        OutputDefinition(name="s2_lasrc_nbar_scene_path",
-                         dagster_type=String,
-                         description="Full path to the directory where the NBAR products were saved."),
-        OutputDefinition(name="s2_lasrc_nbar_sceneid",
-                         dagster_type=List[String],
-                         description="List with the name of each NBAR product that were processed with "
-                                     "Sentinel-2/MSI scenes. These names are equivalent to the name of the directories "
-                                     "where each of the processed scenes were saved."
-                         ),
-    ],
-    required_resource_keys={"repository"},
-    description="Generate the NBAR products using Sentinel-2 scenes (with LaSRC atmosphere correction)."
-)
-def s2_lasrc_nbar(context, s2_lasrc_dir: String, s2_scene_ids: List[String]) -> Tuple[String, List[String]]:
-    """Sentinel-2 (with LaSRC atmosphere correction) NBAR."""
-    from research_processing.nbar import s2_lasrc_nbar
-
-    #
-    # Prepare output directory.
-    #
-    output_dir = context.resources.repository["outdir_sentinel2"]
-    output_dir = toolbox.prepare_output_directory(output_dir, "s2_lasrc_nbar")
-
-    #
-    # Generate NBAR product for Sentinel-2 scenes (corrected with LaSRC).
-    #
-    s2_lasrc_nbar(s2_lasrc_dir, output_dir, s2_scene_ids)
-    s2_lasrc_nbar_scene_ids = toolbox.filename(os.listdir(output_dir))
-
-    return output_dir, s2_lasrc_nbar_scene_ids
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+"""research-processing analysis processing solids."""
+
+import re
+from typing import Callable
+
+from dagster import Field, Dict, List, Tuple, String
+from dagster import solid, DynamicOutput, DynamicOutputDefinition, OutputDefinition, InputDefinition
+
+from research_processing import toolbox
+
+from research_processing.config import EnvironmentConfig
+
+from general.resources import IncompleteOutputs, limit_concurrency, memoize, scene_solids_concurrency
+
+
+def _continue_on_failure_config(processor: str) -> Field:
+    """Define the configuration of the partial-failure continuation of a processing step."""
+    return Field(
+        config=bool,
+        description=f"Continue processing the other scenes when a scene fails with `{processor}`. The failed scenes "
+                    "are reported in the solid logs and left out of the outputs.",
+        default_value=False
+    )
+
+
+def _auxiliary_subset_config() -> Field:
+    """Define the configuration of the minimal subset of the LaSRC auxiliary data."""
+    return Field(
+        config=bool,
+        description="Mount only a minimal subset of the LaSRC auxiliary data in the containers, with the LADS files "
+                    "of the acquisition dates of the scenes (and the static files). The subset of the run is used "
+                    "when it is created by the `lasrc_data` resource (See its `sentinel2_sceneid_list`). Use `False` "
+                    "to mount the whole auxiliary data directory.",
+        default_value=True
+    )
+
+
+def _progress_reporter(context, processor: str) -> Callable[[str, float], None]:
+    """Create a function that reports the progress of the scenes in the solid logs.
+
+    Args:
+        context: Solid execution context.
+
+        processor (str): Name of the processor executed in the containers.
+
+    Returns:
+        Callable[[str, float], None]: Function called with the scene id and its progress (%).
+    """
+    def report_progress(scene_id: str, progress: float):
+        context.log.info(f"{processor} progress of {scene_id}: {progress:.0f}%")
+
+    return report_progress
+
+
+def _failure_reporter(context, processor: str) -> Callable[[str, BaseException], None]:
+    """Create a function that reports the scenes that could not be processed in the solid logs.
+
+    Args:
+        context: Solid execution context.
+
+        processor (str): Name of the processor executed in the containers.
+
+    Returns:
+        Callable[[str, BaseException], None]: Function called with the scene id and its error.
+    """
+    def report_failure(scene_id: str, error: BaseException):
+        context.log.warning(f"{processor} failed to process {scene_id}: {error}")
+
+    return report_failure
+
+
+def _scene_outputs(outputs: Dict, scene_ids: List) -> Dict:
+    """Check that all the scenes of a per-scene processing step were processed.
+
+    Args:
+        outputs (Dict): Outputs of each scene processed with success.
+
+        scene_ids (List): Scenes that should be processed.
+
+    Returns:
+        Dict: The `outputs`.
+
+    Raises:
+        IncompleteOutputs: If any of the scenes could not be processed (with `continue_on_failure`), so the outputs
+        are not memoized and the scene is processed again in the next run.
+    """
+    if any(scene_id not in outputs for scene_id in scene_ids):
+        raise IncompleteOutputs(outputs)
+
+    return outputs
+
+
+# Directory (`repository` key and name) where the outputs of each per-scene processing step are saved.
+_OUTPUT_DIRS = {
+    "sen2cor": ("outdir_sentinel2", "s2_sen2cor_sr"),
+    "lasrc": ("outdir_sentinel2", "s2_lasrc_sr"),
+    "lc8_nbar_angles": ("outdir_landsat8", "lc8_nbar_angles"),
+    "lc8_nbar": ("outdir_landsat8", "lc8_nbar"),
+    "s2_sen2cor_nbar": ("outdir_sentinel2", "s2_sen2cor_nbar"),
+    "s2_lasrc_nbar": ("outdir_sentinel2", "s2_lasrc_nbar")
+}
+
+
+def _output_dir(context, step: str) -> str:
+    """Prepare the directory where the outputs of a per-scene processing step are saved (See `_OUTPUT_DIRS`)."""
+    repository_key, pattern = _OUTPUT_DIRS[step]
+
+    return toolbox.prepare_output_directory(context.resources.repository[repository_key], pattern)
+
+
+def _scene_execution_config(processor: str) -> Dict:
+    """Define the configuration schema used to control the execution of a per-scene (mapped) processing step.
+
+    Args:
+        processor (str): Name of the processor executed in the container.
+
+    Returns:
+        Dict: Configuration schema with the `skip_processed` and `continue_on_failure` fields.
+    """
+    return {
+        "skip_processed": Field(
+            config=bool,
+            description=f"Skip the scenes already processed with `{processor}` (scenes with a valid completion "
+                        "manifest). Use `False` to reprocess all the scenes.",
+            default_value=True
+        ),
+        "continue_on_failure": _continue_on_failure_config(processor)
+    }
+
+
+def _mapping_key(scene_id: str) -> str:
+    """Define the mapping key of a scene (Dagster only accepts letters, numbers and `_` in the keys)."""
+    return re.sub(r"[^A-Za-z0-9_]", "_", scene_id)
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the scenes that should be processed.")
+    ],
+    output_defs=[
+        DynamicOutputDefinition(name="scene_id",
+                                dagster_type=String,
+                                description="Name of each scene. The per-scene processing steps are mapped over "
+                                            "these outputs.")
+    ],
+    description="Fan out the scenes, so each processing step is executed (and can be retried) once per scene. The "
+                "scenes are processed in parallel by the Dagster executor (e.g., in the `production` mode)."
+)
+def fan_out_scene_ids(context, scene_ids: List[String]):
+    """Fan out the scenes."""
+    for scene_id in scene_ids:
+        yield DynamicOutput(scene_id, mapping_key=_mapping_key(scene_id), output_name="scene_id")
+
+
+def _collect_scenes_solid(name: str, step: str, output_dir_name: str, scenes_name: str, scenes: str):
+    """Define a solid that collects the outputs of the per-scene executions of a processing step.
+
+    Args:
+        name (str): Solid name.
+
+        step (str): Processing step (See `_OUTPUT_DIRS`).
+
+        output_dir_name (str): Name of the output with the directory of the processing step.
+
+        scenes_name (str): Name of the output with the outputs of the scenes.
+
+        scenes (str): Description of the scenes collected.
+
+    Returns:
+        SolidDefinition: Solid that receives the outputs of each scene and returns the directory of the processing
+        step and the dictionary mapping each scene id to its outputs.
+    """
+    @solid(
+        name=name,
+        input_defs=[
+            InputDefinition(name="scene_outputs",
+                            dagster_type=List[Dict[String, List[String]]],
+                            description=f"Outputs of each one of the {scenes} (collected from the mapped steps).")
+        ],
+        output_defs=[
+            OutputDefinition(name=output_dir_name,
+                             dagster_type=String,
+                             description=f"Full path to the directory where the {scenes} were saved."),
+            OutputDefinition(name=scenes_name,
+                             dagster_type=Dict[String, List[String]],
+                             description=f"Dictionary mapping each scene id to the full path of the {scenes}.")
+        ],
+        required_resource_keys={"repository", "memoization"},
+        description=f"Collect the {scenes}, rebuilding the directory and the scene outputs of the processing step."
+    )
+    @memoize()
+    def collect_scenes(context, scene_outputs: List) -> Tuple[String, Dict[String, List[String]]]:
+        return _output_dir(context, step), {
+            scene_id: outputs for scene in scene_outputs for scene_id, outputs in scene.items()
+        }
+
+    return collect_scenes
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_scene_id",
+                        dagster_type=String,
+                        description="Name of the Sentinel-2/MSI scene that should be used for `sen2cor` processing "
+                                    "(mapped from `fan_out_scene_ids`).")
+    ],
+    output_defs=[
+        OutputDefinition(name="s2_sen2cor_scenes",
+                         dagster_type=Dict[String, List[String]],
+                         description="Dictionary mapping the Sentinel-2/MSI scene id to the full path of the outputs "
+                                     "generated for the scene with `sen2cor` (Usually, a directory named with the id "
+                                     "of the processed scene). It is empty when the scene could not be processed "
+                                     "(with `continue_on_failure`)."),
+    ],
+    config_schema=_scene_execution_config("sen2cor"),
+    required_resource_keys={"repository", "concurrency_limits", "memoization"},
+    description="Apply atmospheric correction using the `sen2cor` algorithm in a Sentinel-2/MSI scene. The solid is "
+                "mapped over the scenes (See `fan_out_scene_ids`) and its outputs are collected by `collect_sen2cor`."
+)
+@memoize(EnvironmentConfig.SEN2COR_IMAGE)
+@limit_concurrency("scene", EnvironmentConfig.SEN2COR_IMAGE)
+def apply_sen2cor(context, s2_scene_id: String) -> Dict[String, List[String]]:
+    """Sen2Cor (Sentinel-2/MSI) Atmosphere correction."""
+    from research_processing.surface_reflectance import sen2cor
+
+    #
+    # Prepare input/output directory.
+    #
+    input_dir = context.resources.repository["sentinel2_input_dir"]
+    output_dir = _output_dir(context, "sen2cor")
+
+    #
+    # Apply sen2cor.
+    #
+    outputs = sen2cor(input_dir, output_dir, [s2_scene_id],
+                      skip_processed=context.solid_config["skip_processed"],
+                      continue_on_failure=context.solid_config["continue_on_failure"],
+                      failure_callback=_failure_reporter(context, "sen2cor"),
+                      concurrent_steps=scene_solids_concurrency(context, EnvironmentConfig.SEN2COR_IMAGE),
+                      progress_callback=_progress_reporter(context, "sen2cor"))
+
+    return _scene_outputs(outputs, [s2_scene_id])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_scene_id",
+                        dagster_type=String,
+                        description="Name of the Sentinel-2/MSI scene that should be used for `LaSRC` processing "
+                                    "(mapped from `fan_out_scene_ids`).")
+    ],
+    output_defs=[
+        OutputDefinition(name="s2_lasrc_scenes",
+                         dagster_type=Dict[String, List[String]],
+                         description="Dictionary mapping the Sentinel-2/MSI scene id to the full path of the outputs "
+                                     "generated for the scene with `LaSRC` (Usually, a directory named with the id "
+                                     "of the processed scene). It is empty when the scene could not be processed "
+                                     "(with `continue_on_failure`)."
+                         ),
+    ],
+    config_schema={
+        **_scene_execution_config("LaSRC"),
+        "subset_auxiliary_data": _auxiliary_subset_config()
+    },
+    required_resource_keys={"lasrc_data", "repository", "concurrency_limits", "memoization"},
+    description="Apply atmospheric correction using the `LaSRC` algorithm in a Sentinel-2/MSI scene. The solid is "
+                "mapped over the scenes (See `fan_out_scene_ids`) and its outputs are collected by `collect_lasrc`."
+)
+@memoize(EnvironmentConfig.LASRC_IMAGE)
+@limit_concurrency("scene", EnvironmentConfig.LASRC_IMAGE)
+def apply_lasrc(context, s2_scene_id: String) -> Dict[String, List[String]]:
+    """LaSRC (Sentinel-2/MSI) Atmosphere correction."""
+    from research_processing.surface_reflectance import lasrc
+
+    #
+    # Prepare input/output directory.
+    #
+    input_dir = context.resources.repository["sentinel2_input_dir"]
+    output_dir = _output_dir(context, "lasrc")
+
+    #
+    # Defining the LaSRC auxiliary data.
+    #
+    auxiliary_data = context.resources.lasrc_data["lasrc_auxiliary_directory"]
+
+    #
+    # Applying LaSRC.
+    #
+    outputs = lasrc(input_dir, output_dir, [s2_scene_id], auxiliary_data,
+                    skip_processed=context.solid_config["skip_processed"],
+                    continue_on_failure=context.solid_config["continue_on_failure"],
+                    failure_callback=_failure_reporter(context, "LaSRC"),
+                    concurrent_steps=scene_solids_concurrency(context, EnvironmentConfig.LASRC_IMAGE),
+                    progress_callback=_progress_reporter(context, "LaSRC"),
+                    subset_aux_data=context.solid_config["subset_auxiliary_data"],
+                    aux_subset_dir=context.resources.lasrc_data["lasrc_auxiliary_subset"]
+                    if context.solid_config["subset_auxiliary_data"] else None)
+
+    return _scene_outputs(outputs, [s2_scene_id])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="lc8_scene_id",
+                        dagster_type=String,
+                        description="Name of the Landsat-8/OLI Level 2 scene that should be used for NBAR Angles "
+                                    "processing (Required step for NBAR processing on Landsat-8/OLI images), mapped "
+                                    "from `fan_out_scene_ids`.")
+    ],
+    output_defs=[
+        OutputDefinition(name="lc8_nbar_angles",
+                         dagster_type=Dict[String, List[String]],
+                         description="Dictionary mapping the scene to the full path of the generated angles. It is "
+                                     "empty when the angles could not be generated (with `continue_on_failure`).")
+    ],
+    config_schema=_scene_execution_config("landsat-angles"),
+    required_resource_keys={"repository", "concurrency_limits", "memoization"},
+    description="Generate the angles of a Landsat-8/OLI scene used for processing the NBAR products. The solid is "
+                "mapped over the scenes (See `fan_out_scene_ids`) and its outputs are collected by "
+                "`collect_lc8_nbar_angles`."
+)
+@memoize(EnvironmentConfig.LANDSAT8_ANGLES_IMAGE)
+@limit_concurrency("scene", EnvironmentConfig.LANDSAT8_ANGLES_IMAGE)
+def lc8_nbar_angles(context, lc8_scene_id: String) -> Dict[String, List[String]]:
+    """Landsat-8/OLI Angles for NBAR."""
+    from research_processing.nbar import lc8_generate_angles
+
+    #
+    # Prepare input/output directory.
+    #
+    input_dir = context.resources.repository["landsat8_input_dir"]
+    output_dir = _output_dir(context, "lc8_nbar_angles")
+
+    #
+    # Generate Landsat-8 Angles for NBAR calculation.
+    #
+    outputs = lc8_generate_angles(input_dir, output_dir, [lc8_scene_id],
+                                  skip_processed=context.solid_config["skip_processed"],
+                                  continue_on_failure=context.solid_config["continue_on_failure"],
+                                  failure_callback=_failure_reporter(context, "landsat-angles"),
+                                  concurrent_steps=scene_solids_concurrency(context,
+                                                                            EnvironmentConfig.LANDSAT8_ANGLES_IMAGE))
+
+    return _scene_outputs(outputs, [lc8_scene_id])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="lc8_nbar_angles",
+                        dagster_type=Dict[String, List[String]],
+                        description="Dictionary mapping the Landsat-8/OLI scene that should be used for NBAR "
+                                    "processing to its generated angles (mapped from `lc8_nbar_angles`).")
+    ],
+    output_defs=[
+        OutputDefinition(name="lc8_nbar_scenes",
+                         dagster_type=Dict[String, List[String]],
+                         description="Dictionary mapping the Landsat-8/OLI scene id to the full path of the NBAR "
+                                     "products generated for the scene."
+                         ),
+    ],
+    config_schema=_scene_execution_config("NBAR"),
+    required_resource_keys={"repository", "concurrency_limits", "memoization"},
+    description="Generate the NBAR products of a Landsat-8/OLI scene. The solid is mapped over the scenes (See "
+                "`lc8_nbar_angles`) and its outputs are collected by `collect_lc8_nbar`."
+)
+@memoize(EnvironmentConfig.NBAR_IMAGE)
+@limit_concurrency("scene", EnvironmentConfig.NBAR_IMAGE)
+def lc8_nbar(context, lc8_nbar_angles: Dict[String, List[String]]) -> Dict[String, List[String]]:
+    """Landsat-8/OLI NBAR."""
+    from research_processing.nbar import lc8_nbar
+
+    #
+    # Prepare input/output directory.
+    #
+    input_dir = context.resources.repository["landsat8_input_dir"]
+    output_dir = _output_dir(context, "lc8_nbar")
+
+    #
+    # Generate NBAR product for Landsat-8 scenes.
+    #
+    outputs = lc8_nbar(input_dir, _output_dir(context, "lc8_nbar_angles"), output_dir, list(lc8_nbar_angles),
+                       skip_processed=context.solid_config["skip_processed"],
+                       continue_on_failure=context.solid_config["continue_on_failure"],
+                       failure_callback=_failure_reporter(context, "NBAR"),
+                       concurrent_steps=scene_solids_concurrency(context, EnvironmentConfig.NBAR_IMAGE))
+
+    return _scene_outputs(outputs, list(lc8_nbar_angles))
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_sen2cor_scenes",
+                        dagster_type=Dict[String, List[String]],
+                        description="Dictionary mapping the Sentinel-2/MSI scene id to the full path of the "
+                                    "outputs generated for the scene with `sen2cor` (mapped from `apply_sen2cor`). "
+                                    "These outputs are used for NBAR processing.")
+    ],
+    output_defs=[
+        OutputDefinition(name="s2_sen2cor_nbar_scenes",
+                         dagster_type=Dict[String, List[String]],
+                         description="Dictionary mapping the Sentinel-2/MSI scene used as input to the full path of "
+                                     "the NBAR products generated for the scene."
+                         ),
+    ],
+    config_schema=_scene_execution_config("NBAR"),
+    required_resource_keys={"repository", "concurrency_limits", "memoization"},
+    description="Generate the NBAR products of a Sentinel-2/MSI scene (with sen2cor atmosphere correction). The solid "
+                "is mapped over the scenes (See `apply_sen2cor`) and its outputs are collected by "
+                "`collect_s2_sen2cor_nbar`."
+)
+@memoize(EnvironmentConfig.NBAR_IMAGE)
+@limit_concurrency("scene", EnvironmentConfig.NBAR_IMAGE)
+def s2_sen2cor_nbar(context, s2_sen2cor_scenes: Dict[String, List[String]]) -> Dict[String, List[String]]:
+    """Sentinel-2 (with sen2cor atmosphere correction) NBAR."""
+    from research_processing.nbar import s2_sen2cor_nbar
+
+    #
+    # Prepare output directory.
+    #
+    output_dir = _output_dir(context, "s2_sen2cor_nbar")
+
+    #
+    # Generate NBAR product for Sentinel-2 scenes (corrected with sen2cor).
+    #
+    outputs = s2_sen2cor_nbar(_output_dir(context, "sen2cor"), output_dir, toolbox.output_names(s2_sen2cor_scenes),
+                              skip_processed=context.solid_config["skip_processed"],
+                              continue_on_failure=context.solid_config["continue_on_failure"],
+                              failure_callback=_failure_reporter(context, "NBAR"),
+                              concurrent_steps=scene_solids_concurrency(context, EnvironmentConfig.NBAR_IMAGE))
+
+    return _scene_outputs(outputs, toolbox.output_names(s2_sen2cor_scenes))
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_lasrc_scenes",
+                        dagster_type=Dict[String, List[String]],
+                        description="Dictionary mapping the Sentinel-2/MSI scene id to the full path of the "
+                                    "outputs generated for the scene with `LaSRC` (mapped from `apply_lasrc`). "
+                                    "These outputs are used for NBAR processing.")
+    ],
+    output_defs=[
+        OutputDefinition(name="s2_lasrc_nbar_scenes",
+                         dagster_type=Dict[String, List[String]],
+                         description="Dictionary mapping the Sentinel-2/MSI scene used as input to the full path of "
+                                     "the NBAR products generated for the scene."
+                         ),
+    ],
+    config_schema=_scene_execution_config("NBAR"),
+    required_resource_keys={"repository", "concurrency_limits", "memoization"},
+    description="Generate the NBAR products of a Sentinel-2/MSI scene (with LaSRC atmosphere correction). The solid "
+                "is mapped over the scenes (See `apply_lasrc`) and its outputs are collected by "
+                "`collect_s2_lasrc_nbar`."
+)
+@memoize(EnvironmentConfig.NBAR_IMAGE)
+@limit_concurrency("scene", EnvironmentConfig.NBAR_IMAGE)
+def s2_lasrc_nbar(context, s2_lasrc_scenes: Dict[String, List[String]]) -> Dict[String, List[String]]:
+    """Sentinel-2 (with LaSRC atmosphere correction) NBAR."""
+    from research_processing.nbar import s2_lasrc_nbar
+
+    #
+    # Prepare output directory.
+    #
+    output_dir = _output_dir(context, "s2_lasrc_nbar")
+
+    #
+    # Generate NBAR product for Sentinel-2 scenes (corrected with LaSRC).
+    #
+    outputs = s2_lasrc_nbar(_output_dir(context, "lasrc"), output_dir, toolbox.output_names(s2_lasrc_scenes),
+                            skip_processed=context.solid_config["skip_processed"],
+                            continue_on_failure=context.solid_config["continue_on_failure"],
+                            failure_callback=_failure_reporter(context, "NBAR"),
+                            concurrent_steps=scene_solids_concurrency(context, EnvironmentConfig.NBAR_IMAGE))
+
+    return _scene_outputs(outputs, toolbox.output_names(s2_lasrc_scenes))
+
+
+collect_sen2cor = _collect_scenes_solid(
+    "collect_sen2cor", "sen2cor", "s2_sen2cor_scene_path", "s2_sen2cor_scenes",
+    "Sentinel-2/MSI scenes processed with `sen2cor`"
+)
+
+collect_lasrc = _collect_scenes_solid(
+    "collect_lasrc", "lasrc", "s2_lasrc_scene_path", "s2_lasrc_scenes",
+    "Sentinel-2/MSI scenes processed with `LaSRC`"
+)
+
+collect_lc8_nbar_angles = _collect_scenes_solid(
+    "collect_lc8_nbar_angles", "lc8_nbar_angles", "lc8_nbar_angles_dir", "lc8_nbar_angles",
+    "angles generated for the Landsat-8/OLI scenes"
+)
+
+collect_lc8_nbar = _collect_scenes_solid(
+    "collect_lc8_nbar", "lc8_nbar", "lc8_nbar_scene_path", "lc8_nbar_scenes",
+    "NBAR products generated for the Landsat-8/OLI scenes"
+)
+
+collect_s2_sen2cor_nbar = _collect_scenes_solid(
+    "collect_s2_sen2cor_nbar", "s2_sen2cor_nbar", "s2_sen2cor_nbar_scene_path", "s2_sen2cor_nbar_scenes",
+    "NBAR products generated for the Sentinel-2/MSI scenes (with sen2cor atmosphere correction)"
+)
+
+collect_s2_lasrc_nbar = _collect_scenes_solid(
+    "collect_s2_lasrc_nbar", "s2_lasrc_nbar", "s2_lasrc_nbar_scene_path", "s2_lasrc_nbar_scenes",
+    "NBAR products generated for the Sentinel-2/MSI scenes (with LaSRC atmosphere correction)"
+)
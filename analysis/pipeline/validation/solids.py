@@ -1,705 +1,982 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-import os
-
-from dagster import Field, List, String, Nothing
-from dagster import solid, InputDefinition
-
-from research_processing import toolbox
-from research_processing.validation import validation_funcs
-from research_processing.validation import validation_routines
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_sen2cor_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
-        InputDefinition(name="s2_sen2cor_cloud_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Sentinel-2 scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands10m": Field(
-            config=list,
-            description="Name of the spectral bands (spectral resolution = 10m) that will be used in the validation. "
-                        "These names should be equivalent to the standard ESA Sentinel-2 .SAFE file band naming "
-                        "pattern (e.g. B01, B02)",
-            default_value=[
-                "B02", "B03", "B04", "B08"
-            ]
-        ),
-        "bands20m": Field(
-            config=list,
-            description="Name of the spectral bands (spectral resolution = 20m) that will be used in the validation. "
-                        "These names should be equivalent to the standard ESA Sentinel-2 .SAFE file band naming "
-                        "pattern (e.g. B01, B02)",
-            default_value=[
-                "B8A", "B11", "B12"
-            ]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=5,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Sentinel-2 (with Se2Cor atmosphere correction) Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_sr_s2_sen2cor(context, s2_sen2cor_dir: String, s2_sen2cor_cloud_dir: String,
-                             s2_scene_ids: List[String]) -> Nothing:
-    """Validate (Compare) Sentinel-2 (with Se2Cor atmosphere correction) Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`"""
-    #
-    # Search for pairs
-    #
-    pairs = validation_funcs.search_pairs_s2(validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
-                                             day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare output directory.
-    #
-    output_dir = context.resources.repository["outdir_validation"]
-    output_dir = toolbox.prepare_output_directory(output_dir, "validation_sr_s2_sen2cor")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_sr_s2_sen2cor(s2_sen2cor_dir, s2_sen2cor_cloud_dir, output_dir, pairs,
-                                                 **{
-                                                     "bands10m": context.solid_config["bands10m"],
-                                                     "bands20m": context.solid_config["bands20m"]
-                                                 })
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_lasrc_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the scenes processed with `LaSRC` were saved."),
-        InputDefinition(name="s2_sen2cor_cloud_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved"),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. "
-                        "These names should be equivalent to the standard LaSRC file band naming "
-                        "pattern (e.g. sr_band2, sr_band3, sr_band8a)",
-            default_value=[
-                "sr_band2", "sr_band3", "sr_band4", "sr_band8", "sr_band8a", "sr_band11", "sr_band12"
-            ]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=5,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_sr_s2_lasrc(context, s2_lasrc_dir: String, s2_sen2cor_cloud_dir: String, s2_scene_ids: List) -> Nothing:
-    """Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs
-    #
-    pairs = validation_funcs.search_pairs_s2(validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
-                                             day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare output directory.
-    #
-    output_dir = context.resources.repository["outdir_validation"]
-    output_dir = toolbox.prepare_output_directory(output_dir, "validation_sr_s2_lasrc")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_sr_s2_lasrc(s2_lasrc_dir, s2_sen2cor_cloud_dir, output_dir, pairs,
-                                               context.solid_config["bands"])
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="lc8_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Landsat-8/OLI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. These names should be "
-                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2)",
-            default_value=["B2", "B3", "B4", "B5", "B6", "B7"]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=10,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_sr_l8(context, lc8_scene_ids: List) -> Nothing:
-    """Validate (Compare) Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs
-    #
-    pairs = validation_funcs.search_pairs_l8(validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
-                                             day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare input/output directory.
-    #
-    landsat8_dir = context.resources.repository["landsat8_input_dir"]
-    output_dir = context.resources.repository["outdir_validation"]
-
-    output_dir = toolbox.prepare_output_directory(output_dir, "validation_sr_l8")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_sr_l8(landsat8_dir, landsat8_dir, output_dir, pairs, context.solid_config["bands"])
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="lc8_nbar_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Landsat-8/OLI NBAR products were saved."),
-        InputDefinition(name="lc8_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Landsat-8/OLI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. These names should be "
-                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2)",
-            default_value=["B2", "B3", "B4", "B5", "B6", "B7"]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=10,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_nbar_l8(context, lc8_nbar_dir: String, lc8_scene_ids: List[String]) -> Nothing:
-    """Validate (Compare) Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs
-    #
-    pairs = validation_funcs.search_pairs_l8(validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
-                                             day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare input/output directory.
-    #
-    landsat8_dir = context.resources.repository["landsat8_input_dir"]
-    output_dir = context.resources.repository["outdir_validation"]
-
-    output_dir = toolbox.prepare_output_directory(output_dir, "validation_nbar_l8")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_nbar_l8(lc8_nbar_dir, landsat8_dir, output_dir, pairs, context.solid_config["bands"])
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_sen2cor_nbar_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI NBAR products, generated with `sen2cor` were saved."),
-        InputDefinition(name="s2_sen2cor_cloud_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands10m": Field(
-            config=list,
-            description="Name of the spectral bands (spectral resolution = 10m) that will be used in the validation."
-                        "These names should be equivalent to the standard ESA Sentinel-2 .SAFE file band naming "
-                        "pattern (e.g. B01, B02)",
-            default_value=[
-                "B02", "B03", "B04", "B08"
-            ]
-        ),
-        "bands20m": Field(
-            config=list,
-            description="Name of the spectral bands (spectral resolution = 20m) that will be used in the validation. "
-                        "These names should be equivalent to the standard ESA Sentinel-2 .SAFE file band naming "
-                        "pattern (e.g. B01, B02)",
-            default_value=[
-                "B8A", "B11", "B12"
-            ]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=5,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_nbar_s2_sen2cor(context, s2_sen2cor_nbar_dir: String, s2_sen2cor_cloud_dir: String,
-                               s2_scene_ids: List[String]) -> Nothing:
-    """Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs
-    #
-    pairs = validation_funcs.search_pairs_s2(validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
-                                             day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare output directory.
-    #
-    output_dir = context.resources.repository["outdir_validation"]
-    output_dir = toolbox.prepare_output_directory(output_dir, "validation_nbar_s2_sen2cor")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_nbar_s2_sen2cor(s2_sen2cor_nbar_dir, s2_sen2cor_cloud_dir, output_dir, pairs,
-                                                   **{
-                                                       "bands10m": context.solid_config["bands10m"],
-                                                       "bands20m": context.solid_config["bands20m"]
-                                                   })
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_lasrc_nbar_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI NBAR products, generated with `LaSRC` were saved."),
-        InputDefinition(name="s2_sen2cor_cloud_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. "
-                        "These names should be equivalent to the standard LaSRC file band naming "
-                        "pattern (e.g. sr_band2, sr_band3, sr_band8a)",
-            default_value=[
-                "sr_band2", "sr_band3", "sr_band4", "sr_band8", "sr_band8a", "sr_band11", "sr_band12"
-            ]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=5,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_nbar_s2_lasrc(context, s2_lasrc_nbar_dir: String, s2_sen2cor_cloud_dir: String,
-                             s2_scene_ids: List) -> Nothing:
-    """Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs.
-    #
-    pairs = validation_funcs.search_pairs_s2(validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
-                                             day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare output directory.
-    #
-    output_dir = context.resources.repository["outdir_validation"]
-    output_dir = toolbox.prepare_output_directory(output_dir, "validation_nbar_s2_lasrc")
-
-    #
-    # Validate the results.
-    #
-    validation_routines.validation_nbar_s2_lasrc(s2_lasrc_nbar_dir, s2_sen2cor_cloud_dir, output_dir, pairs,
-                                                 context.solid_config["bands"])
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_sen2cor_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
-        InputDefinition(name="s2_sen2cor_cloud_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
-        InputDefinition(name="lc8_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Landsat-8/OLI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
-                                    " defined in the `repository` resource."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2 scenes that should be used "
-                                    "for the validation. These names are equivalent to the Sentinel-2 scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands_l8": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. These names should be "
-                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2)",
-            default_value=[
-                "B2", "B3", "B4", "B5", "B5", "B6", "B7"
-            ],
-        ),
-        "bands_s2": Field(
-            config=list,
-            description="Name of the spectral bands (spectral resolution = 10m and 20m) that will be used in the "
-                        "validation. These names should be equivalent to the standard ESA Sentinel-2 .SAFE file "
-                        "band naming pattern (e.g. B01, B02, B8A)",
-            default_value=[
-                "B02", "B03", "B04", "B08", "B8A", "B11", "B12"
-            ]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=5,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) and Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_sr_l8_s2_sen2cor(context, s2_sen2cor_dir: String, s2_sen2cor_cloud_dir: String,
-                                lc8_scene_ids: List[String],
-                                s2_scene_ids: List[String]) -> Nothing:
-    """Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) and Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs
-    #
-    pairs = validation_funcs.search_pairs_l8_s2(
-        validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
-        validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
-        day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare input/output directory.
-    #
-    landsat8_dir = context.resources.repository["landsat8_input_dir"]
-
-    output_dir_s2 = context.resources.repository["outdir_validation"]
-    output_dir = toolbox.prepare_output_directory(output_dir_s2, "validation_sr_l8_s2_sen2cor")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_sr_l8_s2_sen2cor(landsat8_dir, landsat8_dir, s2_sen2cor_dir, s2_sen2cor_cloud_dir,
-                                                    output_dir,
-                                                    pairs, **
-                                                    {
-                                                        "bands_l8": context.solid_config["bands_l8"],
-                                                        "bands_s2": context.solid_config["bands_s2"]
-                                                    })
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="s2_lasrc_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with LaSRC were saved."),
-        InputDefinition(name="s2_sen2cor_cloud_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with sen2cor were saved."),
-        InputDefinition(name="lc8_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Landsat-8/OLI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
-                                    " defined in the `repository` resource."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands_l8": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. These names should be "
-                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2).",
-            default_value=[
-                "B2", "B3", "B4", "B5", "B5", "B6", "B7"
-            ]
-        ),
-        "bands_s2": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. "
-                        "These names should be equivalent to the standard LaSRC file band naming "
-                        "pattern (e.g. sr_band2, sr_band3, sr_band8a).",
-            default_value=[
-                "sr_band2", "sr_band3", "sr_band4", "sr_band8", "sr_band8a", "sr_band11", "sr_band12"
-            ]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=5,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) and Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_sr_l8_s2_lasrc(context, s2_lasrc_dir: String, s2_sen2cor_cloud_dir: String, lc8_scene_ids: List[String],
-                              s2_scene_ids: List[String]) -> Nothing:
-    """Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) and Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs.
-    #
-    pairs = validation_funcs.search_pairs_l8_s2(
-        validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
-        validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
-        day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare input/output directory.
-    #
-    landsat8_dir = context.resources.repository["landsat8_input_dir"]
-
-    output_dir_s2 = context.resources.repository["outdir_validation"]
-    output_dir = toolbox.prepare_output_directory(output_dir_s2, "validation_sr_l8_s2_lasrc")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_sr_l8_s2_lasrc(landsat8_dir, landsat8_dir, s2_lasrc_dir, s2_sen2cor_cloud_dir,
-                                                  output_dir,
-                                                  pairs, **
-                                                  {
-                                                      "bands_l8": context.solid_config["bands_l8"],
-                                                      "bands_s2": context.solid_config["bands_s2"]
-                                                  })
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="lc8_nbar_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Landsat-8/OLI NBAR products were saved."),
-        InputDefinition(name="s2_sen2cor_nbar_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI NBAR products, generated with sen2cor were saved."),
-        InputDefinition(name="s2_sen2cor_cloud_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with sen2cor were saved"),
-        InputDefinition(name="lc8_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Landsat-8/OLI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
-                                    " defined in the `repository` resource."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands_l8": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. These names should be "
-                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2).",
-            default_value=[
-                "B2", "B3", "B4", "B5", "B5", "B6", "B7"
-            ]
-        ),
-        "bands_s2": Field(
-            config=list,
-            description="Name of the spectral bands (spectral resolution = 10m and 20m) that will be used in the "
-                        "validation. These names should be equivalent to the standard ESA Sentinel-2 .SAFE file "
-                        "band naming pattern (e.g. B01, B02, B8A)",
-            default_value=[
-                "B02", "B03", "B04", "B08", "B8A", "B11", "B12"
-            ]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=5,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) and Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_nbar_l8_s2_sen2cor(context, lc8_nbar_dir: String, s2_sen2cor_nbar_dir: str,
-                                  s2_sen2cor_cloud_dir: String, lc8_scene_ids: List[String],
-                                  s2_scene_ids: List[String]) -> Nothing:
-    """Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) and Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs
-    #
-    pairs = validation_funcs.search_pairs_l8_s2(
-        validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
-        validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
-        day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare input/output directory.
-    #
-    landsat8_dir = context.resources.repository["landsat8_input_dir"]
-
-    output_dir_s2 = context.resources.repository["outdir_validation"]
-    output_dir = toolbox.prepare_output_directory(output_dir_s2, "validation_nbar_l8_s2_sen2cor")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_nbar_l8_s2_sen2cor(lc8_nbar_dir, landsat8_dir, s2_sen2cor_nbar_dir,
-                                                      s2_sen2cor_cloud_dir,
-                                                      output_dir, pairs, **
-                                                      {
-                                                          "bands_l8": context.solid_config["bands_l8"],
-                                                          "bands_s2": context.solid_config["bands_s2"]
-                                                      })
-
-
-@solid(
-    input_defs=[
-        InputDefinition(name="lc8_nbar_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Landsat-8/OLI NBAR products were saved."),
-        InputDefinition(name="s2_lasrc_nbar_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI NBAR products, generated with `LaSRC` were saved."),
-        InputDefinition(name="s2_sen2cor_cloud_dir",
-                        dagster_type=String,
-                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
-        InputDefinition(name="lc8_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Landsat-8/OLI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
-                                    " defined in the `repository` resource."),
-        InputDefinition(name="s2_scene_ids",
-                        dagster_type=List[String],
-                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
-                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
-                                    " defined in the `repository` resource.")
-    ],
-    config_schema={
-        "bands_l8": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. These names should be "
-                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2).",
-            default_value=[
-                "B2", "B3", "B4", "B5", "B5", "B6", "B7"
-            ]
-        ),
-        "bands_s2": Field(
-            config=list,
-            description="Name of the spectral bands that will be used in the validation. "
-                        "These names should be equivalent to the standard LaSRC file band naming "
-                        "pattern (e.g. sr_band2, sr_band3, sr_band8a).",
-            default_value=[
-                "sr_band2", "sr_band3", "sr_band4", "sr_band8", "sr_band8a", "sr_band11", "sr_band12"
-            ]
-        ),
-        "day_difference": Field(
-            config=int,
-            description="Difference of sensing date, in days, to consider two sceneids a pair.",
-            default_value=5,
-        )
-    },
-    required_resource_keys={"repository"},
-    description="Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) and Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
-)
-def validation_nbar_l8_s2_lasrc(context, lc8_nbar_dir: String, s2_lasrc_nbar_dir: String, s2_sen2cor_cloud_dir: String,
-                                lc8_scene_ids: List, s2_scene_ids: List) -> Nothing:
-    """Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) and Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
-    #
-    # Search for pairs
-    #
-    pairs = validation_funcs.search_pairs_l8_s2(
-        validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
-        validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
-        day_diff=context.solid_config["day_difference"])
-
-    #
-    # Prepare input/output directory.
-    #
-    landsat8_dir = context.resources.repository["landsat8_input_dir"]
-
-    output_dir_s2 = context.resources.repository["outdir_validation"]
-    output_dir = toolbox.prepare_output_directory(output_dir_s2, "validation_nbar_l8_s2_lasrc")
-
-    #
-    # Validate the results
-    #
-    validation_routines.validation_nbar_l8_s2_lasrc(lc8_nbar_dir, landsat8_dir, s2_lasrc_nbar_dir, s2_sen2cor_cloud_dir,
-                                                    output_dir, pairs,
-                                                    **{
-                                                        "bands_l8": context.solid_config["bands_l8"],
-                                                        "bands_s2": context.solid_config["bands_s2"]
-                                                    })
-
-
-@solid(
-    input_defs=[InputDefinition("start", Nothing)],
-    required_resource_keys={"repository"},
-    description="Transform validation output data to a tidy table."
-)
-def validation_data_to_tidy(context) -> Nothing:
-    """Transform validation output data to a tidy table."""
-    from research_processing.tidy import map_validation_folder_as_tidydata
-
-    #
-    # Prepare output file.
-    #
-    output_dir_validation = context.resources.repository["outdir_validation"]
-    output_dir_csv = os.path.join(output_dir_validation, "results.csv")
-
-    #
-    # Create the tidy data.
-    #
-    tidy_data = map_validation_folder_as_tidydata(output_dir_validation)
-
-    #
-    # Saving the result
-    #
-    tidy_data.to_csv(output_dir_csv)
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Callable, Iterator, Mapping, Tuple
+
+from dagster import Field, Dict, List, String, Nothing
+from dagster import solid, InputDefinition, OutputDefinition
+
+from research_processing import partitions, toolbox
+from research_processing.validation import masks, navigate
+from research_processing.validation import validation_funcs
+from research_processing.validation import validation_routines
+
+from general.resources import limit_concurrency, memoize
+
+
+def _scene_available(scene_id: str, cloud_masks: Dict, product_paths: Mapping[str, Callable[[str], str]]) -> bool:
+    """Check if the product and the masks of a scene are available (e.g., a scene of a partition not processed yet).
+
+    Args:
+        scene_id (str): Landsat-8/OLI or Sentinel-2/MSI scene id.
+
+        cloud_masks (Dict): Directories of the masks of the scenes, for each sensor (See `prepare_cloud_masks`).
+
+        product_paths (Mapping[str, Callable[[str], str]]): Function defining the path to a file of the validated
+        product of a scene, for each sensor (`landsat8` and `sentinel2`).
+
+    Returns:
+        bool: Flag indicating if the scene can be validated.
+    """
+    sensor = "landsat8" if scene_id.startswith("LC08") else "sentinel2"
+
+    try:
+        product_path = product_paths[sensor](scene_id)
+    except (IndexError, OSError):
+        # the Sen2Cor products are searched in the output directory
+        return False
+
+    return os.path.exists(product_path) and all(
+        os.path.exists(navigate.path_to_mask(cloud_masks[sensor], scene_id, res)) for res in masks.MASK_RESOLUTIONS
+    )
+
+
+def _product_path(path_to_band: Callable, input_dir: str, band: str) -> Callable[[str], str]:
+    """Define the function that finds a band of the product of a scene (See `_scene_available`)."""
+    def product_path(scene_id: str) -> str:
+        path = path_to_band(input_dir, scene_id, band)
+
+        # the Sen2Cor paths are defined with the band resolution
+        return path[0] if isinstance(path, tuple) else path
+
+    return product_path
+
+
+@contextmanager
+def _partition_pairs(context, pairs: List, output_dir: str, cloud_masks: Dict,
+                     **product_paths: Callable[[str], str]) -> Iterator[Tuple[List, str]]:
+    """Select the pairs validated in the run (See the `partition` resource).
+
+    In partitioned runs, only the pairs of the partition are validated (See
+    `research_processing.partitions.partition_pairs`), in a temporary directory, and their metrics are merged into
+    the metrics of the previous partitions, in the `output_dir` (See
+    `research_processing.validation.validation_funcs.merge_comparison_metrics`). The pairs with a scene whose
+    product or masks are not available (e.g., partitions processed out of order or scenes that failed) are skipped.
+
+    Args:
+        context: Solid execution context.
+
+        pairs (List): Pairs of scene ids.
+
+        output_dir (str): Directory of the validation metrics.
+
+        cloud_masks (Dict): Directories of the masks of the scenes, for each sensor (See `prepare_cloud_masks`).
+
+        product_paths (Callable[[str], str]): Function defining the path to a file of the validated product of a
+        scene, for each sensor of the pairs (`landsat8` and `sentinel2`).
+
+    Yields:
+        Tuple[List, str]: Pairs to be validated and the directory where their metrics must be written.
+    """
+    partition = context.resources.partition
+
+    if partition is not None:
+        pairs = partitions.partition_pairs(pairs, partition["partition_by"], partition["partition"])
+
+    available_pairs = [
+        pair for pair in pairs if all(_scene_available(scene_id, cloud_masks, product_paths) for scene_id in pair)
+    ]
+    if len(available_pairs) < len(pairs):
+        context.log.warning(f"Skipping {len(pairs) - len(available_pairs)} pair(s) with scenes not processed yet "
+                            "(or whose masks were not prepared).")
+    pairs = available_pairs
+
+    if partition is None:
+        yield pairs, output_dir
+        return
+
+    context.log.info(f"Validating {len(pairs)} pair(s) of the partition {partition['partition']}.")
+
+    with tempfile.TemporaryDirectory(prefix="partition-metrics-") as partition_dir:
+        yield pairs, partition_dir
+
+        # without pairs, the metrics of the previous partitions are kept
+        if pairs:
+            validation_funcs.merge_comparison_metrics(output_dir, partition_dir)
+
+
+def _validation_output_dir(context) -> List:
+    """Directory of the metrics of a validation solid (named with the solid), checked by the memoization."""
+    return [os.path.join(context.resources.repository["outdir_validation"], context.solid_def.name)]
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with "
+                                    "`sen2cor` were saved (with the `SCL` cloud masks)."),
+        InputDefinition(name="lc8_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Landsat-8/OLI scenes whose masks should be prepared. "
+                                    "These names are equivalent to the Landsat-8/OLI scene directories defined in the "
+                                    "`repository` resource (with the `QA_PIXEL` cloud masks)."),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2/MSI scenes whose masks should be prepared.")
+    ],
+    output_defs=[
+        OutputDefinition(name="cloud_masks",
+                         dagster_type=Dict[String, String],
+                         description="Dictionary mapping each sensor (`landsat8` and `sentinel2`) to the full path of "
+                                     "the directory where the masks of its scenes were saved.")
+    ],
+    required_resource_keys={"repository", "concurrency_limits", "memoization"},
+    description="Prepare the validity masks (clouds, shadows, snow and nodata) of the Landsat-8/OLI and "
+                "Sentinel-2/MSI scenes, once per grid used by the validations (native and 10m resolutions), to be "
+                "shared by all the validation solids."
+)
+@memoize()
+@limit_concurrency("validation")
+def prepare_cloud_masks(context, s2_sen2cor_cloud_dir: String, lc8_scene_ids: List[String],
+                        s2_scene_ids: List[String]) -> Dict[String, String]:
+    """Prepare the validity masks of the Landsat-8/OLI and Sentinel-2/MSI scenes, shared by the validations."""
+    #
+    # Prepare input/output directories.
+    #
+    landsat8_dir = context.resources.repository["landsat8_input_dir"]
+    output_dir = toolbox.prepare_output_directory(context.resources.repository["derived_data_dir"],
+                                                  "validation_masks")
+
+    cloud_masks = {
+        "landsat8": toolbox.prepare_output_directory(output_dir, "l8"),
+        "sentinel2": toolbox.prepare_output_directory(output_dir, "s2")
+    }
+
+    #
+    # Prepare the masks (the masks of the scenes already prepared are kept).
+    #
+    masks.prepare_masks(landsat8_dir, cloud_masks["landsat8"], lc8_scene_ids, "landsat8")
+    masks.prepare_masks(s2_sen2cor_cloud_dir, cloud_masks["sentinel2"], s2_scene_ids, "sentinel2")
+
+    context.log.info(f"Masks of {len(lc8_scene_ids)} Landsat-8/OLI and {len(s2_scene_ids)} Sentinel-2/MSI "
+                     "scene(s) prepared.")
+    return cloud_masks
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_sen2cor_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Sentinel-2 scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands10m": Field(
+            config=list,
+            description="Name of the spectral bands (spectral resolution = 10m) that will be used in the validation. "
+                        "These names should be equivalent to the standard ESA Sentinel-2 .SAFE file band naming "
+                        "pattern (e.g. B01, B02)",
+            default_value=[
+                "B02", "B03", "B04", "B08"
+            ]
+        ),
+        "bands20m": Field(
+            config=list,
+            description="Name of the spectral bands (spectral resolution = 20m) that will be used in the validation. "
+                        "These names should be equivalent to the standard ESA Sentinel-2 .SAFE file band naming "
+                        "pattern (e.g. B01, B02)",
+            default_value=[
+                "B8A", "B11", "B12"
+            ]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=5,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Sentinel-2 (with Se2Cor atmosphere correction) Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_sr_s2_sen2cor(context, s2_sen2cor_dir: String, s2_sen2cor_cloud_dir: String,
+                             s2_scene_ids: List[String],
+                             cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Sentinel-2 (with Se2Cor atmosphere correction) Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`"""
+    #
+    # Search for pairs
+    #
+    pairs = validation_funcs.search_pairs_s2(validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
+                                             day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare output directory.
+    #
+    output_dir = context.resources.repository["outdir_validation"]
+    output_dir = toolbox.prepare_output_directory(output_dir, "validation_sr_s2_sen2cor")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          sentinel2=_product_path(navigate.path_to_s2srsen2cor_band, s2_sen2cor_dir,
+                                                  context.solid_config["bands10m"][0])) as (pairs, output_dir):
+        validation_routines.validation_sr_s2_sen2cor(s2_sen2cor_dir, s2_sen2cor_cloud_dir, output_dir, pairs,
+                                                     **{
+                                                         "bands10m": context.solid_config["bands10m"],
+                                                         "bands20m": context.solid_config["bands20m"]
+                                                     },
+                                                     mask_dir=cloud_masks["sentinel2"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_lasrc_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the scenes processed with `LaSRC` were saved."),
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved"),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. "
+                        "These names should be equivalent to the standard LaSRC file band naming "
+                        "pattern (e.g. sr_band2, sr_band3, sr_band8a)",
+            default_value=[
+                "sr_band2", "sr_band3", "sr_band4", "sr_band8", "sr_band8a", "sr_band11", "sr_band12"
+            ]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=5,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_sr_s2_lasrc(context, s2_lasrc_dir: String, s2_sen2cor_cloud_dir: String, s2_scene_ids: List,
+                           cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs
+    #
+    pairs = validation_funcs.search_pairs_s2(validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
+                                             day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare output directory.
+    #
+    output_dir = context.resources.repository["outdir_validation"]
+    output_dir = toolbox.prepare_output_directory(output_dir, "validation_sr_s2_lasrc")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          sentinel2=_product_path(navigate.path_to_s2srlasrc_band, s2_lasrc_dir,
+                                                  context.solid_config["bands"][0])) as (pairs, output_dir):
+        validation_routines.validation_sr_s2_lasrc(s2_lasrc_dir, s2_sen2cor_cloud_dir, output_dir, pairs,
+                                                   context.solid_config["bands"],
+                                                   mask_dir=cloud_masks["sentinel2"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="lc8_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Landsat-8/OLI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. These names should be "
+                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2)",
+            default_value=["B2", "B3", "B4", "B5", "B6", "B7"]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=10,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_sr_l8(context, lc8_scene_ids: List, cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs
+    #
+    pairs = validation_funcs.search_pairs_l8(validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
+                                             day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare input/output directory.
+    #
+    landsat8_dir = context.resources.repository["landsat8_input_dir"]
+    output_dir = context.resources.repository["outdir_validation"]
+
+    output_dir = toolbox.prepare_output_directory(output_dir, "validation_sr_l8")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          landsat8=_product_path(navigate.path_to_l8srband, landsat8_dir,
+                                                 context.solid_config["bands"][0])) as (pairs, output_dir):
+        validation_routines.validation_sr_l8(landsat8_dir, landsat8_dir, output_dir, pairs,
+                                             context.solid_config["bands"], mask_dir=cloud_masks["landsat8"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="lc8_nbar_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Landsat-8/OLI NBAR products were saved."),
+        InputDefinition(name="lc8_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Landsat-8/OLI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. These names should be "
+                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2)",
+            default_value=["B2", "B3", "B4", "B5", "B6", "B7"]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=10,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_nbar_l8(context, lc8_nbar_dir: String, lc8_scene_ids: List[String],
+                       cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs
+    #
+    pairs = validation_funcs.search_pairs_l8(validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
+                                             day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare input/output directory.
+    #
+    landsat8_dir = context.resources.repository["landsat8_input_dir"]
+    output_dir = context.resources.repository["outdir_validation"]
+
+    output_dir = toolbox.prepare_output_directory(output_dir, "validation_nbar_l8")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          landsat8=_product_path(navigate.path_to_l8nbarband, lc8_nbar_dir,
+                                                 context.solid_config["bands"][0])) as (pairs, output_dir):
+        validation_routines.validation_nbar_l8(lc8_nbar_dir, landsat8_dir, output_dir, pairs,
+                                               context.solid_config["bands"], mask_dir=cloud_masks["landsat8"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_sen2cor_nbar_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI NBAR products, generated with `sen2cor` were saved."),
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands10m": Field(
+            config=list,
+            description="Name of the spectral bands (spectral resolution = 10m) that will be used in the validation."
+                        "These names should be equivalent to the standard ESA Sentinel-2 .SAFE file band naming "
+                        "pattern (e.g. B01, B02)",
+            default_value=[
+                "B02", "B03", "B04", "B08"
+            ]
+        ),
+        "bands20m": Field(
+            config=list,
+            description="Name of the spectral bands (spectral resolution = 20m) that will be used in the validation. "
+                        "These names should be equivalent to the standard ESA Sentinel-2 .SAFE file band naming "
+                        "pattern (e.g. B01, B02)",
+            default_value=[
+                "B8A", "B11", "B12"
+            ]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=5,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_nbar_s2_sen2cor(context, s2_sen2cor_nbar_dir: String, s2_sen2cor_cloud_dir: String,
+                               s2_scene_ids: List[String],
+                               cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs
+    #
+    pairs = validation_funcs.search_pairs_s2(validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
+                                             day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare output directory.
+    #
+    output_dir = context.resources.repository["outdir_validation"]
+    output_dir = toolbox.prepare_output_directory(output_dir, "validation_nbar_s2_sen2cor")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          sentinel2=_product_path(navigate.path_to_s2nbarsen2cor_band, s2_sen2cor_nbar_dir,
+                                                  context.solid_config["bands10m"][0])) as (pairs, output_dir):
+        validation_routines.validation_nbar_s2_sen2cor(s2_sen2cor_nbar_dir, s2_sen2cor_cloud_dir, output_dir, pairs,
+                                                       **{
+                                                           "bands10m": context.solid_config["bands10m"],
+                                                           "bands20m": context.solid_config["bands20m"]
+                                                       },
+                                                       mask_dir=cloud_masks["sentinel2"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_lasrc_nbar_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI NBAR products, generated with `LaSRC` were saved."),
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. "
+                        "These names should be equivalent to the standard LaSRC file band naming "
+                        "pattern (e.g. sr_band2, sr_band3, sr_band8a)",
+            default_value=[
+                "sr_band2", "sr_band3", "sr_band4", "sr_band8", "sr_band8a", "sr_band11", "sr_band12"
+            ]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=5,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_nbar_s2_lasrc(context, s2_lasrc_nbar_dir: String, s2_sen2cor_cloud_dir: String,
+                             s2_scene_ids: List,
+                             cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs.
+    #
+    pairs = validation_funcs.search_pairs_s2(validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
+                                             day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare output directory.
+    #
+    output_dir = context.resources.repository["outdir_validation"]
+    output_dir = toolbox.prepare_output_directory(output_dir, "validation_nbar_s2_lasrc")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs).
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          sentinel2=_product_path(navigate.path_to_s2nbarlasrc_band, s2_lasrc_nbar_dir,
+                                                  context.solid_config["bands"][0])) as (pairs, output_dir):
+        validation_routines.validation_nbar_s2_lasrc(s2_lasrc_nbar_dir, s2_sen2cor_cloud_dir, output_dir, pairs,
+                                                     context.solid_config["bands"],
+                                                     mask_dir=cloud_masks["sentinel2"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_sen2cor_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
+        InputDefinition(name="lc8_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Landsat-8/OLI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2 scenes that should be used "
+                                    "for the validation. These names are equivalent to the Sentinel-2 scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands_l8": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. These names should be "
+                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2)",
+            default_value=[
+                "B2", "B3", "B4", "B5", "B5", "B6", "B7"
+            ],
+        ),
+        "bands_s2": Field(
+            config=list,
+            description="Name of the spectral bands (spectral resolution = 10m and 20m) that will be used in the "
+                        "validation. These names should be equivalent to the standard ESA Sentinel-2 .SAFE file "
+                        "band naming pattern (e.g. B01, B02, B8A)",
+            default_value=[
+                "B02", "B03", "B04", "B08", "B8A", "B11", "B12"
+            ]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=5,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) and Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_sr_l8_s2_sen2cor(context, s2_sen2cor_dir: String, s2_sen2cor_cloud_dir: String,
+                                lc8_scene_ids: List[String],
+                                s2_scene_ids: List[String],
+                                cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) and Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs
+    #
+    pairs = validation_funcs.search_pairs_l8_s2(
+        validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
+        validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
+        day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare input/output directory.
+    #
+    landsat8_dir = context.resources.repository["landsat8_input_dir"]
+
+    output_dir_s2 = context.resources.repository["outdir_validation"]
+    output_dir = toolbox.prepare_output_directory(output_dir_s2, "validation_sr_l8_s2_sen2cor")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          landsat8=_product_path(navigate.path_to_l8srband, landsat8_dir,
+                                                 context.solid_config["bands_l8"][0]),
+                          sentinel2=_product_path(navigate.path_to_s2srsen2cor_band, s2_sen2cor_dir,
+                                                  context.solid_config["bands_s2"][0])) as (pairs, output_dir):
+        validation_routines.validation_sr_l8_s2_sen2cor(landsat8_dir, landsat8_dir, s2_sen2cor_dir, s2_sen2cor_cloud_dir,
+                                                        output_dir,
+                                                        pairs, **
+                                                        {
+                                                            "bands_l8": context.solid_config["bands_l8"],
+                                                            "bands_s2": context.solid_config["bands_s2"]
+                                                        },
+                                                        mask_dir_l8=cloud_masks["landsat8"],
+                                                        mask_dir_s2=cloud_masks["sentinel2"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="s2_lasrc_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with LaSRC were saved."),
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with sen2cor were saved."),
+        InputDefinition(name="lc8_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Landsat-8/OLI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands_l8": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. These names should be "
+                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2).",
+            default_value=[
+                "B2", "B3", "B4", "B5", "B5", "B6", "B7"
+            ]
+        ),
+        "bands_s2": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. "
+                        "These names should be equivalent to the standard LaSRC file band naming "
+                        "pattern (e.g. sr_band2, sr_band3, sr_band8a).",
+            default_value=[
+                "sr_band2", "sr_band3", "sr_band4", "sr_band8", "sr_band8a", "sr_band11", "sr_band12"
+            ]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=5,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) and Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_sr_l8_s2_lasrc(context, s2_lasrc_dir: String, s2_sen2cor_cloud_dir: String, lc8_scene_ids: List[String],
+                              s2_scene_ids: List[String],
+                              cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) and Landsat-8 Surface Reflectance images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs.
+    #
+    pairs = validation_funcs.search_pairs_l8_s2(
+        validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
+        validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
+        day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare input/output directory.
+    #
+    landsat8_dir = context.resources.repository["landsat8_input_dir"]
+
+    output_dir_s2 = context.resources.repository["outdir_validation"]
+    output_dir = toolbox.prepare_output_directory(output_dir_s2, "validation_sr_l8_s2_lasrc")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          landsat8=_product_path(navigate.path_to_l8srband, landsat8_dir,
+                                                 context.solid_config["bands_l8"][0]),
+                          sentinel2=_product_path(navigate.path_to_s2srlasrc_band, s2_lasrc_dir,
+                                                  context.solid_config["bands_s2"][0])) as (pairs, output_dir):
+        validation_routines.validation_sr_l8_s2_lasrc(landsat8_dir, landsat8_dir, s2_lasrc_dir, s2_sen2cor_cloud_dir,
+                                                      output_dir,
+                                                      pairs, **
+                                                      {
+                                                          "bands_l8": context.solid_config["bands_l8"],
+                                                          "bands_s2": context.solid_config["bands_s2"]
+                                                      },
+                                                      mask_dir_l8=cloud_masks["landsat8"],
+                                                      mask_dir_s2=cloud_masks["sentinel2"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="lc8_nbar_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Landsat-8/OLI NBAR products were saved."),
+        InputDefinition(name="s2_sen2cor_nbar_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI NBAR products, generated with sen2cor were saved."),
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with sen2cor were saved"),
+        InputDefinition(name="lc8_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Landsat-8/OLI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands_l8": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. These names should be "
+                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2).",
+            default_value=[
+                "B2", "B3", "B4", "B5", "B5", "B6", "B7"
+            ]
+        ),
+        "bands_s2": Field(
+            config=list,
+            description="Name of the spectral bands (spectral resolution = 10m and 20m) that will be used in the "
+                        "validation. These names should be equivalent to the standard ESA Sentinel-2 .SAFE file "
+                        "band naming pattern (e.g. B01, B02, B8A)",
+            default_value=[
+                "B02", "B03", "B04", "B08", "B8A", "B11", "B12"
+            ]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=5,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) and Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_nbar_l8_s2_sen2cor(context, lc8_nbar_dir: String, s2_sen2cor_nbar_dir: str,
+                                  s2_sen2cor_cloud_dir: String, lc8_scene_ids: List[String],
+                                  s2_scene_ids: List[String],
+                                  cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Sentinel-2 (with LaSRC atmosphere correction) and Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs
+    #
+    pairs = validation_funcs.search_pairs_l8_s2(
+        validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
+        validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
+        day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare input/output directory.
+    #
+    landsat8_dir = context.resources.repository["landsat8_input_dir"]
+
+    output_dir_s2 = context.resources.repository["outdir_validation"]
+    output_dir = toolbox.prepare_output_directory(output_dir_s2, "validation_nbar_l8_s2_sen2cor")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          landsat8=_product_path(navigate.path_to_l8nbarband, lc8_nbar_dir,
+                                                 context.solid_config["bands_l8"][0]),
+                          sentinel2=_product_path(navigate.path_to_s2nbarsen2cor_band, s2_sen2cor_nbar_dir,
+                                                  context.solid_config["bands_s2"][0])) as (pairs, output_dir):
+        validation_routines.validation_nbar_l8_s2_sen2cor(lc8_nbar_dir, landsat8_dir, s2_sen2cor_nbar_dir,
+                                                          s2_sen2cor_cloud_dir,
+                                                          output_dir, pairs, **
+                                                          {
+                                                              "bands_l8": context.solid_config["bands_l8"],
+                                                              "bands_s2": context.solid_config["bands_s2"]
+                                                          },
+                                                          mask_dir_l8=cloud_masks["landsat8"],
+                                                          mask_dir_s2=cloud_masks["sentinel2"])
+
+
+@solid(
+    input_defs=[
+        InputDefinition(name="lc8_nbar_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Landsat-8/OLI NBAR products were saved."),
+        InputDefinition(name="s2_lasrc_nbar_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI NBAR products, generated with `LaSRC` were saved."),
+        InputDefinition(name="s2_sen2cor_cloud_dir",
+                        dagster_type=String,
+                        description="Full path to the directory where the Sentinel-2/MSI scenes processed with `sen2cor` were saved."),
+        InputDefinition(name="lc8_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Landsat-8/OLI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Landsat-8/OLI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="s2_scene_ids",
+                        dagster_type=List[String],
+                        description="List with the name of the Sentinel-2/MSI scenes that should be used "
+                                    "for the validation. These names are equivalent to the Sentinel-2/MSI scene directories"
+                                    " defined in the `repository` resource."),
+        InputDefinition(name="cloud_masks",
+                        dagster_type=Dict[String, String],
+                        description="Directories of the masks of the scenes, for each sensor (See "
+                                    "`prepare_cloud_masks`).")
+    ],
+    config_schema={
+        "bands_l8": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. These names should be "
+                        "equivalent to the standard USGS Landsat-8 file band naming pattern (e.g. B1, B2).",
+            default_value=[
+                "B2", "B3", "B4", "B5", "B5", "B6", "B7"
+            ]
+        ),
+        "bands_s2": Field(
+            config=list,
+            description="Name of the spectral bands that will be used in the validation. "
+                        "These names should be equivalent to the standard LaSRC file band naming "
+                        "pattern (e.g. sr_band2, sr_band3, sr_band8a).",
+            default_value=[
+                "sr_band2", "sr_band3", "sr_band4", "sr_band8", "sr_band8a", "sr_band11", "sr_band12"
+            ]
+        ),
+        "day_difference": Field(
+            config=int,
+            description="Difference of sensing date, in days, to consider two sceneids a pair.",
+            default_value=5,
+        )
+    },
+    required_resource_keys={"repository", "concurrency_limits", "memoization", "partition"},
+    description="Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) and Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."
+)
+@memoize(paths=_validation_output_dir)
+@limit_concurrency("validation")
+def validation_nbar_l8_s2_lasrc(context, lc8_nbar_dir: String, s2_lasrc_nbar_dir: String, s2_sen2cor_cloud_dir: String,
+                                lc8_scene_ids: List, s2_scene_ids: List,
+                                cloud_masks: Dict[String, String]) -> Nothing:
+    """Validate (Compare) Sentinel-2 (with Sen2Cor atmosphere correction) and Landsat-8 NBAR images, of the same spatial location, acquired with a sensing date difference up to `day_difference`."""
+    #
+    # Search for pairs
+    #
+    pairs = validation_funcs.search_pairs_l8_s2(
+        validation_routines.create_a_temporary_file_with_lines(lc8_scene_ids),
+        validation_routines.create_a_temporary_file_with_lines(s2_scene_ids),
+        day_diff=context.solid_config["day_difference"])
+
+    #
+    # Prepare input/output directory.
+    #
+    landsat8_dir = context.resources.repository["landsat8_input_dir"]
+
+    output_dir_s2 = context.resources.repository["outdir_validation"]
+    output_dir = toolbox.prepare_output_directory(output_dir_s2, "validation_nbar_l8_s2_lasrc")
+
+    #
+    # Validate the results (only the pairs of the partition, in partitioned runs)
+    #
+    with _partition_pairs(context, pairs, output_dir, cloud_masks,
+                          landsat8=_product_path(navigate.path_to_l8nbarband, lc8_nbar_dir,
+                                                 context.solid_config["bands_l8"][0]),
+                          sentinel2=_product_path(navigate.path_to_s2nbarlasrc_band, s2_lasrc_nbar_dir,
+                                                  context.solid_config["bands_s2"][0])) as (pairs, output_dir):
+        validation_routines.validation_nbar_l8_s2_lasrc(lc8_nbar_dir, landsat8_dir, s2_lasrc_nbar_dir, s2_sen2cor_cloud_dir,
+                                                        output_dir, pairs,
+                                                        **{
+                                                            "bands_l8": context.solid_config["bands_l8"],
+                                                            "bands_s2": context.solid_config["bands_s2"]
+                                                        },
+                                                        mask_dir_l8=cloud_masks["landsat8"],
+                                                        mask_dir_s2=cloud_masks["sentinel2"])
+
+
+@solid(
+    input_defs=[InputDefinition("start", Nothing)],
+    required_resource_keys={"repository"},
+    description="Transform validation output data to a tidy table."
+)
+def validation_data_to_tidy(context) -> Nothing:
+    """Transform validation output data to a tidy table."""
+    from research_processing.tidy import map_validation_folder_as_tidydata
+
+    #
+    # Prepare output file.
+    #
+    output_dir_validation = context.resources.repository["outdir_validation"]
+    output_dir_csv = os.path.join(output_dir_validation, "results.csv")
+
+    #
+    # Create the tidy data.
+    #
+    tidy_data = map_validation_folder_as_tidydata(output_dir_validation)
+
+    #
+    # Saving the result
+    #
+    tidy_data.to_csv(output_dir_csv)
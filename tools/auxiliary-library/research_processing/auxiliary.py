@@ -0,0 +1,240 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import warnings
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Pattern of the LADS files names (e.g., `L8ANC2020001.hdf_fused`, with the year and the day of the year).
+LADS_FILE_PATTERN = re.compile(r"^L8ANC(\d{7})\.hdf_fused$")
+
+# Pattern of the acquisition date in the scene ids (e.g., `S2A_MSIL1C_20200101T...` or `LC08_L1TP_..._20200101_...`).
+SCENE_DATE_PATTERN = re.compile(r"_(\d{8})(?:T|_|$)")
+
+
+def scene_acquisition_date(scene_id: str) -> Optional[date]:
+    """Extract the acquisition date of a Sentinel-2 or Landsat scene id.
+
+    Args:
+        scene_id (str): Scene id.
+
+    Returns:
+        Optional[date]: Acquisition date. `None` is returned when the scene id has no date.
+    """
+    match = SCENE_DATE_PATTERN.search(scene_id)
+
+    return datetime.strptime(match.group(1), "%Y%m%d").date() if match else None
+
+
+def index_lads(aux_data_dir: str, years: Optional[Iterable[int]] = None) -> Dict[date, str]:
+    """Index the LADS files of the LaSRC auxiliary data by date.
+
+    Args:
+        aux_data_dir (str): LaSRC auxiliary data directory (`L8`), with the `LADS/<year>/` directories.
+
+        years (Optional[Iterable[int]]): Years indexed. When `None`, all the years available are indexed.
+
+    Returns:
+        Dict[date, str]: Dictionary mapping each date to the full path of its LADS file.
+    """
+    lads_dir = os.path.join(aux_data_dir, "LADS")
+
+    if years is None:
+        years = [int(entry.name) for entry in os.scandir(lads_dir) if entry.is_dir() and entry.name.isdigit()]
+
+    index = {}
+    for year in years:
+        year_dir = os.path.join(lads_dir, str(year))
+
+        if not os.path.isdir(year_dir):
+            continue
+
+        for entry in os.scandir(year_dir):
+            match = LADS_FILE_PATTERN.match(entry.name)
+
+            if match:
+                index[datetime.strptime(match.group(1), "%Y%j").date()] = entry.path
+    return index
+
+
+def _link(source: str, target: str) -> bool:
+    """Link a file, using a hardlink when possible and a symbolic link otherwise (e.g., different file systems).
+
+    Returns:
+        bool: Flag indicating if a symbolic link was used.
+    """
+    try:
+        os.link(source, target)
+        return False
+    except OSError:
+        os.symlink(os.path.abspath(source), target)
+        return True
+
+
+def _link_tree(source_dir: str, target_dir: str, exclude: Iterable[str] = ()) -> bool:
+    """Replicate a directory tree, linking its files (See `_link`).
+
+    Args:
+        source_dir (str): Directory replicated.
+
+        target_dir (str): Directory where the tree is replicated.
+
+        exclude (Iterable[str]): Names of the entries of the `source_dir` that are not replicated.
+
+    Returns:
+        bool: Flag indicating if symbolic links were used.
+    """
+    symlinked = False
+    os.makedirs(target_dir, exist_ok=True)
+
+    for entry in os.scandir(source_dir):
+        if entry.name in exclude:
+            continue
+
+        target = os.path.join(target_dir, entry.name)
+
+        if entry.is_dir():
+            symlinked = _link_tree(entry.path, target) or symlinked
+        else:
+            symlinked = _link(entry.path, target) or symlinked
+    return symlinked
+
+
+# Name of the file that describes a subset of the LaSRC auxiliary data (See `prepare_lasrc_auxiliary_data`).
+SUBSET_INFO_FILE = ".subset.json"
+
+
+def default_subset_base_dir(aux_data_dir: str) -> str:
+    """Directory where the subsets of the LaSRC auxiliary data are created by default.
+
+    The directory is alongside the `aux_data_dir` (`<parent>/.lasrc-aux-subsets`), so it is usually in the same file
+    system and the subsets are hardlinked.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(aux_data_dir)), ".lasrc-aux-subsets")
+
+
+def lasrc_subset_info(subset_dir: str) -> Dict:
+    """Load the description of a subset of the LaSRC auxiliary data (See `prepare_lasrc_auxiliary_data`).
+
+    Returns:
+        Dict: Dictionary with the `source` (auxiliary data directory), the `dates` of the LADS files and the
+        `symlinked` flag (the subset links must be resolved in the `source` directory).
+    """
+    with open(os.path.join(subset_dir, SUBSET_INFO_FILE)) as info_stream:
+        return json.load(info_stream)
+
+
+def prepare_lasrc_auxiliary_data(aux_data_dir: str, scene_ids: List[str],
+                                 subset_base_dir: Optional[str] = None) -> Tuple[str, bool]:
+    """Create a minimal subset of the LaSRC auxiliary data to process a set of scenes.
+
+    The subset has the same layout of the auxiliary data directory (`L8`), but only with the LADS files of the
+    acquisition dates of the scenes. The static files (e.g., `CMGDEM.hdf`, `ratiomapndwiexp.hdf`, `LDCMLUT` and
+    `MSILUT`) are included entirely. The files are hardlinked (or symlinked, when the subset is in another file system),
+    so no data is copied, and the LaSRC containers only scan the files required by the scenes:
+
+        <subset dir>
+            ├── .subset.json
+            ├── CMGDEM.hdf
+            ├── LADS
+            │   └── <year>
+            │       └── L8ANC<year><day of the year>.hdf_fused
+            ├── LDCMLUT
+            ├── MSILUT
+            └── ratiomapndwiexp.hdf
+
+    The subset directory is named with the auxiliary data directory and the acquisition dates, and it is kept
+    after the execution. So the subset is created once and reused by the processes (and the runs) with the same
+    dates. It is created in a temporary directory and renamed when complete, so concurrent processes never use a
+    partial subset.
+
+    Args:
+        aux_data_dir (str): LaSRC auxiliary data directory (`L8`).
+
+        scene_ids (List[str]): Scene ids that will be processed.
+
+        subset_base_dir (Optional[str]): Directory where the subset is created. When `None`, the directory alongside
+        the `aux_data_dir` is used (See `default_subset_base_dir`). To use hardlinks, it must be in the same file
+        system of the `aux_data_dir`.
+
+    Returns:
+        Tuple[str, bool]: Path to the subset directory and a flag indicating if symbolic links were used. With
+        symbolic links, the `aux_data_dir` must also be available (e.g., mounted in the container) in the same path.
+
+    Note:
+        The dates without LADS files are not included in the subset, so the LaSRC processing of these scenes fails
+        in the same way it fails with the full auxiliary data directory.
+    """
+    aux_data_dir = os.path.abspath(aux_data_dir)
+    subset_base_dir = subset_base_dir or default_subset_base_dir(aux_data_dir)
+
+    dates = sorted({scene_acquisition_date(scene_id) for scene_id in scene_ids} - {None})
+    subset_key = hashlib.sha1(
+        "\n".join([aux_data_dir, *[scene_date.isoformat() for scene_date in dates]]).encode()
+    ).hexdigest()[:16]
+
+    subset_dir = os.path.join(subset_base_dir, f"lasrc-aux-{subset_key}")
+
+    if os.path.isfile(os.path.join(subset_dir, SUBSET_INFO_FILE)):
+        return subset_dir, lasrc_subset_info(subset_dir)["symlinked"]
+
+    os.makedirs(subset_base_dir, exist_ok=True)
+    partial_dir = tempfile.mkdtemp(prefix=f".lasrc-aux-{subset_key}-", dir=subset_base_dir)
+
+    try:
+        lads_index = index_lads(aux_data_dir, {scene_date.year for scene_date in dates})
+        symlinked = _link_tree(aux_data_dir, partial_dir, exclude=["LADS", os.path.basename(subset_base_dir)])
+
+        for scene_date in dates:
+            if scene_date not in lads_index:
+                continue
+
+            year_dir = os.path.join(partial_dir, "LADS", str(scene_date.year))
+            os.makedirs(year_dir, exist_ok=True)
+
+            lads_file = lads_index[scene_date]
+            symlinked = _link(lads_file, os.path.join(year_dir, os.path.basename(lads_file))) or symlinked
+
+        with open(os.path.join(partial_dir, SUBSET_INFO_FILE), "w") as info_stream:
+            json.dump({
+                "source": aux_data_dir,
+                "dates": [scene_date.isoformat() for scene_date in dates],
+                "symlinked": symlinked
+            }, info_stream)
+
+        os.rename(partial_dir, subset_dir)
+    except OSError:
+        shutil.rmtree(partial_dir, ignore_errors=True)
+
+        # the subset was created by another process
+        if os.path.isfile(os.path.join(subset_dir, SUBSET_INFO_FILE)):
+            return subset_dir, lasrc_subset_info(subset_dir)["symlinked"]
+        raise
+
+    if symlinked:
+        warnings.warn(f"The subset of the LaSRC auxiliary data ({subset_dir}) is not in the file system of the "
+                      f"auxiliary data directory ({aux_data_dir}), so symbolic links were used and the whole "
+                      "auxiliary data directory is also mounted in the containers.", RuntimeWarning)
+
+    return subset_dir, symlinked
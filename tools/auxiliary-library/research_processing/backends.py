@@ -0,0 +1,516 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import abc
+import asyncio
+import hashlib
+import os
+import shlex
+import shutil
+import threading
+import time
+from contextlib import suppress
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .config import EnvironmentConfig
+from .environment import ContainerBatchError, ContainerExitError, ContainerManager, ContainerTimeoutError, _call
+from .scheduler import ResourceReservation, ResourceScheduler, parse_memory
+from .telemetry import SceneTelemetry
+
+
+def _volume_variable(bind: str) -> str:
+    """Define the environment variable with the host path of a volume (e.g., `/mnt/input-dir` -> `INPUT_DIR`)."""
+    return os.path.basename(bind.rstrip("/")).upper().replace("-", "_")
+
+
+def _host_path(path: str, volumes: Dict) -> str:
+    """Translate a path inside the container to the host path, using the container volumes.
+
+    Args:
+        path (str): Path inside the container (e.g., `/mnt/input-dir/scene`). Other values are kept as they are.
+
+        volumes (Dict): Container volumes (`docker.DockerClient.containers.create` format).
+
+    Returns:
+        str: Host path (e.g., `<input dir>/scene`).
+    """
+    for host_dir, volume in volumes.items():
+        bind = volume["bind"].rstrip("/")
+
+        if path == bind or path.startswith(bind + "/"):
+            return host_dir + path[len(bind):]
+    return path
+
+
+def _environment_variables(environment: Optional[Union[Dict, List[str]]]) -> Dict[str, str]:
+    """Convert the container environment (dictionary or list of `KEY=value`) to a dictionary."""
+    if isinstance(environment, dict):
+        return {key: str(value) for key, value in environment.items()}
+
+    return dict(variable.split("=", 1) for variable in environment or [])
+
+
+async def _read_lines(stream: asyncio.StreamReader, lines: List[str]):
+    """Read the lines of a process output until the end of the stream."""
+    async for line in stream:
+        lines.append(line.decode("utf-8", errors="replace").rstrip("\r\n"))
+
+
+def _kill_process(process: asyncio.subprocess.Process):
+    """Kill a process, ignoring errors of processes that are no longer running."""
+    with suppress(ProcessLookupError):
+        process.kill()
+
+
+def _fake_output_name(image: str, scene_id: str) -> str:
+    """Define the name of the output generated by a processor for a scene (See `FakeBackend`).
+
+    Args:
+        image (str): Image of the processor.
+
+        scene_id (str): Scene id (or product name) processed.
+
+    Returns:
+        str: Name of the output, following the naming of the processor outputs.
+    """
+    if image == EnvironmentConfig.SEN2COR_IMAGE:
+        from .surface_reflectance import _sen2cor_output_prefix
+
+        return f"{_sen2cor_output_prefix(scene_id)}_{scene_id.replace('.SAFE', '').split('_')[6]}.SAFE"
+    return scene_id.replace(".SAFE", "")
+
+
+class ExecutionBackend(abc.ABC):
+    """Execution backend of the processors.
+
+    The processing steps define the execution of each scene with the parameters used to create a Docker container
+    (`image`, `volumes`, `command`, ...), plus the `log_handler`, `telemetry` and `timeout` parameters handled by
+    `research_processing.environment.ContainerManager.run_container_async`. The backend decides how these
+    parameters are executed (e.g., in a container or in a native process).
+
+    The active backend is defined by `EnvironmentConfig.BACKEND` (See `get_backend` and `set_backend`).
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    async def run_async(self, **kwargs):
+        """Execute the processor of a scene and wait for it without blocking the event loop.
+
+        Args:
+            kwargs (Dict): Parameters to the `ContainerManager.run_container_async` method.
+
+        Raises:
+            ContainerExitError: If the processor exits with a non-zero status.
+
+            ContainerTimeoutError: If the processor exceeds the `timeout`.
+        """
+
+    async def run_batch_async(self, commands: List[Union[str, List[str]]],
+                              log_handlers: Optional[List[Callable[[List[str]], None]]] = None,
+                              telemetries: Optional[List[SceneTelemetry]] = None,
+                              **kwargs) -> List[Tuple[int, float]]:
+        """Execute the processor of several scenes, in order, without blocking the event loop.
+
+        By default, each command is executed with `run_async`.
+
+        Args:
+            commands (List[Union[str, List[str]]]): Commands (e.g., scene ids) executed.
+
+            log_handlers (Optional[List[Callable[[List[str]], None]]]): Function called with the new log lines of each
+            command (`None` items disable the log capture of a command).
+
+            telemetries (Optional[List[SceneTelemetry]]): Telemetry of each command (`None` items disable the
+            telemetry of a command).
+
+            kwargs (Dict): Parameters to the `ContainerManager.run_container_batch_async` method.
+
+        Returns:
+            List[Tuple[int, float]]: Exit code and execution time (in seconds) of each command.
+
+        Raises:
+            ContainerBatchError: If a command fails (e.g., `ContainerTimeoutError`, when the command exceeds the
+            `timeout`). The remaining commands are not executed.
+        """
+        log_handlers = log_handlers or [None] * len(commands)
+        telemetries = telemetries or [None] * len(commands)
+
+        exit_codes = []
+        for command, log_handler, telemetry in zip(commands, log_handlers, telemetries):
+            start_time = time.monotonic()
+
+            try:
+                await self.run_async(command=command, log_handler=log_handler, telemetry=telemetry, **kwargs)
+                exit_code = 0
+            except ContainerExitError as error:
+                exit_code = error.exit_code
+            except Exception as error:
+                raise ContainerBatchError(error, exit_codes) from error
+
+            exit_codes.append((exit_code, time.monotonic() - start_time))
+        return exit_codes
+
+    def set_concurrency(self, max_workers: int):
+        """Prepare the backend to execute up to `max_workers` processors concurrently."""
+
+    def shutdown(self):
+        """Stop the running processors and release the resources of the backend."""
+
+
+class DockerBackend(ExecutionBackend):
+    """Execute the processors in Docker containers (See `research_processing.environment.ContainerManager`)."""
+
+    name = "docker"
+
+    async def run_async(self, **kwargs):
+        """Execute the container of a scene (See `ContainerManager.run_container_async`)."""
+        await ContainerManager.run_container_async(**kwargs)
+
+    async def run_batch_async(self, commands: List[Union[str, List[str]]],
+                              log_handlers: Optional[List[Callable[[List[str]], None]]] = None,
+                              telemetries: Optional[List[SceneTelemetry]] = None,
+                              **kwargs) -> List[Tuple[int, float]]:
+        """Execute the commands in a single warm container (See `ContainerManager.run_container_batch_async`)."""
+        return await ContainerManager.run_container_batch_async(commands, log_handlers, telemetries, **kwargs)
+
+    def set_concurrency(self, max_workers: int):
+        """Size the Docker client connection pool (See `ContainerManager.set_concurrency`)."""
+        ContainerManager.set_concurrency(max_workers)
+
+    def shutdown(self):
+        """Remove the running containers (See `ContainerManager.shutdown`)."""
+        ContainerManager.shutdown()
+
+
+class SubprocessBackend(ExecutionBackend):
+    """Execute the processors installed natively in the host, as local processes.
+
+    The processor of each image is executed with its native command (`EnvironmentConfig.NATIVE_COMMANDS`), followed
+    by the container command (e.g., the scene id). The container volumes are mapped to the host paths:
+
+        - paths inside the container in the command (and in the `environment`) are replaced by the host paths;
+        - the host path of each volume is exported in an environment variable named after the volume mount point
+          (e.g., `/mnt/input-dir` -> `INPUT_DIR`, `/mnt/output-dir` -> `OUTPUT_DIR`).
+
+    The processes are started only when the resources of the image profile (`EnvironmentConfig.RESOURCE_PROFILES`)
+    can be reserved in the host budget (`EnvironmentConfig.HOST_CPUS` and `EnvironmentConfig.HOST_MEMORY`, or the
+    CPUs and memory of the host when not defined). The output of the processes is sent to the `log_handler`.
+
+    Args:
+        commands (Optional[Dict[str, str]]): Dictionary mapping each image to the native command (shell syntax)
+        that runs its processor. When `None`, the `EnvironmentConfig.NATIVE_COMMANDS` is used.
+
+    Note:
+        The resource limits of the profiles are only used in the reservations (they are not enforced on the
+        processes), and the telemetry records only the wall time of each scene.
+    """
+
+    name = "subprocess"
+
+    def __init__(self, commands: Optional[Dict[str, str]] = None):
+        self.commands = EnvironmentConfig.NATIVE_COMMANDS if commands is None else commands
+
+        self._processes = []
+        self._processes_lock = threading.Lock()
+
+        self._scheduler = None
+        self._scheduler_lock = threading.Lock()
+
+    def resource_scheduler(self) -> ResourceScheduler:
+        """Get the scheduler used to reserve the resources of the processes (See `ContainerManager.resource_scheduler`).
+
+        Returns:
+            ResourceScheduler: Resource scheduler of the backend.
+        """
+        with self._scheduler_lock:
+            if self._scheduler is None:
+                cpus = EnvironmentConfig.HOST_CPUS or os.cpu_count()
+                memory = EnvironmentConfig.HOST_MEMORY or os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+                self._scheduler = ResourceScheduler(float(cpus), parse_memory(memory))
+
+            return self._scheduler
+
+    def native_command(self, image: str, command: Optional[Union[str, List[str]]], volumes: Dict) -> List[str]:
+        """Define the native command that executes the processor of an image.
+
+        Args:
+            image (str): Image reference.
+
+            command (Optional[Union[str, List[str]]]): Container command (e.g., scene id).
+
+            volumes (Dict): Container volumes.
+
+        Returns:
+            List[str]: Native command, with the container paths translated to host paths.
+
+        Raises:
+            ValueError: If no native command is defined for the image.
+        """
+        native_command = self.commands.get(image)
+
+        if not native_command:
+            raise ValueError(f"No native command defined for the image {image!r} "
+                             "(See `EnvironmentConfig.NATIVE_COMMANDS`).")
+
+        command = [command] if isinstance(command, str) else list(command or [])
+        return shlex.split(native_command) + [_host_path(argument, volumes) for argument in command]
+
+    async def run_async(self, **kwargs):
+        """Execute the processor of a scene in a local process and wait for it without blocking the event loop.
+
+        Args:
+            kwargs (Dict): Parameters to the `ContainerManager.run_container_async` method. Only the `image`,
+            `volumes`, `command`, `environment`, `working_dir`, `log_handler`, `telemetry` and `timeout` parameters
+            are used.
+
+        Raises:
+            ContainerExitError: If the process exits with a non-zero status.
+
+            ContainerTimeoutError: If the process exceeds the `timeout`. The process is killed.
+        """
+        volumes = kwargs.get("volumes") or {}
+        log_handler = kwargs.get("log_handler")
+        telemetry = kwargs.get("telemetry")
+        timeout = kwargs.get("timeout", EnvironmentConfig.CONTAINER_TIMEOUT)
+
+        command = self.native_command(kwargs["image"], kwargs.get("command"), volumes)
+        environment = {
+            **os.environ,
+            **{
+                variable: _host_path(value, volumes)
+                for variable, value in _environment_variables(kwargs.get("environment")).items()
+            },
+            **{_volume_variable(volume["bind"]): host_dir for host_dir, volume in volumes.items()}
+        }
+        working_dir = _host_path(kwargs["working_dir"], volumes) if kwargs.get("working_dir") else None
+
+        reservation = ResourceReservation.from_container(
+            EnvironmentConfig.RESOURCE_PROFILES.get(kwargs["image"], {}), kwargs
+        )
+
+        async with self.resource_scheduler().reserve_async(reservation):
+            process = await asyncio.create_subprocess_exec(
+                *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, env=environment,
+                cwd=working_dir, limit=2 ** 20
+            )
+
+            with self._processes_lock:
+                self._processes.append(process)
+
+            if telemetry is not None:
+                telemetry.start()
+
+            try:
+                try:
+                    exit_code = await asyncio.wait_for(self._wait_process(process, log_handler), timeout)
+                except asyncio.TimeoutError:
+                    raise ContainerTimeoutError(kwargs.get("command"), timeout) from None
+            except BaseException:
+                _kill_process(process)
+                raise
+            finally:
+                with self._processes_lock:
+                    self._processes.remove(process)
+
+                if telemetry is not None:
+                    await _call(telemetry.save)
+
+        if exit_code != 0:
+            raise ContainerExitError(kwargs.get("command"), exit_code)
+
+    @staticmethod
+    async def _wait_process(process: asyncio.subprocess.Process,
+                            log_handler: Optional[Callable[[List[str]], None]] = None) -> int:
+        """Wait until a process exits, sending its output to the `log_handler` every `ContainerManager.poll_interval`.
+
+        Args:
+            process (asyncio.subprocess.Process): Running process.
+
+            log_handler (Optional[Callable[[List[str]], None]]): Function called with the new output lines.
+
+        Returns:
+            int: Process exit status.
+        """
+        lines = []
+        reader = asyncio.ensure_future(_read_lines(process.stdout, lines))
+
+        try:
+            while True:
+                done, _ = await asyncio.wait({reader}, timeout=ContainerManager.poll_interval)
+
+                new_lines = list(lines)
+                lines.clear()
+
+                if new_lines and log_handler is not None:
+                    await _call(log_handler, new_lines)
+
+                if done:
+                    reader.result()
+                    return await process.wait()
+        finally:
+            reader.cancel()
+
+    def shutdown(self):
+        """Kill the running processes."""
+        with self._processes_lock:
+            processes = list(self._processes)
+
+        for process in processes:
+            _kill_process(process)
+
+
+class FakeBackend(ExecutionBackend):
+    """Deterministic backend that simulates the processors, used to test and benchmark the orchestration.
+
+    Each execution waits `duration` seconds and creates, in the output directory (volume mounted in
+    `/mnt/output-dir`), the output expected from the processor (e.g., `S2A_MSIL2A_..._N9999_....SAFE` for
+    Sen2Cor), with a synthetic file whose content is derived from the image and the scene. No container or
+    processor is executed.
+
+    Args:
+        duration (Optional[float]): Execution time (in seconds) of each scene. When `None`, the
+        `EnvironmentConfig.FAKE_DURATION` is used.
+
+        failures (Optional[List[str]]): Commands (e.g., scene ids) that fail with exit status `1`.
+
+        output_name (Optional[Callable[[str, str], str]]): Function called with the image and the command that
+        defines the name of the output (default: the naming of the processors of this library).
+    """
+
+    name = "fake"
+
+    OUTPUT_BIND = "/mnt/output-dir"
+
+    def __init__(self, duration: Optional[float] = None, failures: Optional[List[str]] = None,
+                 output_name: Optional[Callable[[str, str], str]] = None):
+        self.duration = EnvironmentConfig.FAKE_DURATION if duration is None else duration
+        self.failures = set(failures or [])
+        self.output_name = output_name or _fake_output_name
+
+    def _write_output(self, image: str, command: str, volumes: Dict):
+        """Create the synthetic output of a scene."""
+        output_dir = _host_path(self.OUTPUT_BIND, volumes)
+        output_name = self.output_name(image, command)
+
+        # a new product replaces the output of a previous execution, as in the processors
+        shutil.rmtree(os.path.join(output_dir, output_name), ignore_errors=True)
+        os.makedirs(os.path.join(output_dir, output_name))
+
+        with open(os.path.join(output_dir, output_name, f"{output_name}.txt"), "w") as output_stream:
+            output_stream.write(hashlib.sha256(f"{image}:{command}".encode("utf-8")).hexdigest())
+
+    async def run_async(self, **kwargs):
+        """Simulate the processor of a scene.
+
+        Args:
+            kwargs (Dict): Parameters to the `ContainerManager.run_container_async` method. Only the `image`,
+            `volumes`, `command`, `log_handler`, `telemetry` and `timeout` parameters are used.
+
+        Raises:
+            ContainerExitError: If the command is one of the `failures`.
+
+            ContainerTimeoutError: If the `duration` exceeds the `timeout`.
+        """
+        command = kwargs.get("command")
+        log_handler = kwargs.get("log_handler")
+        telemetry = kwargs.get("telemetry")
+        timeout = kwargs.get("timeout", EnvironmentConfig.CONTAINER_TIMEOUT)
+
+        if telemetry is not None:
+            telemetry.start()
+
+        try:
+            try:
+                await asyncio.wait_for(asyncio.sleep(self.duration), timeout)
+            except asyncio.TimeoutError:
+                raise ContainerTimeoutError(command, timeout) from None
+
+            if command in self.failures:
+                raise ContainerExitError(command, 1)
+
+            await _call(self._write_output, kwargs["image"], command, kwargs.get("volumes") or {})
+
+            if log_handler is not None:
+                await _call(log_handler, [f"Progress[%]: 100.00 : {command} processing succeeded (fake backend)"])
+        finally:
+            if telemetry is not None:
+                await _call(telemetry.save)
+
+
+_BACKENDS = {backend.name: backend for backend in (DockerBackend, SubprocessBackend, FakeBackend)}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _create_backend(name: str) -> ExecutionBackend:
+    """Create a backend from its name (`docker`, `subprocess` or `fake`)."""
+    if name not in _BACKENDS:
+        raise ValueError(f"Invalid execution backend {name!r}. The available backends are: {', '.join(_BACKENDS)}.")
+
+    return _BACKENDS[name]()
+
+
+def get_backend() -> ExecutionBackend:
+    """Get the active execution backend.
+
+    The backend is created on the first use, according to `EnvironmentConfig.BACKEND`.
+
+    Returns:
+        ExecutionBackend: Active execution backend.
+    """
+    global _backend
+
+    with _backend_lock:
+        if _backend is None:
+            _backend = _create_backend(EnvironmentConfig.BACKEND)
+
+        return _backend
+
+
+def set_backend(backend: Union[str, ExecutionBackend]) -> ExecutionBackend:
+    """Define the execution backend used by the processing steps.
+
+    Args:
+        backend (Union[str, ExecutionBackend]): Backend (or the name of the backend: `docker`, `subprocess` or `fake`).
+
+    Returns:
+        ExecutionBackend: Active execution backend.
+
+    Note:
+        The backend must be defined before the execution of the processing steps.
+    """
+    global _backend
+
+    if isinstance(backend, str):
+        backend = _create_backend(backend)
+
+    with _backend_lock:
+        _backend = backend
+
+    return backend
+
+
+def shutdown_backend():
+    """Stop the running processors of the active backend."""
+    with _backend_lock:
+        backend = _backend
+
+    if backend is not None:
+        backend.shutdown()
@@ -0,0 +1,173 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import hashlib
+import os
+import shutil
+import tempfile
+from typing import Callable, List, Optional
+
+from .config import EnvironmentConfig
+from .staging import _remove_path
+
+
+def _link_or_copy(source: str, target: str):
+    """Hardlink a file, copying it when a hardlink is not possible (e.g., different file systems)."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _link_or_copy_path(source: str, target: str):
+    """Replicate a file or a directory tree with hardlinks (See `_link_or_copy`)."""
+    if os.path.isdir(source):
+        shutil.copytree(source, target, copy_function=_link_or_copy)
+    else:
+        _link_or_copy(source, target)
+
+
+class SceneCache:
+    """Content-addressed cache of the outputs of a processing step.
+
+    The outputs of a scene are stored under a key generated from the image used in the processing and from the
+    content of the files that define the outputs (e.g., the ANG and MTL metadata of a Landsat-8 scene, for the
+    angles). When a scene with the same key is processed again, even in another output directory, the cached outputs
+    are restored in the output directory and the container is not executed:
+
+        <cache_dir>
+            └── <name>
+                └── <key>
+                    └── <outputs of the scene>
+
+    The outputs are hardlinked (copied when the cache is in another file system) to and from the cache, so no data is
+    duplicated.
+
+    Args:
+        name (str): Name of the processing step (e.g., `landsat-angles`).
+
+        output_dir (str): Directory where the outputs of the processing step are saved (and restored).
+
+        image (str): Image used in the processing step.
+
+        key_files (Callable[[str], List[str]]): Function that returns the files that define the outputs of a scene.
+
+        cache_dir (Optional[str]): Cache directory. When `None`, the `EnvironmentConfig.CACHE_DIR` is used or, when it
+        is not defined, the `.cache` directory, created alongside the `output_dir`.
+
+    Note:
+        The outputs restored are hardlinks to the cached files, so they must not be modified in place.
+    """
+
+    def __init__(self, name: str, output_dir: str, image: str, key_files: Callable[[str], List[str]],
+                 cache_dir: Optional[str] = None):
+        self.output_dir = output_dir
+        self.image = image
+        self.key_files = key_files
+
+        cache_dir = cache_dir or EnvironmentConfig.CACHE_DIR or \
+            os.path.join(os.path.dirname(os.path.normpath(output_dir)), ".cache")
+        self.cache_dir = os.path.join(cache_dir, name)
+
+    def key(self, scene_id: str) -> Optional[str]:
+        """Generate the cache key of a scene.
+
+        Args:
+            scene_id (str): Scene id.
+
+        Returns:
+            Optional[str]: `sha256` hash of the image and of the name and content of the key files. `None` is
+            returned when the scene has no key files (the scene is not cached).
+        """
+        key_files = sorted(path for path in self.key_files(scene_id) if os.path.isfile(path))
+
+        if not key_files:
+            return None
+
+        digest = hashlib.sha256(f"{self.image}\n".encode())
+
+        for key_file in key_files:
+            digest.update(f"{os.path.basename(key_file)}\n".encode())
+
+            with open(key_file, "rb") as key_stream:
+                for chunk in iter(lambda: key_stream.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, scene_id: str) -> Optional[str]:
+        """Path to the cache entry of a scene (`None` when the scene is not cached)."""
+        key = self.key(scene_id)
+
+        return os.path.join(self.cache_dir, key) if key else None
+
+    def restore(self, scene_id: str) -> Optional[List[str]]:
+        """Restore the cached outputs of a scene in the output directory.
+
+        Args:
+            scene_id (str): Scene id.
+
+        Returns:
+            Optional[List[str]]: Full path to each output restored. `None` is returned when the scene is not in the
+            cache.
+        """
+        entry = self.path(scene_id)
+
+        if entry is None or not os.path.isdir(entry):
+            return None
+
+        outputs = []
+        for name in sorted(os.listdir(entry)):
+            output = os.path.join(self.output_dir, name)
+
+            _remove_path(output)
+            _link_or_copy_path(os.path.join(entry, name), output)
+
+            outputs.append(output)
+        return outputs
+
+    def store(self, scene_id: str, outputs: List[str]):
+        """Store the outputs of a scene in the cache.
+
+        The cache entry is created in a temporary directory and renamed, so an interrupted execution does not leave
+        partial entries.
+
+        Args:
+            scene_id (str): Scene id.
+
+            outputs (List[str]): Full path to each output of the scene.
+        """
+        entry = self.path(scene_id)
+
+        if entry is None or not outputs or os.path.isdir(entry):
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary = tempfile.mkdtemp(prefix=".tmp-", dir=self.cache_dir)
+
+        try:
+            for output in outputs:
+                _link_or_copy_path(output, os.path.join(temporary, os.path.basename(output)))
+
+            os.rename(temporary, entry)
+        except OSError:
+            # the scene was cached by another process
+            if not os.path.isdir(entry):
+                raise
+        finally:
+            if os.path.isdir(temporary):
+                shutil.rmtree(temporary)
@@ -1,27 +1,123 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-
-class EnvironmentConfig:
-    """Execution environment configurations."""
-    NBAR_IMAGE = "marujore/sensor-harm@sha256:184959139eb6671a865c2223d3e488572a2c5a257af8805e337a5efbe15b7281"
-
-    LASRC_IMAGE = "marujore/lasrc@sha256:e98b53614d12dfb1272a8045365439c9621a979feff27cb0d6f9a928e9f12c12"
-    SEN2COR_IMAGE = "marujore/sen2cor:2.9.0@sha256:1572353cdab0d73661f1d83f71cffe4e35906cd969cbc85ad2903111f57f9110"
-
-    LANDSAT8_ANGLES_IMAGE = "marujore/landsat-angles@sha256:907666f17aaf236aeb4ddf4bf16ed4705c3ae42aa416c9b5879deb1c754c3a64"
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import os
+
+
+class EnvironmentConfig:
+    """Execution environment configurations.
+
+    Note:
+        The settings can be changed through the `RESEARCH_PROCESSING_*` environment variables.
+    """
+    NBAR_IMAGE = "marujore/sensor-harm@sha256:184959139eb6671a865c2223d3e488572a2c5a257af8805e337a5efbe15b7281"
+
+    LASRC_IMAGE = "marujore/lasrc@sha256:e98b53614d12dfb1272a8045365439c9621a979feff27cb0d6f9a928e9f12c12"
+    SEN2COR_IMAGE = "marujore/sen2cor:2.9.0@sha256:1572353cdab0d73661f1d83f71cffe4e35906cd969cbc85ad2903111f57f9110"
+
+    LANDSAT8_ANGLES_IMAGE = "marujore/landsat-angles@sha256:907666f17aaf236aeb4ddf4bf16ed4705c3ae42aa416c9b5879deb1c754c3a64"
+
+    # Directory with images saved with `docker save`, loaded when the registry is not reachable.
+    IMAGES_ARCHIVE_DIR = os.environ.get("RESEARCH_PROCESSING_IMAGES_ARCHIVE_DIR")
+
+    # CPUs and memory reserved for each container of an image (See `research_processing.scheduler`).
+    # The memory is also a container limit.
+    RESOURCE_PROFILES = {
+        NBAR_IMAGE: {"cpus": 1, "memory": "4g"},
+        LASRC_IMAGE: {"cpus": 1, "memory": "6g"},
+        SEN2COR_IMAGE: {"cpus": 1, "memory": "8g"},
+        LANDSAT8_ANGLES_IMAGE: {"cpus": 1, "memory": "1g"}
+    }
+
+    # Also limit the containers to the reserved CPUs (`nano_cpus`).
+    LIMIT_CPUS = os.environ.get("RESEARCH_PROCESSING_LIMIT_CPUS", "false").lower() == "true"
+
+    # Resource budget of each Docker host (default: the resources of the Docker Daemon).
+    HOST_CPUS = os.environ.get("RESEARCH_PROCESSING_HOST_CPUS")
+    HOST_MEMORY = os.environ.get("RESEARCH_PROCESSING_HOST_MEMORY")
+
+    # Seconds between the resource usage samples of the containers (`0` disables the telemetry).
+    TELEMETRY_INTERVAL = float(os.environ.get("RESEARCH_PROCESSING_TELEMETRY_INTERVAL", 5))
+
+    # Fast local directory where the scenes are staged, and its size budget (See `research_processing.staging`).
+    SCRATCH_DIR = os.environ.get("RESEARCH_PROCESSING_SCRATCH_DIR")
+    SCRATCH_BUDGET = os.environ.get("RESEARCH_PROCESSING_SCRATCH_BUDGET", "100g")
+
+    # Maximum execution time (seconds) of a container (default: no timeout).
+    CONTAINER_TIMEOUT = float(os.environ["RESEARCH_PROCESSING_CONTAINER_TIMEOUT"]) \
+        if os.environ.get("RESEARCH_PROCESSING_CONTAINER_TIMEOUT") else None
+
+    # Retries of the failed scenes, waiting `RETRY_BACKOFF` seconds (doubled at each retry).
+    RETRIES = int(os.environ.get("RESEARCH_PROCESSING_RETRIES", 0))
+    RETRY_BACKOFF = float(os.environ.get("RESEARCH_PROCESSING_RETRY_BACKOFF", 30))
+
+    # How the processors are executed: `docker`, `subprocess` or `fake` (See `research_processing.backends`).
+    BACKEND = os.environ.get("RESEARCH_PROCESSING_BACKEND", "docker")
+
+    # Commands of the processors installed in the host (`subprocess` backend).
+    NATIVE_COMMANDS = {
+        NBAR_IMAGE: os.environ.get("RESEARCH_PROCESSING_NBAR_COMMAND"),
+        LASRC_IMAGE: os.environ.get("RESEARCH_PROCESSING_LASRC_COMMAND"),
+        SEN2COR_IMAGE: os.environ.get("RESEARCH_PROCESSING_SEN2COR_COMMAND"),
+        LANDSAT8_ANGLES_IMAGE: os.environ.get("RESEARCH_PROCESSING_LANDSAT8_ANGLES_COMMAND")
+    }
+
+    # Seconds taken by each scene (`fake` backend).
+    FAKE_DURATION = float(os.environ.get("RESEARCH_PROCESSING_FAKE_DURATION", 0))
+
+    # Docker Daemons, as comma-separated `<url>` or `<url>=<capacity>` (default: `DOCKER_HOST`).
+    DOCKER_ENDPOINTS = [
+        endpoint for endpoint in os.environ.get("RESEARCH_PROCESSING_DOCKER_ENDPOINTS", "").split(",")
+        if endpoint.strip()
+    ]
+
+    # An endpoint is skipped for `ENDPOINT_COOLDOWN` seconds after `ENDPOINT_MAX_FAILURES` consecutive failures.
+    ENDPOINT_MAX_FAILURES = int(os.environ.get("RESEARCH_PROCESSING_ENDPOINT_MAX_FAILURES", 3))
+    ENDPOINT_COOLDOWN = float(os.environ.get("RESEARCH_PROCESSING_ENDPOINT_COOLDOWN", 300))
+
+    # Where the subsets of the LaSRC auxiliary data are linked (default: alongside the auxiliary data directory).
+    LASRC_AUX_SUBSET_DIR = os.environ.get("RESEARCH_PROCESSING_LASRC_AUX_SUBSET_DIR")
+
+    # Cache of the outputs reused across executions (default: `.cache` alongside each output directory).
+    CACHE_DIR = os.environ.get("RESEARCH_PROCESSING_CACHE_DIR")
+
+    # How the CPUs are shared by the scenes: `containers`, `threads` or `auto` (See `research_processing.parallelism`).
+    # When not defined, the threads of the containers are not configured (the processors use their defaults).
+    PARALLELISM = os.environ.get("RESEARCH_PROCESSING_PARALLELISM") or None
+
+    MAX_THREADS = {
+        NBAR_IMAGE: 4,
+        LASRC_IMAGE: 8,
+        SEN2COR_IMAGE: 8,
+        LANDSAT8_ANGLES_IMAGE: 1
+    }
+
+    # Fixed number of threads of the containers of each image, regardless of the `PARALLELISM`.
+    THREADS = {
+        image: int(os.environ[variable]) if os.environ.get(variable) else None
+        for image, variable in [
+            (NBAR_IMAGE, "RESEARCH_PROCESSING_NBAR_THREADS"),
+            (LASRC_IMAGE, "RESEARCH_PROCESSING_LASRC_THREADS"),
+            (SEN2COR_IMAGE, "RESEARCH_PROCESSING_SEN2COR_THREADS"),
+            (LANDSAT8_ANGLES_IMAGE, "RESEARCH_PROCESSING_LANDSAT8_ANGLES_THREADS")
+        ]
+    }
+
+    # Sen2Cor GIPP file copied with the `Nr_Threads`, and where it is mounted in the container.
+    SEN2COR_GIPP = os.environ.get("RESEARCH_PROCESSING_SEN2COR_GIPP")
+    SEN2COR_GIPP_BIND = os.environ.get("RESEARCH_PROCESSING_SEN2COR_GIPP_BIND", "/root/sen2cor/2.9/cfg/L2A_GIPP.xml")
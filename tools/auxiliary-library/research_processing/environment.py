@@ -1,89 +1,963 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-import docker
-
-
-def _connect_to_docker_daemon() -> docker.DockerClient:
-    """Connect to the docker daemon using the Docker environment variables.
-
-    To connect to the Docker Daemon, this function uses the following environment variables:
-     - `DOCKER_HOST`: The URL to the Docker host.
-     - `DOCKER_TLS_VERIFY`: Verify the host against a CA certificate.
-     - `DOCKER_CERT_PATH`: A path to a directory containing TLS certificates to use when connecting to the Docker host.
-
-    Returns:
-        docker.DockerClient: A client configured from environment variables.
-
-    See:
-        For more information about DockerClient and the information used to connect to the Docker Daemon, please
-        refer to the Docker SDK for Python documentation: https://docker-py.readthedocs.io/en/stable/client.html
-    """
-    return docker.from_env(timeout=None)
-
-
-class ContainerManager:
-    """Docker Container Management.
-
-    During the execution of the processing steps, Docker Containers are run with the necessary environments
-    to use the processing tools (e.g., sen2cor, lasrc). The `ContainerManager` class manages which containers
-    are running and which containers should be removed.
-
-    When a `Docker Container` is run, the `ContainerManager` class keeps track of the logs generated by the `Container`
-    and waits until the end of the operation before proceeding. In case of errors, the container that was being
-    executed is terminated by the `ContainerManager`.
-    """
-    _running_containers = []
-
-    @classmethod
-    def remove_running_containers(cls):
-        """Remove all running Docker Containers managed by `ContainerManager`."""
-        for container in cls._running_containers:
-            container.kill()
-
-    @classmethod
-    def run_container(cls, **kwargs):
-        """Execute a container and follow the logs.
-
-        Args:
-            kwargs (Dict): Parameters to the `docker.DockerClient.containers.create` function.
-
-        Returns:
-            None: Container logs is presented on CLI.
-
-        See:
-            For more information about the `docker.DockerClient.containers.create` function, please refer to the
-            Docker SDK for Python documentation: https://docker-py.readthedocs.io/en/stable/containers.html
-        """
-        client = _connect_to_docker_daemon()
-
-        client.images.pull(kwargs["image"])
-        container = client.containers.create(**kwargs)
-
-        try:
-            container.start()
-
-            # if any problem is raised, then, register the container execution
-            cls._running_containers.append(container)
-
-            container.logs(follow=True)
-        except:
-            container.kill()
-            raise
-
-        cls._running_containers.remove(container)
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager, suppress
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import docker
+from docker.constants import DEFAULT_MAX_POOL_SIZE
+from docker.errors import APIError, DockerException, ImageNotFound
+from requests.exceptions import RequestException
+
+from .config import EnvironmentConfig
+from .scheduler import ResourceReservation, ResourceScheduler, parse_memory
+from .telemetry import SceneTelemetry
+
+
+def _connect_to_docker_daemon(max_pool_size: int = DEFAULT_MAX_POOL_SIZE,
+                              base_url: Optional[str] = None) -> docker.DockerClient:
+    """Connect to the docker daemon using the Docker environment variables.
+
+    To connect to the Docker Daemon, this function uses the following environment variables:
+     - `DOCKER_HOST`: The URL to the Docker host.
+     - `DOCKER_TLS_VERIFY`: Verify the host against a CA certificate.
+     - `DOCKER_CERT_PATH`: A path to a directory containing TLS certificates to use when connecting to the Docker host.
+
+    Args:
+        max_pool_size (int): Maximum number of connections kept in the client connection pool.
+
+        base_url (Optional[str]): URL of the Docker host (e.g., `tcp://10.0.0.2:2376`). When defined, it replaces the
+        `DOCKER_HOST` (the TLS variables are still used).
+
+    Returns:
+        docker.DockerClient: A client configured from environment variables.
+
+    See:
+        For more information about DockerClient and the information used to connect to the Docker Daemon, please
+        refer to the Docker SDK for Python documentation: https://docker-py.readthedocs.io/en/stable/client.html
+    """
+    if base_url is None:
+        return docker.from_env(timeout=None, max_pool_size=max_pool_size)
+
+    return docker.DockerClient(**{
+        **docker.utils.kwargs_from_env(), "base_url": base_url
+    }, timeout=None, max_pool_size=max_pool_size)
+
+
+def run_coroutine(coroutine: Awaitable) -> Any:
+    """Run a coroutine until it is completed and return its result.
+
+    The coroutine is executed in a new event loop. If an event loop is already running in the current thread (e.g.,
+    in a Jupyter Notebook), the coroutine is executed in a new event loop in an auxiliary thread.
+
+    Args:
+        coroutine (Awaitable): Coroutine to be executed.
+
+    Returns:
+        Any: Result of the coroutine.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+async def _call(function: Callable, *args, **kwargs) -> Any:
+    """Run a blocking function (e.g., a Docker API request) in the event loop executor."""
+    loop = asyncio.get_running_loop()
+
+    return await loop.run_in_executor(None, functools.partial(function, *args, **kwargs))
+
+
+def _parse_log_lines(logs: bytes) -> Iterator[Tuple[Tuple[datetime, int], str]]:
+    """Parse the container logs generated with timestamps.
+
+    Args:
+        logs (bytes): Container logs, with each line prefixed by its timestamp (RFC 3339 with nanoseconds).
+
+    Returns:
+        Iterator[Tuple[Tuple[datetime, int], str]]: Timestamp (second and nanoseconds) and content of each line.
+    """
+    for log_line in logs.decode("utf-8", errors="replace").splitlines():
+        timestamp, _, line = log_line.partition(" ")
+        seconds, _, nanoseconds = timestamp.rstrip("Z").partition(".")
+
+        try:
+            timestamp = (datetime.strptime(seconds, "%Y-%m-%dT%H:%M:%S"), int(nanoseconds.ljust(9, "0")[:9] or 0))
+        except ValueError:
+            continue
+
+        yield timestamp, line
+
+
+class _LogFollower:
+    """Incremental reader of the logs of a container.
+
+    At each read, only the logs generated since the last read are requested to the Docker Daemon, so the logs are
+    never buffered entirely in memory.
+
+    Args:
+        container (docker.models.containers.Container): Running container.
+    """
+
+    def __init__(self, container):
+        self.container = container
+        self.last_timestamp = None
+
+    async def follow(self, log_handler: Callable[[List[str]], None]):
+        """Read the new log lines of the container and send them to the `log_handler`.
+
+        Args:
+            log_handler (Callable[[List[str]], None]): Function called with the new log lines.
+        """
+        since = self.last_timestamp[0] if self.last_timestamp else None
+        logs = await _call(self.container.logs, stdout=True, stderr=True, timestamps=True, since=since)
+
+        lines = []
+        for timestamp, line in _parse_log_lines(logs):
+            # `since` has seconds resolution, so the lines already read in the last second are discarded
+            if self.last_timestamp is None or timestamp > self.last_timestamp:
+                self.last_timestamp = timestamp
+                lines.append(line)
+
+        if lines:
+            await _call(log_handler, lines)
+
+
+async def _sample_container_stats(container, telemetry: SceneTelemetry):
+    """Sample the Docker stats API of a container every `telemetry.interval` seconds."""
+    while True:
+        try:
+            stats = await _call(container.stats, stream=False)
+        except APIError:
+            return
+
+        telemetry.add_sample(stats)
+        await asyncio.sleep(telemetry.interval)
+
+
+@asynccontextmanager
+async def _record_telemetry(container, telemetry: Optional[SceneTelemetry]):
+    """Record the telemetry of a container while the block is executed.
+
+    Args:
+        container (docker.models.containers.Container): Running container.
+
+        telemetry (Optional[SceneTelemetry]): Telemetry where the samples are recorded. When `None`, the telemetry is
+        not recorded.
+    """
+    if telemetry is None:
+        yield
+        return
+
+    telemetry.start()
+    sampler = asyncio.ensure_future(_sample_container_stats(container, telemetry))
+
+    try:
+        yield
+    finally:
+        sampler.cancel()
+
+        with suppress(asyncio.CancelledError):
+            await sampler
+        await _call(telemetry.save)
+
+
+class ContainerExitError(RuntimeError):
+    """Error raised when a container (or a command executed in a container) exits with a non-zero status.
+
+    Args:
+        command (Union[str, List[str]]): Command executed.
+
+        exit_code (int): Exit status of the command.
+    """
+
+    def __init__(self, command: Union[str, List[str]], exit_code: int):
+        self.command = command
+        self.exit_code = exit_code
+
+        super().__init__(f"Command {command!r} exited with status {exit_code}.")
+
+
+class ContainerTimeoutError(RuntimeError):
+    """Error raised when a container (or a command executed in a container) exceeds its execution timeout.
+
+    Args:
+        command (Union[str, List[str]]): Command executed.
+
+        timeout (float): Execution timeout (in seconds).
+    """
+
+    def __init__(self, command: Union[str, List[str]], timeout: float):
+        self.command = command
+        self.timeout = timeout
+
+        super().__init__(f"Command {command!r} did not finish in {timeout} seconds and was killed.")
+
+
+class ContainerBatchError(RuntimeError):
+    """Error raised when the execution of a batch of commands is interrupted (e.g., by a timeout).
+
+    Args:
+        error (BaseException): Error that interrupted the batch.
+
+        exit_codes (List[Tuple[int, float]]): Exit code and execution time (in seconds) of the commands completed
+        before the error (the first commands of the batch).
+    """
+
+    def __init__(self, error: BaseException, exit_codes: List[Tuple[int, float]]):
+        self.error = error
+        self.exit_codes = exit_codes
+
+        super().__init__(f"Batch interrupted after {len(exit_codes)} command(s): {error}")
+
+
+def _kill_container(container):
+    """Kill a container, ignoring errors of containers that are no longer running."""
+    try:
+        container.kill()
+    except APIError:
+        pass
+
+
+def _remove_container(container):
+    """Remove a container, ignoring errors of containers already removed."""
+    try:
+        container.remove(force=True)
+    except APIError:
+        pass
+
+
+def _image_archive_name(image: str) -> str:
+    """Define the name of the `docker save` archive file of an image.
+
+    The name is created from the image repository and tag, replacing the `/` and `:` characters by `_`. For
+    example, the image `marujore/sen2cor:2.9.0@sha256:...` is expected to be saved as `marujore_sen2cor_2.9.0.tar`
+    (or `marujore_sen2cor_2.9.0.tar.gz`).
+
+    Args:
+        image (str): Image reference (e.g., `repository:tag@digest`).
+
+    Returns:
+        str: Name of the archive file (without extension).
+    """
+    repository = image.split("@")[0]
+
+    return repository.replace("/", "_").replace(":", "_")
+
+
+def _find_image_archive(image: str, archive_dir: Optional[str]) -> Optional[str]:
+    """Search for the `docker save` archive file of an image.
+
+    Args:
+        image (str): Image reference (e.g., `repository:tag@digest`).
+
+        archive_dir (Optional[str]): Directory where the image archive files are stored.
+
+    Returns:
+        Optional[str]: Path to the archive file. `None` is returned when the archive is not available.
+    """
+    if not archive_dir:
+        return None
+
+    archive_name = _image_archive_name(image)
+
+    for extension in (".tar", ".tar.gz"):
+        archive_file = os.path.join(archive_dir, archive_name + extension)
+
+        if os.path.isfile(archive_file):
+            return archive_file
+    return None
+
+
+@contextmanager
+def _track_endpoint_health(endpoint: "DockerEndpoint"):
+    """Register the outcome of the block in the endpoint health.
+
+    Errors of the Docker Daemon (e.g., connection errors) are registered as failures of the endpoint. Any other
+    outcome (including a container that exits with a non-zero status) means that the endpoint is working.
+    """
+    try:
+        yield
+    except (DockerException, RequestException):
+        endpoint.record_failure()
+        raise
+    except Exception:
+        endpoint.record_success()
+        raise
+    else:
+        endpoint.record_success()
+
+
+class DockerEndpoint:
+    """Docker Daemon (host) where the containers are executed.
+
+    Each endpoint has its own client, image cache, resource budget (See `resource_scheduler`) and health tracking.
+    An endpoint is marked as unhealthy after `EnvironmentConfig.ENDPOINT_MAX_FAILURES` consecutive failures (e.g.,
+    the daemon is unreachable), and does not receive new containers during `EnvironmentConfig.ENDPOINT_COOLDOWN`
+    seconds.
+
+    Args:
+        base_url (Optional[str]): URL of the Docker host (e.g., `tcp://10.0.0.2:2376`). When `None`, the Docker
+        environment variables are used (See `_connect_to_docker_daemon`).
+
+        capacity (Optional[int]): Maximum number of containers executed concurrently in the endpoint. It is also the
+        weight of the endpoint in the least-loaded policy (See `ContainerManager.endpoints`). When `None`, the
+        endpoint is only limited by its resource budget.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, capacity: Optional[int] = None):
+        self.base_url = base_url
+        self.capacity = capacity
+
+        self.assigned = 0
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+        self._client = None
+        self._client_max_pool_size = 0
+        self._retired_clients = []
+        self._client_lock = threading.Lock()
+
+        self._resolved_images = {}
+        self._resolved_images_lock = threading.Lock()
+
+        self._scheduler = None
+        self._scheduler_lock = threading.Lock()
+
+        self._slots = ResourceScheduler(float(capacity) if capacity else None)
+        self._health_lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec: str) -> "DockerEndpoint":
+        """Create an endpoint from its specification (`<url>` or `<url>=<capacity>`, e.g., `tcp://10.0.0.2:2376=8`)."""
+        spec = spec.strip()
+
+        if "=" not in spec:
+            return cls(spec)
+
+        base_url, _, capacity = spec.rpartition("=")
+        return cls(base_url, int(capacity))
+
+    def docker_client(self, max_pool_size: int = DEFAULT_MAX_POOL_SIZE) -> docker.DockerClient:
+        """Get the client connected to the Docker Daemon of the endpoint.
+
+        The client is created on the first use. If a larger connection pool is required, a new client is created
+        and the previous one is kept open (it can still be in use by other threads) until the `shutdown`.
+
+        Args:
+            max_pool_size (int): Minimum size of the client connection pool.
+
+        Returns:
+            docker.DockerClient: Client connected to the Docker Daemon.
+        """
+        with self._client_lock:
+            if self._client is None or max_pool_size > self._client_max_pool_size:
+                if self._client is not None:
+                    self._retired_clients.append(self._client)
+
+                self._client_max_pool_size = max(max_pool_size, DEFAULT_MAX_POOL_SIZE)
+                self._client = _connect_to_docker_daemon(self._client_max_pool_size, self.base_url)
+
+            return self._client
+
+    def resolve_image(self, image: str) -> str:
+        """Make an image available on the Docker Daemon of the endpoint.
+
+        The image is searched, in order, in: (1) the local image store of the Docker Daemon; (2) the
+        `EnvironmentConfig.IMAGES_ARCHIVE_DIR` directory (`docker save` archives); (3) the Docker registry (pull).
+        The result is cached, so the image is resolved at most once per process.
+
+        Args:
+            image (str): Image reference (e.g., the pinned images in `EnvironmentConfig`).
+
+        Returns:
+            str: Reference that must be used to create the containers of the image. When the image is loaded from an
+            archive, the image id is used, since `docker load` does not preserve the repository digests.
+        """
+        client = self.docker_client()
+
+        with self._resolved_images_lock:
+            if image in self._resolved_images:
+                return self._resolved_images[image]
+
+            try:
+                client.images.get(image)
+                image_reference = image
+
+            except ImageNotFound:
+                image_archive = _find_image_archive(image, EnvironmentConfig.IMAGES_ARCHIVE_DIR)
+
+                if image_archive:
+                    with open(image_archive, "rb") as image_archive_stream:
+                        image_reference = client.images.load(image_archive_stream)[0].id
+                else:
+                    client.images.pull(image)
+                    image_reference = image
+
+            self._resolved_images[image] = image_reference
+
+        return image_reference
+
+    def resource_scheduler(self) -> ResourceScheduler:
+        """Get the scheduler used to reserve the resources of the containers in the endpoint.
+
+        The scheduler budget is defined by `EnvironmentConfig.HOST_CPUS` and `EnvironmentConfig.HOST_MEMORY`. When
+        these values are not defined, the number of CPUs and the memory available to the Docker Daemon are used.
+
+        Returns:
+            ResourceScheduler: Resource scheduler of the endpoint.
+        """
+        with self._scheduler_lock:
+            if self._scheduler is None:
+                cpus, memory = EnvironmentConfig.HOST_CPUS, EnvironmentConfig.HOST_MEMORY
+
+                if cpus is None or memory is None:
+                    daemon_info = self.docker_client().info()
+
+                    cpus = daemon_info["NCPU"] if cpus is None else cpus
+                    memory = daemon_info["MemTotal"] if memory is None else memory
+
+                self._scheduler = ResourceScheduler(float(cpus), parse_memory(memory))
+
+            return self._scheduler
+
+    def set_resource_budget(self, cpus: Optional[float] = None, memory: Optional[Union[int, str]] = None):
+        """Define the resources (CPU and memory) of the endpoint (See `ContainerManager.set_resource_budget`)."""
+        with self._scheduler_lock:
+            self._scheduler = ResourceScheduler(cpus, parse_memory(memory) if memory is not None else None)
+
+    @property
+    def load(self) -> float:
+        """float: Number of containers assigned to the endpoint, relative to its capacity."""
+        return self.assigned / (self.capacity or 1)
+
+    @property
+    def healthy(self) -> bool:
+        """bool: Flag indicating if the endpoint can receive new containers."""
+        return time.monotonic() >= self.unhealthy_until
+
+    def record_success(self):
+        """Register a container executed in the endpoint without infrastructure errors."""
+        with self._health_lock:
+            self.failures = 0
+            self.unhealthy_until = 0.0
+
+    def record_failure(self):
+        """Register an infrastructure error (e.g., daemon unreachable) in the endpoint."""
+        with self._health_lock:
+            self.failures += 1
+
+            if self.failures >= EnvironmentConfig.ENDPOINT_MAX_FAILURES:
+                self.unhealthy_until = time.monotonic() + EnvironmentConfig.ENDPOINT_COOLDOWN
+
+    @asynccontextmanager
+    async def reserve_async(self):
+        """Hold one of the container slots of the endpoint (See `capacity`) while the block is executed."""
+        async with self._slots.reserve_async(ResourceReservation(1, 0)):
+            yield self
+
+    def shutdown(self):
+        """Close the connections with the Docker Daemon of the endpoint."""
+        with self._client_lock:
+            clients = self._retired_clients + ([self._client] if self._client is not None else [])
+
+            self._client = None
+            self._client_max_pool_size = 0
+            self._retired_clients = []
+
+        for client in clients:
+            client.close()
+
+    def __repr__(self):
+        return f"DockerEndpoint(base_url={self.base_url!r}, capacity={self.capacity})"
+
+
+class ContainerManager:
+    """Docker Container Management.
+
+    During the execution of the processing steps, Docker Containers are run with the necessary environments
+    to use the processing tools (e.g., sen2cor, lasrc). The `ContainerManager` class manages which containers
+    are running and which containers should be removed.
+
+    When a `Docker Container` is run, the `ContainerManager` class keeps track of the logs generated by the `Container`
+    and waits until the end of the operation before proceeding. In case of errors, the container that was being
+    executed is terminated by the `ContainerManager`.
+
+    The containers are supervised with `asyncio` (see `run_container_async`): the status and the logs of the
+    containers are polled without blocking the event loop, so a single thread can supervise many containers. The
+    synchronous methods (e.g., `run_container`) are wrappers of the asynchronous ones.
+
+    The containers are sharded across one or more Docker Daemons (see `endpoints`). Each container is executed in
+    the least-loaded healthy endpoint, so the processing can scale past a single host.
+
+    Before the first container of an image is created in an endpoint, the image is resolved (see
+    `DockerEndpoint.resolve_image`). Each image is resolved only once per process and endpoint.
+
+    The containers of each endpoint are managed with a single, long-lived, `docker.DockerClient` (see
+    `docker_client`). The client connection pool is sized according to the number of containers executed
+    concurrently (see `set_concurrency`). The clients are closed by the `shutdown` method.
+
+    The containers are created with the memory limit of the image resource profile
+    (`EnvironmentConfig.RESOURCE_PROFILES`), and are only started when its resources can be reserved in the budget of
+    the endpoint (see `resource_scheduler`). The CPUs of the profile are only limited with
+    `EnvironmentConfig.LIMIT_CPUS`.
+
+    Note:
+        The `ContainerManager` can be used by several threads at the same time (e.g., when scenes are processed
+        concurrently). The access to the registry of running containers and to the clients is synchronized.
+
+    Note:
+        The volumes are mounted by each Docker Daemon, so the input and output directories must be available in
+        the same paths in all the endpoints (e.g., a shared file system).
+    """
+    _running_containers = []
+    _running_containers_lock = threading.Lock()
+
+    _endpoints = None
+    _endpoints_lock = threading.Lock()
+
+    poll_interval = 1.0
+
+    @classmethod
+    def endpoints(cls) -> List[DockerEndpoint]:
+        """Get the Docker Daemons where the containers are executed.
+
+        The endpoints are loaded from `EnvironmentConfig.DOCKER_ENDPOINTS`. When no endpoint is configured, a single
+        endpoint defined by the Docker environment variables is used.
+
+        Returns:
+            List[DockerEndpoint]: Docker endpoints.
+        """
+        with cls._endpoints_lock:
+            if cls._endpoints is None:
+                cls._endpoints = [
+                    DockerEndpoint.from_spec(spec) for spec in EnvironmentConfig.DOCKER_ENDPOINTS
+                ] or [DockerEndpoint()]
+
+            return cls._endpoints
+
+    @classmethod
+    def set_endpoints(cls, endpoints: List[Union[str, DockerEndpoint]]):
+        """Define the Docker Daemons where the containers are executed.
+
+        Args:
+            endpoints (List[Union[str, DockerEndpoint]]): Docker endpoints (or their specifications, See
+            `DockerEndpoint.from_spec`).
+
+        Note:
+            The endpoints must be defined before the execution of the containers.
+        """
+        endpoints = [
+            DockerEndpoint.from_spec(endpoint) if isinstance(endpoint, str) else endpoint for endpoint in endpoints
+        ]
+
+        with cls._endpoints_lock:
+            cls._endpoints = endpoints
+
+    @classmethod
+    @asynccontextmanager
+    async def _endpoint(cls):
+        """Select the endpoint of a container, holding one of its slots while the block is executed.
+
+        The least-loaded healthy endpoint is selected: the load is the number of containers assigned to the endpoint
+        divided by its capacity. When all the endpoints are unhealthy, the one with fewer failures is used.
+        """
+        endpoints = cls.endpoints()
+
+        with cls._endpoints_lock:
+            candidates = [endpoint for endpoint in endpoints if endpoint.healthy] or endpoints
+            endpoint = min(candidates, key=lambda candidate: (candidate.load, candidate.failures))
+
+            endpoint.assigned += 1
+
+        try:
+            async with endpoint.reserve_async():
+                yield endpoint
+        finally:
+            with cls._endpoints_lock:
+                endpoint.assigned -= 1
+
+    @classmethod
+    def docker_client(cls, max_pool_size: int = DEFAULT_MAX_POOL_SIZE) -> docker.DockerClient:
+        """Get the client connected to the Docker Daemon of the first endpoint (See `DockerEndpoint.docker_client`).
+
+        Args:
+            max_pool_size (int): Minimum size of the client connection pool.
+
+        Returns:
+            docker.DockerClient: Client connected to the Docker Daemon.
+        """
+        return cls.endpoints()[0].docker_client(max_pool_size)
+
+    @classmethod
+    def set_concurrency(cls, max_containers: int):
+        """Size the client connection pools to the number of containers executed concurrently.
+
+        Each running container keeps one connection open to follow its logs. Extra connections are reserved for
+        the other requests (e.g., create, start and kill containers).
+
+        Args:
+            max_containers (int): Maximum number of containers executed concurrently.
+        """
+        for endpoint in cls.endpoints():
+            endpoint.docker_client(max_pool_size=min(max_containers, endpoint.capacity or max_containers) * 2)
+
+    @classmethod
+    def resource_scheduler(cls) -> ResourceScheduler:
+        """Get the scheduler used to reserve the resources of the containers in the first endpoint.
+
+        See `DockerEndpoint.resource_scheduler`.
+
+        Returns:
+            ResourceScheduler: Resource scheduler.
+        """
+        return cls.endpoints()[0].resource_scheduler()
+
+    @classmethod
+    def set_resource_budget(cls, cpus: Optional[float] = None, memory: Optional[Union[int, str]] = None):
+        """Define the resources (CPU and memory) that can be used by the containers in each endpoint.
+
+        Args:
+            cpus (Optional[float]): Number of CPUs available to the containers. `None` disables the CPU accounting.
+
+            memory (Optional[Union[int, str]]): Memory available to the containers, in bytes or in the Docker format
+            (e.g., `64g`). `None` disables the memory accounting.
+
+        Note:
+            The budget must be defined before the execution of the containers.
+        """
+        for endpoint in cls.endpoints():
+            endpoint.set_resource_budget(cpus, memory)
+
+    @classmethod
+    def _resource_reservation(cls, image: str, kwargs: Dict) -> ResourceReservation:
+        """Define the reservation of a container and apply the resource limits to its parameters.
+
+        Args:
+            image (str): Image reference, as defined in `EnvironmentConfig.RESOURCE_PROFILES`.
+
+            kwargs (Dict): Parameters to the `docker.DockerClient.containers.create` function. The limits
+            (`nano_cpus` and `mem_limit`) explicitly defined in the parameters are kept (and reserved). The `cpus`
+            parameter only defines the CPUs reserved and is removed.
+
+        Returns:
+            ResourceReservation: Resources reserved to the container.
+        """
+        reservation = ResourceReservation.from_container(EnvironmentConfig.RESOURCE_PROFILES.get(image, {}), kwargs)
+        kwargs.pop("cpus", None)
+
+        for parameter, limit in reservation.container_limits(EnvironmentConfig.LIMIT_CPUS).items():
+            kwargs.setdefault(parameter, limit)
+        return reservation
+
+    @classmethod
+    def shutdown(cls):
+        """Remove the running containers and close the connections with the Docker Daemons."""
+        cls.remove_running_containers()
+
+        with cls._endpoints_lock:
+            endpoints = list(cls._endpoints or [])
+
+        for endpoint in endpoints:
+            endpoint.shutdown()
+
+    @classmethod
+    def remove_running_containers(cls):
+        """Remove all running Docker Containers managed by `ContainerManager`."""
+        with cls._running_containers_lock:
+            running_containers = list(cls._running_containers)
+
+        for container in running_containers:
+            _kill_container(container)
+
+    @classmethod
+    def _register_container(cls, container):
+        """Register a container as running."""
+        with cls._running_containers_lock:
+            cls._running_containers.append(container)
+
+    @classmethod
+    def _unregister_container(cls, container):
+        """Remove a container from the registry of running containers."""
+        with cls._running_containers_lock:
+            if container in cls._running_containers:
+                cls._running_containers.remove(container)
+
+    @classmethod
+    async def _wait_container_async(cls, container,
+                                    log_handler: Optional[Callable[[List[str]], None]] = None) -> int:
+        """Wait (without blocking the event loop) until a container exits.
+
+        The container status is checked every `ContainerManager.poll_interval` seconds. When a `log_handler` is
+        defined, the new log lines of the container are read at each check and sent to the handler.
+
+        Args:
+            container (docker.models.containers.Container): Running container.
+
+            log_handler (Optional[Callable[[List[str]], None]]): Function called with the new log lines of the
+            container.
+
+        Returns:
+            int: Container exit status.
+        """
+        log_follower = _LogFollower(container)
+
+        while True:
+            await _call(container.reload)
+            exited = container.status in ("exited", "dead")
+
+            if log_handler is not None:
+                await log_follower.follow(log_handler)
+
+            if exited:
+                return container.attrs["State"]["ExitCode"]
+            await asyncio.sleep(cls.poll_interval)
+
+    @classmethod
+    async def run_container_async(cls, **kwargs):
+        """Execute a container and wait for it without blocking the event loop.
+
+        The container is removed after the execution if `auto_remove` is defined. The removal is made by the
+        `ContainerManager` (not by the Docker Daemon), so the exit status of the container can be checked.
+
+        The container is executed in the least-loaded healthy endpoint (see `endpoints`), and it is only created when
+        the resources of its profile can be reserved in the endpoint (see `resource_scheduler`). If the coroutine is
+        cancelled, the container is killed.
+
+        Args:
+            kwargs (Dict): Parameters to the `docker.DockerClient.containers.create` function. The `log_handler`
+            parameter can be used to define a function called with the new log lines of the container
+            (e.g., `research_processing.logs.SceneLog`) and the `telemetry` parameter to record the resource usage of
+            the container (`research_processing.telemetry.SceneTelemetry`). The `timeout` parameter defines the
+            maximum execution time (in seconds) of the container (default: `EnvironmentConfig.CONTAINER_TIMEOUT`)
+            and the `cpus` parameter the CPUs reserved to it (default: the image resource profile).
+
+        Returns:
+            None: Container logs are sent to the `log_handler`.
+
+        Raises:
+            ContainerExitError: If the container exits with a non-zero status.
+
+            ContainerTimeoutError: If the container exceeds the `timeout`. The container is killed.
+
+        See:
+            For more information about the `docker.DockerClient.containers.create` function, please refer to the
+            Docker SDK for Python documentation: https://docker-py.readthedocs.io/en/stable/containers.html
+        """
+        auto_remove = kwargs.pop("auto_remove", False)
+        log_handler = kwargs.pop("log_handler", None)
+        telemetry = kwargs.pop("telemetry", None)
+        timeout = kwargs.pop("timeout", EnvironmentConfig.CONTAINER_TIMEOUT)
+        reservation = cls._resource_reservation(kwargs["image"], kwargs)
+
+        async with cls._endpoint() as endpoint:
+            with _track_endpoint_health(endpoint):
+                client = endpoint.docker_client()
+                kwargs["image"] = await _call(endpoint.resolve_image, kwargs["image"])
+
+                async with endpoint.resource_scheduler().reserve_async(reservation):
+                    container = await _call(client.containers.create, **kwargs)
+
+                    try:
+                        await _call(container.start)
+
+                        # if any problem is raised, then, register the container execution
+                        cls._register_container(container)
+
+                        async with _record_telemetry(container, telemetry):
+                            # watchdog: the container is killed (below) if it does not finish in time
+                            try:
+                                exit_code = await asyncio.wait_for(cls._wait_container_async(container, log_handler),
+                                                                   timeout)
+                            except asyncio.TimeoutError:
+                                raise ContainerTimeoutError(kwargs.get("command"), timeout) from None
+                    except BaseException:
+                        await _call(_kill_container, container)
+                        raise
+                    finally:
+                        cls._unregister_container(container)
+
+                        if auto_remove:
+                            await _call(_remove_container, container)
+
+        if exit_code != 0:
+            raise ContainerExitError(kwargs.get("command"), exit_code)
+
+    @classmethod
+    def run_container(cls, **kwargs):
+        """Execute a container and wait for its execution.
+
+        Synchronous version of `run_container_async`.
+
+        Args:
+            kwargs (Dict): Parameters to the `ContainerManager.run_container_async` method.
+
+        Raises:
+            ContainerExitError: If the container exits with a non-zero status.
+
+            ContainerTimeoutError: If the container exceeds its execution timeout.
+        """
+        run_coroutine(cls.run_container_async(**kwargs))
+
+    @classmethod
+    async def _exec_run_async(cls, client: docker.DockerClient, container, command: List[str],
+                              log_follower: Optional["_LogFollower"] = None,
+                              log_handler: Optional[Callable[[List[str]], None]] = None) -> int:
+        """Execute a command in a running container and wait (without blocking the event loop) for its exit status.
+
+        Args:
+            client (docker.DockerClient): Client connected to the Docker Daemon.
+
+            container (docker.models.containers.Container): Running container.
+
+            command (List[str]): Command to be executed.
+
+            log_follower (Optional[_LogFollower]): Reader of the container logs.
+
+            log_handler (Optional[Callable[[List[str]], None]]): Function called with the new log lines of the
+            command. The output of the command is redirected to the container logs (the output of the main
+            process of the container), so it requires `sh` in the image.
+
+        Returns:
+            int: Exit status of the command.
+        """
+        if log_handler is not None:
+            command = ["sh", "-c", 'exec "$@" > /proc/1/fd/1 2>&1', "sh", *command]
+
+        exec_id = (await _call(client.api.exec_create, container.id, command))["Id"]
+        await _call(client.api.exec_start, exec_id, detach=True)
+
+        while True:
+            exec_info = await _call(client.api.exec_inspect, exec_id)
+
+            if log_handler is not None:
+                await log_follower.follow(log_handler)
+
+            if not exec_info["Running"]:
+                return exec_info["ExitCode"]
+            await asyncio.sleep(cls.poll_interval)
+
+    @classmethod
+    async def run_container_batch_async(cls, commands: List[Union[str, List[str]]],
+                                        log_handlers: Optional[List[Callable[[List[str]], None]]] = None,
+                                        telemetries: Optional[List[SceneTelemetry]] = None,
+                                        **kwargs) -> List[Tuple[int, float]]:
+        """Execute several commands in a single (warm) container without blocking the event loop.
+
+        The container is created with an idle entrypoint and each command is executed, in order, with the Docker
+        `exec` API. The commands are appended to the image entrypoint, in the same way the `command` parameter is used
+        when a container is created. This avoids the creation and removal of one container per command.
+
+        Args:
+            commands (List[Union[str, List[str]]]): Commands (e.g., scene ids) executed in the container.
+
+            log_handlers (Optional[List[Callable[[List[str]], None]]]): Function called with the new log lines of each
+            command (`None` items disable the log capture of a command).
+
+            telemetries (Optional[List[SceneTelemetry]]): Telemetry where the resource usage of the container is
+            recorded during the execution of each command (`None` items disable the telemetry of a command).
+
+            kwargs (Dict): Parameters to the `docker.DockerClient.containers.create` function (except `command` and
+            `entrypoint`, which are defined by the `ContainerManager`). The `timeout` parameter defines the maximum
+            execution time (in seconds) of each command (default: `EnvironmentConfig.CONTAINER_TIMEOUT`).
+
+        Returns:
+            List[Tuple[int, float]]: Exit code and execution time (in seconds) of each command.
+
+        Raises:
+            ContainerBatchError: If a command fails (e.g., `ContainerTimeoutError`, when the command exceeds the
+            `timeout`). The container is killed, so the remaining commands are not executed.
+        """
+        auto_remove = kwargs.pop("auto_remove", False)
+        timeout = kwargs.pop("timeout", EnvironmentConfig.CONTAINER_TIMEOUT)
+        log_handlers = log_handlers or [None] * len(commands)
+        telemetries = telemetries or [None] * len(commands)
+        reservation = cls._resource_reservation(kwargs["image"], kwargs)
+
+        async with cls._endpoint() as endpoint:
+            with _track_endpoint_health(endpoint):
+                client = endpoint.docker_client()
+                kwargs["image"] = await _call(endpoint.resolve_image, kwargs["image"])
+
+                image = await _call(client.images.get, kwargs["image"])
+                entrypoint = image.attrs["Config"]["Entrypoint"] or []
+
+                async with endpoint.resource_scheduler().reserve_async(reservation):
+                    container = await _call(client.containers.create, **{
+                        **kwargs,
+                        "entrypoint": ["tail", "-f", "/dev/null"],
+                        "command": None
+                    })
+
+                    exit_codes = []
+                    try:
+                        await _call(container.start)
+                        cls._register_container(container)
+
+                        log_follower = _LogFollower(container)
+                        for command, log_handler, telemetry in zip(commands, log_handlers, telemetries):
+                            command = [command] if isinstance(command, str) else list(command)
+
+                            start_time = time.monotonic()
+                            try:
+                                async with _record_telemetry(container, telemetry):
+                                    try:
+                                        exit_code = await asyncio.wait_for(cls._exec_run_async(
+                                            client, container, entrypoint + command, log_follower, log_handler
+                                        ), timeout)
+                                    except asyncio.TimeoutError:
+                                        raise ContainerTimeoutError(command, timeout) from None
+                            except Exception as error:
+                                raise ContainerBatchError(error, exit_codes) from error
+
+                            exit_codes.append((exit_code, time.monotonic() - start_time))
+                    finally:
+                        await _call(_kill_container, container)
+                        cls._unregister_container(container)
+
+                        if auto_remove:
+                            await _call(_remove_container, container)
+
+        return exit_codes
+
+    @classmethod
+    def run_container_batch(cls, commands: List[Union[str, List[str]]], **kwargs) -> List[Tuple[int, float]]:
+        """Execute several commands in a single (warm) container.
+
+        Synchronous version of `run_container_batch_async`.
+
+        Args:
+            commands (List[Union[str, List[str]]]): Commands (e.g., scene ids) executed in the container.
+
+            kwargs (Dict): Parameters to the `ContainerManager.run_container_batch_async` method.
+
+        Returns:
+            List[Tuple[int, float]]: Exit code and execution time (in seconds) of each command.
+        """
+        return run_coroutine(cls.run_container_batch_async(commands, **kwargs))
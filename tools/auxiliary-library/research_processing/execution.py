@@ -0,0 +1,570 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import asyncio
+import time
+from contextlib import suppress
+from typing import Callable, Dict, List, Optional
+
+from .config import EnvironmentConfig
+from .backends import get_backend
+from .cache import SceneCache
+from .environment import ContainerBatchError, ContainerExitError, run_coroutine
+from .manifest import SceneManifest
+from .parallelism import plan_containers
+from .staging import ScratchSpace, StagedScene
+
+
+class SceneCancelledError(RuntimeError):
+    """Error of the scenes not executed since another scene failed (fail-fast)."""
+
+    def __init__(self):
+        super().__init__("Cancelled after a failure in another scene.")
+
+
+class SceneResult:
+    """Result of the processing of a single scene.
+
+    Args:
+        scene_id (str): Scene id processed.
+
+        error (Optional[BaseException]): Error raised during the scene processing. `None` when the scene
+        was processed with success.
+
+        duration (Optional[float]): Processing duration (in seconds).
+
+        skipped (bool): Flag indicating if the scene was skipped, since it was already processed (See
+        `research_processing.manifest.SceneManifest`).
+
+        outputs (Optional[List[str]]): Full path to each output generated for the scene (registered in the scene
+        manifest).
+
+        attempts (int): Number of times the scene was executed (See `EnvironmentConfig.RETRIES`).
+
+        cached (bool): Flag indicating if the scene outputs were restored from the cache (See
+        `research_processing.cache.SceneCache`), without executing the container.
+    """
+
+    def __init__(self, scene_id: str, error: Optional[BaseException] = None, duration: Optional[float] = None,
+                 skipped: bool = False, outputs: Optional[List[str]] = None, attempts: int = 1,
+                 cached: bool = False):
+        self.scene_id = scene_id
+        self.error = error
+        self.duration = duration
+        self.skipped = skipped
+        self.outputs = outputs or []
+        self.attempts = attempts
+        self.cached = cached
+
+    @property
+    def success(self) -> bool:
+        """bool: Flag indicating if the scene was processed with success."""
+        return self.error is None
+
+    @property
+    def cancelled(self) -> bool:
+        """bool: Flag indicating if the scene was not executed, since another scene failed."""
+        return isinstance(self.error, SceneCancelledError)
+
+    def __repr__(self):
+        return f"SceneResult(scene_id={self.scene_id!r}, success={self.success}, skipped={self.skipped})"
+
+
+def summarize_failures(results: Dict[str, SceneResult]) -> str:
+    """Summarize the scenes that could not be processed.
+
+    Args:
+        results (Dict[str, SceneResult]): Result of each scene.
+
+    Returns:
+        str: Number of failed scenes and the error of each one, followed by the scenes cancelled after the failures.
+    """
+    failures = {scene_id: result for scene_id, result in results.items() if not result.success and not result.cancelled}
+    cancelled = [scene_id for scene_id, result in results.items() if result.cancelled]
+
+    lines = [
+        f"{len(failures)} of {len(results)} scenes failed:",
+        *[
+            f"  - {scene_id}: {type(result.error).__name__}: {result.error} ({result.attempts} attempt(s))"
+            for scene_id, result in failures.items()
+        ]
+    ]
+    if cancelled:
+        lines.append(f"{len(cancelled)} of {len(results)} scenes cancelled after the failure: {', '.join(cancelled)}")
+    return "\n".join(lines)
+
+
+def scene_outputs(results: Dict[str, SceneResult],
+                  failure_callback: Optional[Callable[[str, BaseException], None]] = None) -> Dict[str, List[str]]:
+    """Outputs of the scenes processed with success.
+
+    Args:
+        results (Dict[str, SceneResult]): Result of each scene.
+
+        failure_callback (Optional[Callable[[str, BaseException], None]]): Function called with the id and the error
+        of each scene that could not be processed.
+
+    Returns:
+        Dict[str, List[str]]: Dictionary mapping each scene id processed with success to the full path of its
+        outputs.
+    """
+    if failure_callback is not None:
+        for scene_id, result in results.items():
+            if not result.success:
+                failure_callback(scene_id, result.error)
+
+    return {
+        scene_id: result.outputs for scene_id, result in results.items() if result.success
+    }
+
+
+class SceneExecutionError(RuntimeError):
+    """Error raised when one or more scenes could not be processed.
+
+    Args:
+        results (Dict[str, SceneResult]): Result of each scene that was executed (or cancelled) in the processing.
+    """
+
+    def __init__(self, results: Dict[str, SceneResult]):
+        self.results = results
+        self.failures = {
+            scene_id: result for scene_id, result in results.items() if not result.success and not result.cancelled
+        }
+        self.cancelled = {
+            scene_id: result for scene_id, result in results.items() if result.cancelled
+        }
+
+        super().__init__(summarize_failures(results))
+
+
+def _retry_delay(attempt: int) -> float:
+    """Wait time (in seconds) before a new execution of a scene that failed `attempt` times (exponential backoff)."""
+    return EnvironmentConfig.RETRY_BACKOFF * 2 ** (attempt - 1)
+
+
+def _complete_scene(result: SceneResult, manifest: Optional[SceneManifest]) -> SceneResult:
+    """Write the manifest of a scene processed with success, with the outputs registered in the result.
+
+    Args:
+        result (SceneResult): Processing result of the scene, with the outputs generated for the scene.
+
+        manifest (Optional[SceneManifest]): Manifests of the processing step.
+
+    Returns:
+        SceneResult: Processing result of the scene.
+    """
+    if result.success and manifest is not None:
+        try:
+            result.outputs = manifest.outputs(result.scene_id,
+                                              manifest.write(result.scene_id, result.duration, result.outputs))
+        except OSError as error:
+            result.error = error
+    return result
+
+
+def _restore_cached_scene(scene_id: str, cache: SceneCache,
+                          manifest: Optional[SceneManifest]) -> Optional[SceneResult]:
+    """Restore the outputs of a scene from the cache, writing the scene manifest.
+
+    Args:
+        scene_id (str): Scene id.
+
+        cache (SceneCache): Cache of the processing step.
+
+        manifest (Optional[SceneManifest]): Manifests of the processing step.
+
+    Returns:
+        Optional[SceneResult]: Result of the scene. `None` is returned when the scene is not in the cache.
+    """
+    start_time = time.monotonic()
+
+    try:
+        outputs = cache.restore(scene_id)
+    except OSError:
+        return None
+
+    if outputs is None:
+        return None
+
+    result = SceneResult(scene_id, duration=time.monotonic() - start_time, outputs=outputs, attempts=0, cached=True)
+    return _complete_scene(result, manifest)
+
+
+def _cache_scene(result: SceneResult, cache: Optional[SceneCache]):
+    """Store the outputs of a scene processed with success in the cache (errors of the cache are ignored)."""
+    if cache is None or not result.success or result.skipped or result.cached:
+        return
+
+    with suppress(OSError):
+        cache.store(result.scene_id, result.outputs)
+
+
+async def _run_scene_container(scene_id: str, container_kwargs: Dict, manifest: Optional[SceneManifest] = None,
+                               staged_scene: Optional[StagedScene] = None,
+                               retries: Optional[int] = None) -> Dict[str, SceneResult]:
+    """Run the container of a single scene and capture the processing status.
+
+    When the execution fails (e.g., a non-zero exit status or a timeout), the scene is executed again, up to
+    `retries` times, with an exponential backoff between the attempts.
+
+    Args:
+        scene_id (str): Scene id to be processed.
+
+        container_kwargs (Dict): Parameters to the `ContainerManager.run_container_async` method.
+
+        manifest (Optional[SceneManifest]): Manifests of the processing step. When defined, the manifest of the
+        scene is written after its processing.
+
+        staged_scene (Optional[StagedScene]): Scene staged in the scratch space. When defined, the outputs are moved
+        from the scratch directory to the output directory before the manifest is written.
+
+        retries (Optional[int]): Maximum number of retries. When `None`, the `EnvironmentConfig.RETRIES` is used.
+
+    Returns:
+        Dict[str, SceneResult]: Processing result of the scene.
+    """
+    loop = asyncio.get_running_loop()
+    retries = EnvironmentConfig.RETRIES if retries is None else retries
+
+    start_time = time.monotonic()
+
+    for attempt in range(1, retries + 2):
+        try:
+            # entries of the output directory before the execution, to find the outputs of the scene
+            snapshot = await loop.run_in_executor(None, manifest.snapshot) \
+                if manifest is not None and staged_scene is None else None
+
+            await get_backend().run_async(**container_kwargs)
+
+            if staged_scene is not None:
+                outputs = await loop.run_in_executor(None, staged_scene.commit)
+            else:
+                outputs = await loop.run_in_executor(None, manifest.scene_outputs, scene_id, snapshot) \
+                    if snapshot is not None else []
+            break
+        except Exception as error:
+            if attempt > retries:
+                return {scene_id: SceneResult(scene_id, error, time.monotonic() - start_time, attempts=attempt)}
+
+        if staged_scene is not None:
+            await loop.run_in_executor(None, staged_scene.clear_outputs)
+        await asyncio.sleep(_retry_delay(attempt))
+
+    result = SceneResult(scene_id, duration=time.monotonic() - start_time, outputs=outputs, attempts=attempt)
+    return {scene_id: await loop.run_in_executor(None, _complete_scene, result, manifest)}
+
+
+async def _run_scene_batch(containers: Dict[str, Dict],
+                           manifest: Optional[SceneManifest] = None) -> Dict[str, SceneResult]:
+    """Run a batch of scenes in a single container and capture the processing status of each scene.
+
+    Args:
+        containers (Dict[str, Dict]): Dictionary mapping each scene id to the parameters of the
+        `ContainerManager.run_container_async` method. All the scenes must use the same parameters, except the
+        `command`, the `log_handler` and the `telemetry`.
+
+        manifest (Optional[SceneManifest]): Manifests of the processing step. When defined, the manifest of each
+        scene processed with success is written after the batch processing.
+
+    Returns:
+        Dict[str, SceneResult]: Processing result of each scene.
+
+    Note:
+        When the batch is interrupted (e.g., by a timeout), only the scenes not completed are failed. The scenes that
+        fail in the batch are retried (up to `EnvironmentConfig.RETRIES` times) one per container.
+    """
+    scene_ids = list(containers)
+    commands = [containers[scene_id]["command"] for scene_id in scene_ids]
+
+    log_handlers = [containers[scene_id].get("log_handler") for scene_id in scene_ids]
+    telemetries = [containers[scene_id].get("telemetry") for scene_id in scene_ids]
+
+    container_kwargs = {
+        key: value for key, value in containers[scene_ids[0]].items()
+        if key not in ("command", "log_handler", "telemetry")
+    }
+
+    loop = asyncio.get_running_loop()
+
+    snapshot, exit_codes, error = None, [], None
+    try:
+        snapshot = await loop.run_in_executor(None, manifest.snapshot) if manifest is not None else None
+
+        exit_codes = await get_backend().run_batch_async(commands, log_handlers, telemetries, **container_kwargs)
+    except ContainerBatchError as batch_error:
+        exit_codes, error = batch_error.exit_codes, batch_error.error
+    except Exception as batch_error:
+        error = batch_error
+
+    results = {}
+    for scene_id, command, (exit_code, duration) in zip(scene_ids, commands, exit_codes):
+        outputs = await loop.run_in_executor(None, manifest.scene_outputs, scene_id, snapshot) \
+            if snapshot is not None and exit_code == 0 else []
+
+        result = SceneResult(scene_id, None if exit_code == 0 else ContainerExitError(command, exit_code),
+                             duration, outputs=outputs)
+
+        results[scene_id] = await loop.run_in_executor(None, _complete_scene, result, manifest)
+
+    # the scenes not completed when the batch was interrupted
+    for scene_id in scene_ids[len(exit_codes):]:
+        results[scene_id] = SceneResult(scene_id, error)
+
+    if EnvironmentConfig.RETRIES > 0:
+        for scene_id, result in results.items():
+            if result.success:
+                continue
+
+            await asyncio.sleep(_retry_delay(1))
+
+            results[scene_id] = (await _run_scene_container(scene_id, containers[scene_id], manifest,
+                                                            retries=EnvironmentConfig.RETRIES - 1))[scene_id]
+            results[scene_id].attempts += 1
+    return results
+
+
+def _make_batches(containers: Dict[str, Dict], batch_size: int) -> List[Dict[str, Dict]]:
+    """Split the scenes in batches with up to `batch_size` scenes.
+
+    Args:
+        containers (Dict[str, Dict]): Dictionary mapping each scene id to the parameters used to process it.
+
+        batch_size (int): Maximum number of scenes in each batch.
+
+    Returns:
+        List[Dict[str, Dict]]: Batches of scenes.
+    """
+    scene_ids = list(containers)
+
+    return [
+        {scene_id: containers[scene_id] for scene_id in scene_ids[idx:idx + batch_size]}
+        for idx in range(0, len(scene_ids), batch_size)
+    ]
+
+
+async def run_scene_containers_async(containers: Dict[str, Dict], max_workers: int = 1, batch_size: int = 1,
+                                     manifest: Optional[SceneManifest] = None, skip_processed: bool = True,
+                                     continue_on_failure: bool = False, cache: Optional[SceneCache] = None,
+                                     staged: bool = False, concurrent_steps: int = 1) -> Dict[str, SceneResult]:
+    """Run the processing containers of the scenes, with at most `max_workers` containers at the same time.
+
+    With `batch_size = 1`, each scene is processed by its own container. With `batch_size > 1`, the scenes are
+    grouped in batches and each batch is processed in a single warm container
+    (see `ContainerManager.run_container_batch_async`), which avoids the creation and removal of one container per
+    scene for short jobs. In both modes, the exit status of each scene is reported.
+
+    The scenes that fail are retried up to `EnvironmentConfig.RETRIES` times. When a scene still fails, the scenes
+    not yet started are cancelled, the running ones are waited and then a `SceneExecutionError` is raised. With
+    `continue_on_failure`, all the other scenes are processed and the failures are reported in the results
+    (See `summarize_failures`), without raising an error. If the coroutine is cancelled, the running containers
+    are killed.
+
+    When a `manifest` is defined, a completion manifest is written for each scene processed with success. With
+    `skip_processed`, the scenes with a valid manifest are skipped, so an interrupted execution can be resumed
+    processing only the remaining scenes.
+
+    The containers are executed by the active execution backend (See `research_processing.backends.get_backend`),
+    so the same scenes can be processed in Docker containers, in native processes or with a fake backend. The
+    threads of each container, and the number of containers executed concurrently (up to `max_workers`), are
+    defined by the parallelism planner (See `research_processing.parallelism.plan_parallelism`).
+
+    With `staged`, and the scratch space enabled (`EnvironmentConfig.SCRATCH_DIR`), the scenes processed one per
+    container are staged in the scratch directory (See `research_processing.staging.ScratchSpace`). The batches
+    (`batch_size > 1`) read and write the input and output directories directly.
+
+    Args:
+        containers (Dict[str, Dict]): Dictionary mapping each scene id to the parameters of the
+        `ContainerManager.run_container_async` method used to process it.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        batch_size (int): Maximum number of scenes processed by each container.
+
+        manifest (Optional[SceneManifest]): Manifests of the processing step.
+
+        skip_processed (bool): Flag indicating if the scenes with a valid manifest must be skipped.
+
+        continue_on_failure (bool): Flag indicating if the other scenes must be processed when a scene fails.
+
+        cache (Optional[SceneCache]): Cache of the processing step. With `skip_processed`, the scenes in the cache
+        are restored without executing the containers, and the outputs of the scenes processed are stored in it.
+
+        staged (bool): Flag indicating if the scenes are staged in the scratch space, when it is enabled.
+
+        concurrent_steps (int): Number of processing steps executed concurrently in the host (e.g., the per-scene
+        solids of a pipeline), which share the CPUs (See `research_processing.parallelism.plan_parallelism`).
+
+    Returns:
+        Dict[str, SceneResult]: Processing result of each scene.
+
+    Raises:
+        SceneExecutionError: If any of the scenes could not be processed (and `continue_on_failure` is not set).
+    """
+    if max_workers < 1:
+        raise ValueError("The `max_workers` must be greater than or equal to 1.")
+
+    if batch_size < 1:
+        raise ValueError("The `batch_size` must be greater than or equal to 1.")
+
+    results = {}
+
+    if manifest is not None and skip_processed:
+        for scene_id in containers:
+            if manifest.is_done(scene_id):
+                results[scene_id] = SceneResult(scene_id, skipped=True, outputs=manifest.outputs(scene_id))
+
+    if cache is not None and skip_processed:
+        for scene_id in containers:
+            cached_result = _restore_cached_scene(scene_id, cache, manifest) if scene_id not in results else None
+
+            if cached_result is not None:
+                results[scene_id] = cached_result
+
+    pending_containers = {
+        scene_id: container_kwargs for scene_id, container_kwargs in containers.items() if scene_id not in results
+    }
+
+    # threads of each container and number of containers (See `research_processing.parallelism.plan_parallelism`)
+    pending_containers, max_workers = plan_containers(pending_containers, max_workers, concurrent_steps)
+    get_backend().set_concurrency(max_workers)
+
+    loop = asyncio.get_running_loop()
+    scratch = ScratchSpace.default() if staged else None
+
+    workers = asyncio.Semaphore(max_workers)
+    failed = asyncio.Event()
+
+    async def run_scene(scene_id: str, container_kwargs: Dict) -> Dict[str, SceneResult]:
+        staged_scene = None
+
+        if scratch is not None:
+            staged_scene = await loop.run_in_executor(None, scratch.stage_scene, scene_id, container_kwargs)
+            container_kwargs = staged_scene.container_kwargs
+
+        try:
+            return await _run_scene_container(scene_id, container_kwargs, manifest, staged_scene)
+        finally:
+            if staged_scene is not None:
+                staged_scene.close()
+
+    async def run_batch(batch: Dict[str, Dict]) -> Dict[str, SceneResult]:
+        async with workers:
+            # fail-fast: no new container is started after a failure
+            if failed.is_set():
+                return {
+                    scene_id: SceneResult(scene_id, SceneCancelledError()) for scene_id in batch
+                }
+
+            if len(batch) == 1:
+                batch_results = await run_scene(*next(iter(batch.items())))
+            else:
+                batch_results = await _run_scene_batch(batch, manifest)
+
+            if cache is not None:
+                for result in batch_results.values():
+                    await loop.run_in_executor(None, _cache_scene, result, cache)
+
+            if any(not result.success for result in batch_results.values()) and not continue_on_failure:
+                failed.set()
+            return batch_results
+
+    for batch_results in await asyncio.gather(*[
+        run_batch(batch) for batch in _make_batches(pending_containers, batch_size)
+    ]):
+        results.update(batch_results)
+
+    # keeping the input order
+    results = {scene_id: results[scene_id] for scene_id in containers}
+
+    failures = [result.error for result in results.values() if not result.success and not result.cancelled]
+    if failures and not continue_on_failure:
+        raise SceneExecutionError(results) from failures[0]
+
+    return results
+
+
+def run_scene_containers(containers: Dict[str, Dict], max_workers: int = 1, batch_size: int = 1,
+                         manifest: Optional[SceneManifest] = None, skip_processed: bool = True,
+                         continue_on_failure: bool = False, cache: Optional[SceneCache] = None,
+                         staged: bool = False, concurrent_steps: int = 1) -> Dict[str, SceneResult]:
+    """Run the processing containers of the scenes.
+
+    Synchronous version of `run_scene_containers_async`. It can also be used when an event loop is already
+    running (e.g., in a Jupyter Notebook).
+
+    Args:
+        containers (Dict[str, Dict]): Dictionary mapping each scene id to the parameters of the
+        `ContainerManager.run_container_async` method used to process it.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        batch_size (int): Maximum number of scenes processed by each container.
+
+        manifest (Optional[SceneManifest]): Manifests of the processing step.
+
+        skip_processed (bool): Flag indicating if the scenes with a valid manifest must be skipped.
+
+        continue_on_failure (bool): Flag indicating if the other scenes must be processed when a scene fails.
+
+        cache (Optional[SceneCache]): Cache of the processing step. With `skip_processed`, the scenes in the cache
+        are restored without executing the containers, and the outputs of the scenes processed are stored in it.
+
+        staged (bool): Flag indicating if the scenes are staged in the scratch space, when it is enabled.
+
+        concurrent_steps (int): Number of processing steps executed concurrently in the host (e.g., the per-scene
+        solids of a pipeline), which share the CPUs (See `research_processing.parallelism.plan_parallelism`).
+
+    Returns:
+        Dict[str, SceneResult]: Processing result of each scene.
+
+    Raises:
+        SceneExecutionError: If any of the scenes could not be processed (and `continue_on_failure` is not set).
+    """
+    return run_coroutine(run_scene_containers_async(
+        containers, max_workers=max_workers, batch_size=batch_size, manifest=manifest, skip_processed=skip_processed,
+        continue_on_failure=continue_on_failure, cache=cache, staged=staged, concurrent_steps=concurrent_steps
+    ))
+
+
+class SceneStage:
+    """Processing step of the scenes (e.g., the Sen2Cor atmospheric correction), used by the processing functions.
+
+    Args:
+        name (str): Name of the processing step (e.g., `sen2cor`).
+
+        container (Callable[[str], Dict]): Function that returns the parameters of the
+        `ContainerManager.run_container_async` method used to process a scene.
+
+        manifest (Optional[SceneManifest]): Manifests of the processing step.
+
+        staged (bool): Flag indicating if the scenes are staged in the scratch space, when it is enabled (See
+        `research_processing.staging.ScratchSpace`).
+
+        cache (Optional[SceneCache]): Cache of the outputs of the step (See `research_processing.cache.SceneCache`).
+    """
+
+    def __init__(self, name: str, container: Callable[[str], Dict], manifest: Optional[SceneManifest] = None,
+                 staged: bool = False, cache: Optional[SceneCache] = None):
+        self.name = name
+        self.container = container
+        self.manifest = manifest
+        self.staged = staged
+        self.cache = cache
+
+    def __repr__(self):
+        return f"SceneStage(name={self.name!r}, staged={self.staged})"
@@ -0,0 +1,245 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fnmatch import fnmatchcase
+from typing import Callable, Dict, List, Optional
+
+# Files of the Landsat-8/OLI Collection 2 Level-2 scenes (`<scene_id>_<suffix>`) used in the processing.
+LANDSAT8_FILES = [
+    "SR_B1.TIF", "SR_B2.TIF", "SR_B3.TIF", "SR_B4.TIF", "SR_B5.TIF", "SR_B6.TIF", "SR_B7.TIF",
+    "QA_PIXEL.TIF", "MTL.txt", "ANG.txt"
+]
+
+# Bands of the Sentinel-2/MSI Level-1C scenes used in the processing.
+SENTINEL2_BANDS = ["B01", "B02", "B03", "B04", "B05", "B06", "B07", "B08", "B8A", "B09", "B10", "B11", "B12"]
+
+
+def landsat8_required_files(scene_id: str) -> List[str]:
+    """Define the files required to process a Landsat-8/OLI scene.
+
+    Args:
+        scene_id (str): Landsat-8/OLI scene id (e.g., `LC08_L2SP_223081_20200714_20200912_02_T1`).
+
+    Returns:
+        List[str]: Patterns (See `fnmatch`) of the required files, relative to the scene directory.
+    """
+    return [f"{scene_id}_{suffix}" for suffix in LANDSAT8_FILES]
+
+
+def sentinel2_required_files(scene_id: str) -> List[str]:
+    """Define the files required to process a Sentinel-2/MSI L1C scene (`.SAFE` directory).
+
+    Args:
+        scene_id (str): Sentinel-2/MSI scene id (e.g., `S2B_MSIL1C_20171119T133209_..._20171120T175608.SAFE`).
+
+    Returns:
+        List[str]: Patterns (See `fnmatch`) of the required files, relative to the scene directory.
+    """
+    return [
+        "manifest.safe",
+        "MTD_MSIL1C.xml",
+        "GRANULE/*/MTD_TL.xml",
+        *[f"GRANULE/*/IMG_DATA/*_{band}.jp2" for band in SENTINEL2_BANDS]
+    ]
+
+
+def _scan_files(scene_dir: str) -> Dict[str, int]:
+    """List the files of a directory tree with `os.scandir`.
+
+    Returns:
+        Dict[str, int]: Dictionary mapping the path of each file, relative to the `scene_dir` (with `/` separators),
+        to its size (in bytes).
+    """
+    files = {}
+    pending = [(scene_dir, "")]
+
+    while pending:
+        directory, prefix = pending.pop()
+
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    pending.append((entry.path, f"{prefix}{entry.name}/"))
+
+                elif entry.is_file():
+                    files[f"{prefix}{entry.name}"] = entry.stat().st_size
+    return files
+
+
+class SceneInventory:
+    """Inventory of the input directory of a scene (See `inspect_scene`).
+
+    Args:
+        scene_id (str): Scene id.
+
+        path (str): Scene directory.
+
+        files (Optional[Dict[str, int]]): Dictionary mapping each file of the scene (relative path) to its size.
+
+        missing (Optional[List[str]]): Required files (patterns) not found or empty.
+
+        error (Optional[str]): Error found when the scene directory was scanned (e.g., the directory does not exist).
+    """
+
+    def __init__(self, scene_id: str, path: str, files: Optional[Dict[str, int]] = None,
+                 missing: Optional[List[str]] = None, error: Optional[str] = None):
+        self.scene_id = scene_id
+        self.path = path
+        self.files = files or {}
+        self.missing = missing or []
+        self.error = error
+
+    @property
+    def size(self) -> int:
+        """int: Size (in bytes) of the scene files."""
+        return sum(self.files.values())
+
+    @property
+    def valid(self) -> bool:
+        """bool: Flag indicating if the scene has all the required files."""
+        return self.error is None and not self.missing
+
+    @property
+    def problem(self) -> Optional[str]:
+        """Optional[str]: Description of the problem of an invalid scene (`None` for valid scenes)."""
+        if self.error is not None:
+            return self.error
+
+        return f"missing or empty files: {', '.join(self.missing)}" if self.missing else None
+
+    def to_dict(self) -> Dict:
+        """Dictionary representation of the inventory (used in the inventory file)."""
+        return {
+            "scene_id": self.scene_id,
+            "path": self.path,
+            "valid": self.valid,
+            "problem": self.problem,
+            "size": self.size,
+            "files": self.files
+        }
+
+    def __repr__(self):
+        return f"SceneInventory(scene_id={self.scene_id!r}, valid={self.valid}, size={self.size})"
+
+
+def inspect_scene(input_dir: str, scene_id: str, required_files: List[str]) -> SceneInventory:
+    """Scan the directory of a scene, checking that its required files are available.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes are located.
+
+        scene_id (str): Scene id (equivalent to the scene directory name).
+
+        required_files (List[str]): Patterns (See `fnmatch`) of the required files, relative to the scene directory.
+        Each pattern must match at least one non-empty file.
+
+    Returns:
+        SceneInventory: Inventory of the scene.
+    """
+    scene_dir = os.path.join(input_dir, scene_id)
+
+    try:
+        files = _scan_files(scene_dir)
+    except FileNotFoundError:
+        return SceneInventory(scene_id, scene_dir, error=f"the scene directory {scene_dir} does not exist")
+    except OSError as error:
+        return SceneInventory(scene_id, scene_dir, error=f"the scene directory could not be scanned ({error})")
+
+    missing = [
+        pattern for pattern in required_files
+        if not any(size > 0 and fnmatchcase(name, pattern) for name, size in files.items())
+    ]
+    return SceneInventory(scene_id, scene_dir, files, missing)
+
+
+def inventory_scenes(input_dir: str, scene_ids: List[str], required_files: Callable[[str], List[str]],
+                     max_workers: int = 8) -> Dict[str, SceneInventory]:
+    """Scan the directories of the scenes in parallel (See `inspect_scene`).
+
+    The scenes are scanned in a thread pool, so the latency of the storage (e.g., network file systems) is
+    overlapped between the scenes.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes are located.
+
+        scene_ids (List[str]): Scene ids.
+
+        required_files (Callable[[str], List[str]]): Function that defines the required files of a scene (e.g.,
+        `landsat8_required_files` and `sentinel2_required_files`).
+
+        max_workers (int): Maximum number of scenes scanned concurrently.
+
+    Returns:
+        Dict[str, SceneInventory]: Dictionary mapping each scene id to its inventory (in the input order).
+    """
+    if max_workers < 1:
+        raise ValueError("The `max_workers` must be greater than or equal to 1.")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        inventories = list(executor.map(
+            lambda scene_id: inspect_scene(input_dir, scene_id, required_files(scene_id)), scene_ids
+        ))
+
+    return {inventory.scene_id: inventory for inventory in inventories}
+
+
+def write_inventory(inventory_file: str, inventories: Dict[str, Dict[str, SceneInventory]]) -> Dict:
+    """Write an inventory file (JSON), with the files and sizes of the scenes.
+
+    The file is written atomically (a temporary file is renamed):
+
+        {
+            "created_at": "...",
+            "<collection>": {
+                "size": <bytes>,
+                "invalid_scenes": <number of invalid scenes>,
+                "scenes": [
+                    {"scene_id": "...", "path": "...", "valid": true, "problem": null, "size": <bytes>, "files": {...}}
+                ]
+            }
+        }
+
+    Args:
+        inventory_file (str): Full path to the inventory file.
+
+        inventories (Dict[str, Dict[str, SceneInventory]]): Dictionary mapping the name of each collection (e.g.,
+        `landsat8`) to the inventories of its scenes (See `inventory_scenes`).
+
+    Returns:
+        Dict: Inventory file content.
+    """
+    content = {"created_at": datetime.now().isoformat()}
+
+    for collection, collection_inventories in inventories.items():
+        content[collection] = {
+            "size": sum(inventory.size for inventory in collection_inventories.values()),
+            "invalid_scenes": sum(not inventory.valid for inventory in collection_inventories.values()),
+            "scenes": [inventory.to_dict() for inventory in collection_inventories.values()]
+        }
+
+    os.makedirs(os.path.dirname(os.path.abspath(inventory_file)), exist_ok=True)
+
+    with open(inventory_file + ".tmp", "w") as inventory_stream:
+        json.dump(content, inventory_stream, indent=2)
+    os.replace(inventory_file + ".tmp", inventory_file)
+
+    return content
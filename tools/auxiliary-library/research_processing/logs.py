@@ -0,0 +1,184 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import os
+import re
+import threading
+from collections import deque
+from typing import Callable, List, Optional
+
+# Pattern of the progress messages of Sen2Cor (e.g., `Progress[%]: 23.33 : ...`).
+SEN2COR_PROGRESS_PATTERN = re.compile(r"Progress\[%\]:\s*(\d+(?:\.\d+)?)")
+
+# Known LaSRC processing steps (case insensitive markers) and the progress (%) reached when each step starts.
+LASRC_PROGRESS_MARKERS = [
+    ("reading input", 5.0),
+    ("auxiliary", 15.0),
+    ("aerosol", 35.0),
+    ("atmospheric correction", 60.0),
+    ("writing", 85.0),
+    ("succeed", 100.0)
+]
+
+
+def parse_sen2cor_progress(line: str) -> Optional[float]:
+    """Extract the progress (%) of a Sen2Cor log line.
+
+    Args:
+        line (str): Log line.
+
+    Returns:
+        Optional[float]: Progress (%). `None` is returned when the line does not have progress information.
+    """
+    match = SEN2COR_PROGRESS_PATTERN.search(line)
+
+    return float(match.group(1)) if match else None
+
+
+def parse_lasrc_progress(line: str) -> Optional[float]:
+    """Extract the progress (%) of a LaSRC log line.
+
+    LaSRC does not report percentages, so the progress is estimated from the processing steps reported in the logs
+    (See `LASRC_PROGRESS_MARKERS`).
+
+    Args:
+        line (str): Log line.
+
+    Returns:
+        Optional[float]: Progress (%). `None` is returned when the line does not have progress information.
+    """
+    line = line.lower()
+
+    for marker, progress in LASRC_PROGRESS_MARKERS:
+        if marker in line:
+            return progress
+    return None
+
+
+class SceneLog:
+    """Log capture of the processing of a scene.
+
+    The log lines are written to the scene log file as soon as they are received, and only the last `tail_lines`
+    lines are kept in memory, so the memory used does not grow with the log size.
+
+    Args:
+        scene_id (str): Scene id.
+
+        log_file (str): Path to the scene log file. The file is overwritten in each execution.
+
+        progress_parser (Optional[Callable[[str], Optional[float]]]): Function that extracts the progress (%) of a
+        log line (e.g., `parse_sen2cor_progress`).
+
+        progress_callback (Optional[Callable[[str, float], None]]): Function called with the scene id and the
+        progress (%) each time the progress advances (at least 1%).
+
+        tail_lines (int): Number of log lines kept in memory.
+    """
+
+    def __init__(self, scene_id: str, log_file: str,
+                 progress_parser: Optional[Callable[[str], Optional[float]]] = None,
+                 progress_callback: Optional[Callable[[str, float], None]] = None, tail_lines: int = 100):
+        self.scene_id = scene_id
+        self.log_file = log_file
+
+        self.progress_parser = progress_parser
+        self.progress_callback = progress_callback
+
+        self.progress = None
+        self.tail = deque(maxlen=tail_lines)
+
+        self._file_mode = "w"
+        self._lock = threading.Lock()
+
+    def __call__(self, lines: List[str]):
+        """Capture new log lines.
+
+        Args:
+            lines (List[str]): Log lines.
+        """
+        with self._lock:
+            with open(self.log_file, self._file_mode) as log_stream:
+                log_stream.writelines(line + "\n" for line in lines)
+            self._file_mode = "a"
+
+            self.tail.extend(lines)
+
+            if self.progress_parser is not None:
+                for line in lines:
+                    self._update_progress(self.progress_parser(line))
+
+    def _update_progress(self, progress: Optional[float]):
+        """Update the scene progress, reporting each advance of at least 1%."""
+        if progress is None or (self.progress is not None and progress <= self.progress):
+            return
+
+        reported = int(self.progress) if self.progress is not None else None
+        self.progress = progress
+
+        if self.progress_callback is not None and int(progress) != reported:
+            self.progress_callback(self.scene_id, progress)
+
+
+class SceneLogs:
+    """Log capture of the scenes of a processing step.
+
+    The log files are saved in the `.logs` directory, created alongside the `output_dir`:
+
+        base directory
+            ├── .logs
+            │   └── <output_dir name>
+            │       └── <scene_id>.log
+            └── <output_dir name>
+
+    Args:
+        output_dir (str): Directory where the results of the processing step are saved.
+
+        progress_parser (Optional[Callable[[str], Optional[float]]]): Function that extracts the progress (%) of a
+        log line (e.g., `parse_sen2cor_progress`).
+
+        progress_callback (Optional[Callable[[str, float], None]]): Function called with the scene id and the
+        progress (%) each time the progress of a scene advances.
+
+        tail_lines (int): Number of log lines of each scene kept in memory.
+    """
+
+    def __init__(self, output_dir: str, progress_parser: Optional[Callable[[str], Optional[float]]] = None,
+                 progress_callback: Optional[Callable[[str, float], None]] = None, tail_lines: int = 100):
+        self.progress_parser = progress_parser
+        self.progress_callback = progress_callback
+        self.tail_lines = tail_lines
+
+        self.log_dir = os.path.join(os.path.dirname(os.path.normpath(output_dir)), ".logs",
+                                    os.path.basename(os.path.normpath(output_dir)))
+
+    def path(self, scene_id: str) -> str:
+        """Path to the log file of a scene."""
+        return os.path.join(self.log_dir, f"{scene_id}.log")
+
+    def scene(self, scene_id: str) -> SceneLog:
+        """Create the log capture of a scene.
+
+        Args:
+            scene_id (str): Scene id.
+
+        Returns:
+            SceneLog: Log capture, that can be used as the `log_handler` of the `ContainerManager` methods.
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+
+        return SceneLog(scene_id, self.path(scene_id), self.progress_parser, self.progress_callback, self.tail_lines)
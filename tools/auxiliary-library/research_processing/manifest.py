@@ -0,0 +1,231 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+
+def fingerprint_paths(paths: List[str]) -> str:
+    """Generate a fingerprint of files and directories.
+
+    The fingerprint is a `sha256` hash of the metadata (relative path, size and modification time) of each file. The
+    content of the files is not read, so the fingerprint can be generated quickly even for large scenes.
+
+    Args:
+        paths (List[str]): Files and directories used to generate the fingerprint. The directories are traversed
+        recursively.
+
+    Returns:
+        str: Fingerprint of the paths.
+    """
+    digest = hashlib.sha256()
+
+    for path in sorted(paths):
+        if os.path.isfile(path):
+            files = [path]
+        else:
+            files = sorted(
+                os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+            )
+
+        for file in files:
+            file_stat = os.stat(file)
+
+            digest.update(
+                f"{os.path.relpath(file, os.path.dirname(path))}:{file_stat.st_size}:{file_stat.st_mtime_ns}\n".encode()
+            )
+    return digest.hexdigest()
+
+
+class SceneManifest:
+    """Per-scene completion manifests of a processing step.
+
+    When a scene is processed with success, a manifest (JSON file) is written with the fingerprint of the scene
+    inputs, the image used in the processing, the outputs generated and the processing duration. The outputs are
+    registered by the execution (e.g., the outputs moved from the scratch space or found with `scene_outputs`), so
+    the next steps read them from the manifest, without searching the `output_dir`. In a new execution,
+    a scene is considered done (and can be skipped) when its manifest is still valid, i.e., the inputs and the image
+    are the same and all outputs are still available.
+
+    The manifests are saved in the `.manifests` directory, created alongside the `output_dir`, to keep the output
+    directory with the scene results only:
+
+        base directory
+            ├── .manifests
+            │   └── <output_dir name>
+            │       └── <scene_id>.json
+            └── <output_dir name>
+
+    Args:
+        output_dir (str): Directory where the results of the processing step are saved.
+
+        image (str): Image used to process the scenes (e.g., the pinned images in `EnvironmentConfig`).
+
+        scene_inputs (Callable[[str], List[str]]): Function that returns the input files and directories of a scene.
+
+        output_prefix (Callable[[str], str]): Function that returns the prefix of the names of the outputs generated
+        for a scene in the `output_dir`.
+    """
+
+    def __init__(self, output_dir: str, image: str, scene_inputs: Callable[[str], List[str]],
+                 output_prefix: Callable[[str], str]):
+        self.output_dir = output_dir
+        self.image = image
+        self.scene_inputs = scene_inputs
+        self.output_prefix = output_prefix
+
+        self.manifest_dir = os.path.join(os.path.dirname(os.path.normpath(output_dir)), ".manifests",
+                                         os.path.basename(os.path.normpath(output_dir)))
+
+    def path(self, scene_id: str) -> str:
+        """Path to the manifest file of a scene."""
+        return os.path.join(self.manifest_dir, f"{scene_id}.json")
+
+    def fingerprint(self, scene_id: str) -> str:
+        """Fingerprint of the inputs of a scene."""
+        return fingerprint_paths([
+            path for path in self.scene_inputs(scene_id) if os.path.exists(path)
+        ])
+
+    def snapshot(self) -> Dict[str, int]:
+        """Entries of the `output_dir` before a processing (See `scene_outputs`).
+
+        Returns:
+            Dict[str, int]: Dictionary mapping the name of each entry to its modification time (in nanoseconds).
+        """
+        if not os.path.isdir(self.output_dir):
+            return {}
+
+        with os.scandir(self.output_dir) as entries:
+            return {entry.name: entry.stat().st_mtime_ns for entry in entries}
+
+    def scene_outputs(self, scene_id: str, snapshot: Dict[str, int]) -> List[str]:
+        """Search the outputs generated for a scene in the `output_dir`, since the `snapshot`.
+
+        When an output named exactly as the output prefix exists, it is used directly. Otherwise, the entries with
+        the output prefix created or modified since the `snapshot` are used (e.g., Sen2Cor outputs, which have the
+        processing date in the name), so the outputs of previous executions are not registered.
+
+        Args:
+            scene_id (str): Scene id.
+
+            snapshot (Dict[str, int]): Entries of the `output_dir` before the scene processing (See `snapshot`).
+
+        Returns:
+            List[str]: Full path to each output of the scene.
+        """
+        output_prefix = self.output_prefix(scene_id)
+
+        output_path = os.path.join(self.output_dir, output_prefix)
+        if os.path.exists(output_path):
+            return [output_path]
+
+        return sorted(
+            os.path.join(self.output_dir, name) for name, modified in self.snapshot().items()
+            if name.startswith(output_prefix) and snapshot.get(name) != modified
+        )
+
+    def load(self, scene_id: str) -> Optional[Dict]:
+        """Load the manifest of a scene.
+
+        Args:
+            scene_id (str): Scene id.
+
+        Returns:
+            Optional[Dict]: Manifest content. `None` is returned when the manifest does not exist or can't be read.
+        """
+        try:
+            with open(self.path(scene_id), "r") as manifest_stream:
+                return json.load(manifest_stream)
+        except (OSError, ValueError):
+            return None
+
+    def is_done(self, scene_id: str) -> bool:
+        """Check if a scene has a valid manifest.
+
+        Args:
+            scene_id (str): Scene id.
+
+        Returns:
+            bool: Flag indicating if the scene was already processed with the same inputs and image and if its
+            outputs are still available.
+        """
+        manifest = self.load(scene_id)
+
+        if not manifest or not manifest["outputs"]:
+            return False
+
+        if manifest["image"] != self.image:
+            return False
+
+        if not all(os.path.exists(os.path.join(self.output_dir, output)) for output in manifest["outputs"]):
+            return False
+
+        return manifest["input_fingerprint"] == self.fingerprint(scene_id)
+
+    def outputs(self, scene_id: str, manifest: Optional[Dict] = None) -> List[str]:
+        """Full path to the outputs registered in the manifest of a scene.
+
+        Args:
+            scene_id (str): Scene id.
+
+            manifest (Optional[Dict]): Manifest content. When not defined, the manifest is loaded.
+
+        Returns:
+            List[str]: Full path to each output of the scene.
+        """
+        manifest = manifest or self.load(scene_id) or {"outputs": []}
+
+        return [os.path.join(self.output_dir, output) for output in manifest["outputs"]]
+
+    def write(self, scene_id: str, duration: float, outputs: List[str]) -> Dict:
+        """Write the manifest of a processed scene.
+
+        The manifest is written atomically (a temporary file is renamed), so an interrupted execution does not leave
+        partial manifests.
+
+        Args:
+            scene_id (str): Scene id.
+
+            duration (float): Processing duration (in seconds).
+
+            outputs (List[str]): Full path to each output generated for the scene.
+
+        Returns:
+            Dict: Manifest content.
+        """
+        manifest = {
+            "scene_id": scene_id,
+            "image": self.image,
+            "input_fingerprint": self.fingerprint(scene_id),
+            "outputs": [os.path.basename(output) for output in outputs],
+            "duration": duration,
+            "created_at": datetime.now().isoformat()
+        }
+
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+        manifest_file = self.path(scene_id)
+        with open(manifest_file + ".tmp", "w") as manifest_stream:
+            json.dump(manifest, manifest_stream, indent=2)
+        os.replace(manifest_file + ".tmp", manifest_file)
+
+        return manifest
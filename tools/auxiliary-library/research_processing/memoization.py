@@ -0,0 +1,213 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple
+
+from .manifest import fingerprint_paths
+
+# Protocol used to serialize the memoized values (and to compute the digest of the values).
+PICKLE_PROTOCOL = 4
+
+
+def _digest(content: bytes) -> str:
+    """`sha256` hash of a content."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _output_paths(value: Any) -> List[str]:
+    """List the paths (absolute paths of existing files or directories) contained in a value."""
+    if isinstance(value, str):
+        return [value] if os.path.isabs(value) and os.path.exists(value) else []
+
+    if isinstance(value, dict):
+        value = list(value.values())
+
+    if isinstance(value, (list, tuple)):
+        return [path for item in value for path in _output_paths(item)]
+    return []
+
+
+def _write_atomically(file: str, content: bytes):
+    """Write a file atomically (a temporary file is renamed)."""
+    os.makedirs(os.path.dirname(file), exist_ok=True)
+    file_descriptor, temporary = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(file))
+
+    with os.fdopen(file_descriptor, "wb") as file_stream:
+        file_stream.write(content)
+    os.replace(temporary, file)
+
+
+class MemoStore:
+    """Store of the memoized outputs of the processing steps (e.g., the pipeline solids).
+
+    Each execution of a step is identified by a key, generated from the step name, its configuration, the versions of
+    its inputs and the version of its code (e.g., the library version and the images used). When a step is executed
+    again with the same key, its stored outputs are returned and the step is skipped:
+
+        <memo_dir>
+            ├── steps
+            │   └── <step name>
+            │       └── <key>.pickle
+            └── versions
+                └── <digest of an output id>
+
+    The version of an input is the key of the step execution that produced it, registered by the id of the producer
+    output (e.g., the step and output names, See `register`), so the steps downstream of a step executed again are
+    also executed again, even when the outputs are equal (e.g., the same output directory). The inputs not produced
+    by a memoized step are versioned by their content.
+
+    Args:
+        memo_dir (str): Directory where the outputs are stored.
+
+    Note:
+        The outputs are only returned when all the paths (absolute paths of files or directories) contained in them
+        still have the fingerprint they had when the outputs were stored (See
+        `research_processing.manifest.fingerprint_paths`).
+    """
+
+    def __init__(self, memo_dir: str):
+        self.memo_dir = memo_dir
+
+    def _step_file(self, name: str, key: str) -> str:
+        """Path to the file with the outputs of a step execution."""
+        return os.path.join(self.memo_dir, "steps", name, f"{key}.pickle")
+
+    def _version_file(self, output_id: str) -> str:
+        """Path to the file with the key of the step execution that produced an output."""
+        return os.path.join(self.memo_dir, "versions", _digest(output_id.encode()))
+
+    def register(self, key: str, output_ids: List[str]):
+        """Register the step execution (key) that produced the outputs of a step.
+
+        Args:
+            key (str): Key of the execution (See `key`).
+
+            output_ids (List[str]): Ids of the outputs of the step (e.g., `<run>:<step>:<output name>`).
+        """
+        for output_id in output_ids:
+            _write_atomically(self._version_file(output_id), key.encode())
+
+    def output_version(self, output_id: str) -> Optional[str]:
+        """Key of the step execution that produced an output.
+
+        Args:
+            output_id (str): Output id (See `register`).
+
+        Returns:
+            Optional[str]: Key of the execution. `None` is returned when the output was not produced by a memoized step.
+        """
+        try:
+            with open(self._version_file(output_id)) as version_stream:
+                return version_stream.read()
+        except OSError:
+            return None
+
+    def input_version(self, value: Any, output_ids: List[str]) -> str:
+        """Define the version of an input.
+
+        Args:
+            value (Any): Input value.
+
+            output_ids (List[str]): Ids of the outputs that produced the input (several, for the collected outputs of
+            the steps mapped over the scenes).
+
+        Returns:
+            str: Key of the step execution that produced the input (or a digest of the keys, for several outputs).
+            When any of the outputs was not produced by a memoized step, the digest of the value content is used.
+        """
+        versions = [self.output_version(output_id) for output_id in output_ids]
+
+        if not versions or None in versions:
+            return _digest(pickle.dumps(value, PICKLE_PROTOCOL))
+
+        return versions[0] if len(versions) == 1 else _digest(json.dumps(versions).encode())
+
+    @staticmethod
+    def key(name: str, config: Any, input_versions: Dict[str, str], code_version: str) -> str:
+        """Generate the key of a step execution.
+
+        Args:
+            name (str): Step name.
+
+            config (Any): Step configuration (JSON serializable).
+
+            input_versions (Dict[str, str]): Dictionary mapping the name of each input of the step to its version
+            (See `input_version`).
+
+            code_version (str): Version of the code of the step (e.g., the library version and the images used).
+
+        Returns:
+            str: `sha256` hash of the step name, configuration, versions of the inputs and code version.
+        """
+        return _digest(json.dumps({
+            "name": name,
+            "config": config,
+            "inputs": input_versions,
+            "code_version": code_version
+        }, sort_keys=True, default=str).encode())
+
+    def load(self, name: str, key: str) -> Tuple[bool, Any]:
+        """Load the outputs of a step execution.
+
+        Args:
+            name (str): Step name.
+
+            key (str): Key of the execution (See `key`).
+
+        Returns:
+            Tuple[bool, Any]: Flag indicating if the outputs were found (with all their paths unchanged) and the
+            outputs (`None`, when they were not found).
+        """
+        step_file = self._step_file(name, key)
+
+        try:
+            with open(step_file, "rb") as step_stream:
+                memoized = pickle.load(step_stream)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return False, None
+
+        if not all(
+            os.path.exists(path) and fingerprint_paths([path]) == fingerprint
+            for path, fingerprint in memoized["paths"].items()
+        ):
+            return False, None
+
+        return True, memoized["value"]
+
+    def store(self, name: str, key: str, value: Any, paths: Optional[List[str]] = None):
+        """Store the outputs of a step execution.
+
+        Args:
+            name (str): Step name.
+
+            key (str): Key of the execution (See `key`).
+
+            value (Any): Outputs of the step (must be serializable with `pickle`).
+
+            paths (Optional[List[str]]): Paths written by the step besides the paths contained in the `value` (e.g.,
+            the output directory of a step without outputs), also checked when the outputs are loaded.
+        """
+        _write_atomically(self._step_file(name, key), pickle.dumps({
+            "value": value,
+            "paths": {path: fingerprint_paths([path]) for path in _output_paths([value, *(paths or [])])}
+        }, PICKLE_PROTOCOL))
@@ -1,187 +1,394 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-import os
-from typing import List
-
-from .config import EnvironmentConfig
-from .environment import ContainerManager
-
-
-def lc8_generate_angles(input_dir: str, output_dir: str, scene_ids: List[str]) -> List[str]:
-    """Instantiate a docker container (`EnvironmentConfig.LANDSAT8_ANGLES_IMAGE`) to generate angles for Landsat-8 scenes using USGS Angle Creation Tool.
-
-    Args:
-        input_dir (str): Directory where the directories of the scenes to be
-        processed are located.
-
-        output_dir (str): Directory where the results will be saved.
-
-        scene_ids (List[str]): List with the scene_ids that should be processed.
-        The scene_ids defined must be equivalent to the scene directory names in
-        the `input_dir`.
-
-    Returns:
-        List: List with full path for each scene that had the angles generated.
-
-    Note:
-        The generated angle files are saved directly to the data directories
-        specified in `input_dir`. It is expected that this directory
-        organizational structure will follow the data standards provided
-        by the USGS.
-    """
-    for scene_id in scene_ids:
-        ContainerManager.run_container(
-            image=EnvironmentConfig.LANDSAT8_ANGLES_IMAGE,
-            auto_remove=True,
-            volumes={
-                input_dir: {
-                    "bind": "/mnt/input-dir",
-                    "mode": "rw"
-                },
-                output_dir: {
-                    "bind": "/mnt/output-dir",
-                    "mode": "rw"
-                }
-            },
-            command=scene_id
-        )
-
-    return [
-        os.path.join(output_dir, fs_object) for fs_object in os.listdir(output_dir)
-    ]
-
-
-def lc8_nbar(input_dir: str, angle_dir: str, output_dir: str, scene_ids: List[str]) -> List[str]:
-    """Instantiate a docker container (`EnvironmentConfig.NBAR_IMAGE`) to generate NBAR products for Landsat-8 scenes.
-
-    Args:
-        input_dir (str): Directory where the directories of the scenes to be
-        processed are located.
-
-        angle_dir (str): Path to directory containing angle bands.
-
-        output_dir (str): Directory where the results will be saved.
-
-        scene_ids (List[str]): List with the scene_ids that should be processed.
-        The scene_ids defined must be equivalent to the scene directory names in
-        the `input_dir`.
-
-    Returns:
-        List[str]: List with full path for each nbar scene generated.
-    """
-    for scene_id in scene_ids:
-        ContainerManager.run_container(
-            image=EnvironmentConfig.NBAR_IMAGE,
-            auto_remove=True,
-            volumes={
-                input_dir: {
-                    "bind": "/mnt/input-dir",
-                    "mode": "ro"
-                },
-                output_dir: {
-                    "bind": "/mnt/output-dir",
-                    "mode": "rw"
-                },
-                angle_dir: {
-                    "bind": "/mnt/angles-dir",
-                    "mode": "rw"
-                }
-            },
-            command=scene_id
-        )
-
-    return [
-        os.path.join(output_dir, fs_object) for fs_object in os.listdir(output_dir)
-    ]
-
-
-def s2_sen2cor_nbar(input_dir: str, output_dir: str, scene_ids: List[str]) -> List[str]:
-    """Instantiate a docker container (`EnvironmentConfig.NBAR_IMAGE`) to generate NBAR products for Sentinel-2 scenes (with Sen2Cor atmosphere correction).
-
-    Args:
-        input_dir (str): Directory where the directories of the scenes to be
-        processed are located.
-
-        output_dir (str): Directory where the results will be saved.
-
-        scene_ids (List[str]): List with the scene_ids that should be processed.
-        The scene_ids defined must be equivalent to the scene directory names in
-        the `input_dir`.
-
-    Returns:
-        List[str]: List with full path for each nbar (sen2cor) scene generated.
-    """
-    for scene_id in scene_ids:
-        ContainerManager.run_container(
-            image=EnvironmentConfig.NBAR_IMAGE,
-            auto_remove=True,
-            volumes={
-                input_dir: {
-                    "bind": "/mnt/input-dir",
-                    "mode": "rw"
-                },
-                output_dir: {
-                    "bind": "/mnt/output-dir",
-                    "mode": "rw"
-                }
-            },
-            command=scene_id
-        )
-
-    return [
-        os.path.join(output_dir, fs_object) for fs_object in os.listdir(output_dir)
-    ]
-
-
-def s2_lasrc_nbar(input_dir: str, output_dir: str, scene_ids: List[str]) -> List[str]:
-    """Instantiate a docker container (`EnvironmentConfig.NBAR_IMAGE`) to generate NBAR products for Sentinel-2 scenes (with LaSRC atmosphere correction).
-
-    Args:
-        input_dir (str): Directory where the directories of the scenes to be
-        processed are located.
-
-        output_dir (str): Directory where the results will be saved.
-
-        scene_ids (List[str]): List with the scene_ids that should be processed.
-        The scene_ids defined must be equivalent to the scene directory names in
-        the `input_dir`.
-
-    Returns:
-        List[str]: List with full path for each nbar (LaSRC) scene generated.
-    """
-    for scene_id in scene_ids:
-        ContainerManager.run_container(
-            image=EnvironmentConfig.NBAR_IMAGE,
-            auto_remove=True,
-            volumes={
-                input_dir: {
-                    "bind": "/mnt/input-dir",
-                    "mode": "rw"
-                },
-                output_dir: {
-                    "bind": "/mnt/output-dir",
-                    "mode": "rw"
-                }
-            },
-            command=scene_id
-        )
-
-    return [
-        os.path.join(output_dir, fs_object) for fs_object in os.listdir(output_dir)
-    ]
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import os
+from glob import glob
+from typing import Callable, Dict, List, Optional
+
+from .cache import SceneCache
+from .config import EnvironmentConfig
+from .execution import SceneStage, run_scene_containers, scene_outputs
+from .logs import SceneLogs
+from .manifest import SceneManifest
+from .telemetry import TelemetryRecorder
+
+
+def lc8_generate_angles_stage(input_dir: str, output_dir: str) -> SceneStage:
+    """Define the angle generation step (`EnvironmentConfig.LANDSAT8_ANGLES_IMAGE`) of Landsat-8 scenes.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+    Returns:
+        SceneStage: Processing step.
+
+    Note:
+        The angles depend only on the ANG and MTL metadata of the scenes, so they are cached across the executions
+        (See `research_processing.cache.SceneCache`), with a key generated from these files.
+    """
+    manifest = SceneManifest(
+        output_dir, EnvironmentConfig.LANDSAT8_ANGLES_IMAGE,
+        scene_inputs=lambda scene_id: [os.path.join(input_dir, scene_id)],
+        output_prefix=lambda scene_id: scene_id
+    )
+    cache = SceneCache(
+        "landsat8-angles", output_dir, EnvironmentConfig.LANDSAT8_ANGLES_IMAGE,
+        key_files=lambda scene_id: glob(os.path.join(input_dir, scene_id, "*_ANG.txt")) +
+        glob(os.path.join(input_dir, scene_id, "*_MTL.txt"))
+    )
+    scene_logs = SceneLogs(output_dir)
+    telemetry = TelemetryRecorder(output_dir, EnvironmentConfig.LANDSAT8_ANGLES_IMAGE)
+
+    def container(scene_id: str) -> Dict:
+        return dict(
+            image=EnvironmentConfig.LANDSAT8_ANGLES_IMAGE,
+            auto_remove=True,
+            volumes={
+                input_dir: {
+                    "bind": "/mnt/input-dir",
+                    "mode": "rw"
+                },
+                output_dir: {
+                    "bind": "/mnt/output-dir",
+                    "mode": "rw"
+                }
+            },
+            command=scene_id,
+            log_handler=scene_logs.scene(scene_id),
+            telemetry=telemetry.scene(scene_id)
+        )
+
+    return SceneStage("lc8-angles", container, manifest, cache=cache)
+
+
+def lc8_generate_angles(input_dir: str, output_dir: str, scene_ids: List[str], max_workers: int = 1,
+                        batch_size: int = 1, skip_processed: bool = True,
+                        continue_on_failure: bool = False,
+                        failure_callback: Optional[Callable[[str, BaseException], None]] = None,
+                        concurrent_steps: int = 1) -> Dict[str, List[str]]:
+    """Instantiate a docker container (`EnvironmentConfig.LANDSAT8_ANGLES_IMAGE`) to generate angles for Landsat-8 scenes using USGS Angle Creation Tool.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+        scene_ids (List[str]): List with the scene_ids that should be processed.
+        The scene_ids defined must be equivalent to the scene directory names in
+        the `input_dir`.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        batch_size (int): Maximum number of scenes processed by each container.
+
+        skip_processed (bool): Skip the scenes with a valid manifest.
+
+        continue_on_failure (bool): Keep processing the other scenes when a scene fails.
+
+        failure_callback (Optional[Callable[[str, BaseException], None]]): Called with each failed scene and error.
+
+        concurrent_steps (int): Number of processing steps executed concurrently, which share the CPUs (See
+        `research_processing.parallelism.plan_parallelism`).
+
+    Returns:
+        Dict[str, List[str]]: Full path of the outputs of each scene.
+
+    Note:
+        The generated angle files are saved directly to the data directories
+        specified in `input_dir`. It is expected that this directory
+        organizational structure will follow the data standards provided
+        by the USGS.
+    """
+    stage = lc8_generate_angles_stage(input_dir, output_dir)
+
+    results = run_scene_containers({
+        scene_id: stage.container(scene_id) for scene_id in scene_ids
+    }, max_workers=max_workers, batch_size=batch_size, manifest=stage.manifest, skip_processed=skip_processed,
+        continue_on_failure=continue_on_failure, cache=stage.cache, staged=stage.staged,
+        concurrent_steps=concurrent_steps)
+
+    return scene_outputs(results, failure_callback)
+
+
+def lc8_nbar_stage(input_dir: str, angle_dir: str, output_dir: str) -> SceneStage:
+    """Define the NBAR processing step (`EnvironmentConfig.NBAR_IMAGE`) of Landsat-8 scenes.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        angle_dir (str): Path to directory containing angle bands.
+
+        output_dir (str): Directory where the results will be saved.
+
+    Returns:
+        SceneStage: Processing step.
+    """
+    manifest = SceneManifest(
+        output_dir, EnvironmentConfig.NBAR_IMAGE,
+        scene_inputs=lambda scene_id: [
+            os.path.join(input_dir, scene_id), *glob(os.path.join(angle_dir, f"{scene_id}*"))
+        ],
+        output_prefix=lambda scene_id: scene_id
+    )
+    scene_logs = SceneLogs(output_dir)
+    telemetry = TelemetryRecorder(output_dir, EnvironmentConfig.NBAR_IMAGE)
+
+    def container(scene_id: str) -> Dict:
+        return dict(
+            image=EnvironmentConfig.NBAR_IMAGE,
+            auto_remove=True,
+            volumes={
+                input_dir: {
+                    "bind": "/mnt/input-dir",
+                    "mode": "ro"
+                },
+                output_dir: {
+                    "bind": "/mnt/output-dir",
+                    "mode": "rw"
+                },
+                angle_dir: {
+                    "bind": "/mnt/angles-dir",
+                    "mode": "rw"
+                }
+            },
+            command=scene_id,
+            log_handler=scene_logs.scene(scene_id),
+            telemetry=telemetry.scene(scene_id)
+        )
+
+    return SceneStage("lc8-nbar", container, manifest)
+
+
+def lc8_nbar(input_dir: str, angle_dir: str, output_dir: str, scene_ids: List[str], max_workers: int = 1,
+             batch_size: int = 1, skip_processed: bool = True,
+             continue_on_failure: bool = False,
+             failure_callback: Optional[Callable[[str, BaseException], None]] = None,
+             concurrent_steps: int = 1) -> Dict[str, List[str]]:
+    """Instantiate a docker container (`EnvironmentConfig.NBAR_IMAGE`) to generate NBAR products for Landsat-8 scenes.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        angle_dir (str): Path to directory containing angle bands.
+
+        output_dir (str): Directory where the results will be saved.
+
+        scene_ids (List[str]): List with the scene_ids that should be processed.
+        The scene_ids defined must be equivalent to the scene directory names in
+        the `input_dir`.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        batch_size (int): Maximum number of scenes processed by each container.
+
+        skip_processed (bool): Skip the scenes with a valid manifest.
+
+        continue_on_failure (bool): Keep processing the other scenes when a scene fails.
+
+        failure_callback (Optional[Callable[[str, BaseException], None]]): Called with each failed scene and error.
+
+        concurrent_steps (int): Number of processing steps executed concurrently, which share the CPUs (See
+        `research_processing.parallelism.plan_parallelism`).
+
+    Returns:
+        Dict[str, List[str]]: Full path of the outputs of each scene.
+    """
+    stage = lc8_nbar_stage(input_dir, angle_dir, output_dir)
+
+    results = run_scene_containers({
+        scene_id: stage.container(scene_id) for scene_id in scene_ids
+    }, max_workers=max_workers, batch_size=batch_size, manifest=stage.manifest, skip_processed=skip_processed,
+        continue_on_failure=continue_on_failure, staged=stage.staged, concurrent_steps=concurrent_steps)
+
+    return scene_outputs(results, failure_callback)
+
+
+def s2_sen2cor_nbar_stage(input_dir: str, output_dir: str) -> SceneStage:
+    """Define the NBAR processing step (`EnvironmentConfig.NBAR_IMAGE`) of Sentinel-2 scenes (with Sen2Cor atmosphere correction).
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+    Returns:
+        SceneStage: Processing step.
+    """
+    manifest = SceneManifest(
+        output_dir, EnvironmentConfig.NBAR_IMAGE,
+        scene_inputs=lambda scene_id: [os.path.join(input_dir, scene_id)],
+        output_prefix=lambda scene_id: "_".join(scene_id.replace(".SAFE", "").split("_")[:6])
+    )
+    scene_logs = SceneLogs(output_dir)
+    telemetry = TelemetryRecorder(output_dir, EnvironmentConfig.NBAR_IMAGE)
+
+    def container(scene_id: str) -> Dict:
+        return dict(
+            image=EnvironmentConfig.NBAR_IMAGE,
+            auto_remove=True,
+            volumes={
+                input_dir: {
+                    "bind": "/mnt/input-dir",
+                    "mode": "rw"
+                },
+                output_dir: {
+                    "bind": "/mnt/output-dir",
+                    "mode": "rw"
+                }
+            },
+            command=scene_id,
+            log_handler=scene_logs.scene(scene_id),
+            telemetry=telemetry.scene(scene_id)
+        )
+
+    return SceneStage("s2-sen2cor-nbar", container, manifest)
+
+
+def s2_sen2cor_nbar(input_dir: str, output_dir: str, scene_ids: List[str], max_workers: int = 1,
+                    batch_size: int = 1, skip_processed: bool = True,
+                    continue_on_failure: bool = False,
+                    failure_callback: Optional[Callable[[str, BaseException], None]] = None,
+                    concurrent_steps: int = 1) -> Dict[str, List[str]]:
+    """Instantiate a docker container (`EnvironmentConfig.NBAR_IMAGE`) to generate NBAR products for Sentinel-2 scenes (with Sen2Cor atmosphere correction).
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+        scene_ids (List[str]): List with the scene_ids that should be processed.
+        The scene_ids defined must be equivalent to the scene directory names in
+        the `input_dir`.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        batch_size (int): Maximum number of scenes processed by each container.
+
+        skip_processed (bool): Skip the scenes with a valid manifest.
+
+        continue_on_failure (bool): Keep processing the other scenes when a scene fails.
+
+        failure_callback (Optional[Callable[[str, BaseException], None]]): Called with each failed scene and error.
+
+        concurrent_steps (int): Number of processing steps executed concurrently, which share the CPUs (See
+        `research_processing.parallelism.plan_parallelism`).
+
+    Returns:
+        Dict[str, List[str]]: Full path of the outputs of each scene.
+    """
+    stage = s2_sen2cor_nbar_stage(input_dir, output_dir)
+
+    results = run_scene_containers({
+        scene_id: stage.container(scene_id) for scene_id in scene_ids
+    }, max_workers=max_workers, batch_size=batch_size, manifest=stage.manifest, skip_processed=skip_processed,
+        continue_on_failure=continue_on_failure, staged=stage.staged, concurrent_steps=concurrent_steps)
+
+    return scene_outputs(results, failure_callback)
+
+
+def s2_lasrc_nbar_stage(input_dir: str, output_dir: str) -> SceneStage:
+    """Define the NBAR processing step (`EnvironmentConfig.NBAR_IMAGE`) of Sentinel-2 scenes (with LaSRC atmosphere correction).
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+    Returns:
+        SceneStage: Processing step.
+    """
+    manifest = SceneManifest(
+        output_dir, EnvironmentConfig.NBAR_IMAGE,
+        scene_inputs=lambda scene_id: [os.path.join(input_dir, scene_id)],
+        output_prefix=lambda scene_id: scene_id.replace(".SAFE", "")
+    )
+    scene_logs = SceneLogs(output_dir)
+    telemetry = TelemetryRecorder(output_dir, EnvironmentConfig.NBAR_IMAGE)
+
+    def container(scene_id: str) -> Dict:
+        return dict(
+            image=EnvironmentConfig.NBAR_IMAGE,
+            auto_remove=True,
+            volumes={
+                input_dir: {
+                    "bind": "/mnt/input-dir",
+                    "mode": "rw"
+                },
+                output_dir: {
+                    "bind": "/mnt/output-dir",
+                    "mode": "rw"
+                }
+            },
+            command=scene_id,
+            log_handler=scene_logs.scene(scene_id),
+            telemetry=telemetry.scene(scene_id)
+        )
+
+    return SceneStage("s2-lasrc-nbar", container, manifest)
+
+
+def s2_lasrc_nbar(input_dir: str, output_dir: str, scene_ids: List[str], max_workers: int = 1,
+                  batch_size: int = 1, skip_processed: bool = True,
+                  continue_on_failure: bool = False,
+                  failure_callback: Optional[Callable[[str, BaseException], None]] = None,
+                  concurrent_steps: int = 1) -> Dict[str, List[str]]:
+    """Instantiate a docker container (`EnvironmentConfig.NBAR_IMAGE`) to generate NBAR products for Sentinel-2 scenes (with LaSRC atmosphere correction).
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+        scene_ids (List[str]): List with the scene_ids that should be processed.
+        The scene_ids defined must be equivalent to the scene directory names in
+        the `input_dir`.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        batch_size (int): Maximum number of scenes processed by each container.
+
+        skip_processed (bool): Skip the scenes with a valid manifest.
+
+        continue_on_failure (bool): Keep processing the other scenes when a scene fails.
+
+        failure_callback (Optional[Callable[[str, BaseException], None]]): Called with each failed scene and error.
+
+        concurrent_steps (int): Number of processing steps executed concurrently, which share the CPUs (See
+        `research_processing.parallelism.plan_parallelism`).
+
+    Returns:
+        Dict[str, List[str]]: Full path of the outputs of each scene.
+    """
+    stage = s2_lasrc_nbar_stage(input_dir, output_dir)
+
+    results = run_scene_containers({
+        scene_id: stage.container(scene_id) for scene_id in scene_ids
+    }, max_workers=max_workers, batch_size=batch_size, manifest=stage.manifest, skip_processed=skip_processed,
+        continue_on_failure=continue_on_failure, staged=stage.staged, concurrent_steps=concurrent_steps)
+
+    return scene_outputs(results, failure_callback)
@@ -0,0 +1,229 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import atexit
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+from .config import EnvironmentConfig
+
+# Environment variables that define the number of threads of the libraries used by the processors.
+THREAD_VARIABLES = ["OMP_NUM_THREADS", "GDAL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                    "NUMEXPR_NUM_THREADS"]
+
+PARALLELISM_MODES = ("containers", "threads", "auto")
+
+_sen2cor_gipp_files = {}
+_sen2cor_gipp_lock = threading.Lock()
+
+
+class ParallelismPlan:
+    """Number of containers executed concurrently and of threads of each container (See `plan_parallelism`).
+
+    Args:
+        containers (int): Maximum number of containers executed concurrently.
+
+        threads (Optional[int]): Number of threads of each container. `None` when the threads are not configured.
+    """
+
+    def __init__(self, containers: int, threads: Optional[int]):
+        self.containers = containers
+        self.threads = threads
+
+    def __repr__(self):
+        return f"ParallelismPlan(containers={self.containers}, threads={self.threads})"
+
+
+def _host_cpus() -> int:
+    """Number of CPUs available to the containers (`EnvironmentConfig.HOST_CPUS` or the CPUs of the host)."""
+    return max(1, int(float(EnvironmentConfig.HOST_CPUS or os.cpu_count() or 1)))
+
+
+def plan_parallelism(image: str, scenes: int, max_workers: int, cpus: Optional[int] = None,
+                     mode: Optional[str] = None, concurrent_steps: int = 1) -> ParallelismPlan:
+    """Choose between fewer containers with more threads and more single-threaded containers.
+
+    The modes are:
+
+        - `containers`: one thread per container and up to `max_workers` containers;
+        - `threads`: each container uses up to `EnvironmentConfig.MAX_THREADS` threads of the image, so fewer
+          containers are executed concurrently;
+        - `auto`: one container per scene (up to `max_workers` and to the number of CPUs), with the remaining CPUs
+          shared as threads. With many scenes, single-threaded containers are used (the scenes are independent, so
+          they scale better than the threads); with few scenes, the idle CPUs are used by the threads.
+
+    When the `EnvironmentConfig.THREADS` of the image is defined, it is used regardless of the mode. When neither
+    the threads nor the mode are defined, the threads are not configured (the processors use their defaults).
+
+    The CPUs are shared by the `concurrent_steps` (e.g., the per-scene solids of a pipeline, each one processing a
+    single scene), so each step plans its containers with its share of the CPUs.
+
+    Args:
+        image (str): Image of the containers.
+
+        scenes (int): Number of scenes to be processed.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        cpus (Optional[int]): Number of CPUs available. When `None`, the `EnvironmentConfig.HOST_CPUS` (or the
+        number of CPUs of the host) is used.
+
+        mode (Optional[str]): Parallelism mode. When `None`, the `EnvironmentConfig.PARALLELISM` is used.
+
+        concurrent_steps (int): Number of processing steps executed concurrently, which share the CPUs.
+
+    Returns:
+        ParallelismPlan: Number of containers and of threads of each container.
+
+    Raises:
+        ValueError: If the `mode` is not valid.
+    """
+    mode = mode or EnvironmentConfig.PARALLELISM
+
+    if mode is not None and mode not in PARALLELISM_MODES:
+        raise ValueError(f"Invalid parallelism mode `{mode}` (available modes: {', '.join(PARALLELISM_MODES)}).")
+
+    cpus = max(1, (cpus or _host_cpus()) // max(concurrent_steps, 1))
+    max_containers = max(1, min(max_workers, scenes))
+    max_threads = max(1, min(EnvironmentConfig.MAX_THREADS.get(image, 1), cpus))
+
+    threads = EnvironmentConfig.THREADS.get(image)
+
+    if threads is None:
+        if mode == "containers":
+            threads = 1
+
+        elif mode == "threads":
+            threads = max_threads
+
+        elif mode == "auto":
+            threads = max(1, min(max_threads, cpus // min(max_containers, cpus)))
+
+    # the multi-threaded containers are limited by the CPUs (the single-threaded ones, only by the `max_workers`)
+    containers = max(1, min(max_containers, cpus // threads)) if threads is not None and threads > 1 \
+        else max_containers
+
+    return ParallelismPlan(containers, threads)
+
+
+def _sen2cor_gipp(threads: int) -> Optional[str]:
+    """Create a copy of the Sen2Cor GIPP file (`EnvironmentConfig.SEN2COR_GIPP`) with the number of threads.
+
+    Returns:
+        Optional[str]: Path to the GIPP file (created once per number of threads and removed when the process
+        exits). `None` is returned when the `EnvironmentConfig.SEN2COR_GIPP` is not defined.
+    """
+    if not EnvironmentConfig.SEN2COR_GIPP:
+        return None
+
+    with _sen2cor_gipp_lock:
+        if threads not in _sen2cor_gipp_files:
+            with open(EnvironmentConfig.SEN2COR_GIPP) as gipp_stream:
+                gipp = re.sub(r"<Nr_Threads>.*?</Nr_Threads>", f"<Nr_Threads>{threads}</Nr_Threads>",
+                              gipp_stream.read())
+
+            gipp_dir = tempfile.mkdtemp(prefix="sen2cor-gipp-")
+            atexit.register(shutil.rmtree, gipp_dir, True)
+
+            gipp_file = os.path.join(gipp_dir, os.path.basename(EnvironmentConfig.SEN2COR_GIPP_BIND))
+            with open(gipp_file, "w") as gipp_stream:
+                gipp_stream.write(gipp)
+
+            _sen2cor_gipp_files[threads] = gipp_file
+
+        return _sen2cor_gipp_files[threads]
+
+
+def configure_threads(container_kwargs: Dict, threads: int) -> Dict:
+    """Define the number of threads of a container.
+
+    The threads are defined in the `THREAD_VARIABLES` environment variables (the variables explicitly defined in
+    the container are kept). When the threads exceed the CPUs of the resource profile of the image, the CPUs reserved
+    to the container (`cpus`) are raised to the number of threads, so the threads are accounted in the host budget
+    (See `research_processing.scheduler.ResourceScheduler`). The Sen2Cor containers also receive a GIPP file with
+    the number of threads (See `EnvironmentConfig.SEN2COR_GIPP`).
+
+    Args:
+        container_kwargs (Dict): Parameters of the `ContainerManager.run_container_async` method.
+
+        threads (int): Number of threads.
+
+    Returns:
+        Dict: Container parameters with the threads defined.
+    """
+    environment = container_kwargs.get("environment") or {}
+
+    if not isinstance(environment, dict):
+        environment = dict(variable.split("=", 1) for variable in environment)
+
+    container_kwargs = {
+        **container_kwargs,
+        "environment": {**{variable: str(threads) for variable in THREAD_VARIABLES}, **environment}
+    }
+
+    if threads > float(EnvironmentConfig.RESOURCE_PROFILES.get(container_kwargs["image"], {}).get("cpus", 0)):
+        container_kwargs.setdefault("cpus", threads)
+
+    gipp_file = _sen2cor_gipp(threads) if container_kwargs["image"] == EnvironmentConfig.SEN2COR_IMAGE else None
+
+    if gipp_file is not None:
+        container_kwargs["volumes"] = {
+            **container_kwargs.get("volumes", {}),
+            gipp_file: {
+                "bind": EnvironmentConfig.SEN2COR_GIPP_BIND,
+                "mode": "ro"
+            }
+        }
+    return container_kwargs
+
+
+def plan_containers(containers: Dict[str, Dict], max_workers: int,
+                    concurrent_steps: int = 1) -> Tuple[Dict[str, Dict], int]:
+    """Plan the parallelism of the containers of a processing step (See `plan_parallelism`).
+
+    Args:
+        containers (Dict[str, Dict]): Dictionary mapping each scene id to the parameters of the
+        `ContainerManager.run_container_async` method used to process it.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        concurrent_steps (int): Number of processing steps executed concurrently, which share the CPUs.
+
+    Returns:
+        Tuple[Dict[str, Dict], int]: Container parameters with the threads defined (See `configure_threads`) and the
+        maximum number of containers executed concurrently.
+    """
+    scenes_per_image = {}
+    for container_kwargs in containers.values():
+        scenes_per_image[container_kwargs["image"]] = scenes_per_image.get(container_kwargs["image"], 0) + 1
+
+    plans = {
+        image: plan_parallelism(image, scenes, max_workers, concurrent_steps=concurrent_steps)
+        for image, scenes in scenes_per_image.items()
+    }
+
+    planned_containers = {
+        scene_id: configure_threads(container_kwargs, plans[container_kwargs["image"]].threads)
+        if plans[container_kwargs["image"]].threads is not None else container_kwargs
+        for scene_id, container_kwargs in containers.items()
+    }
+    return planned_containers, min([plan.containers for plan in plans.values()], default=max_workers)
@@ -0,0 +1,108 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+from typing import List, Tuple
+
+# Criteria used to partition the scenes: acquisition month (`YYYY-MM`) or tile (Landsat-8 path/row, e.g.,
+# `223081`, and Sentinel-2 MGRS tile, e.g., `T22KFU`).
+PARTITION_KINDS = ("month", "tile")
+
+
+def scene_partition(scene_id: str, partition_by: str) -> str:
+    """Define the partition of a Landsat-8/OLI or Sentinel-2/MSI scene.
+
+    Args:
+        scene_id (str): Scene id (e.g., `LC08_L2SP_223081_20200714_20200912_02_T1` or
+        `S2B_MSIL1C_20171119T133209_N0206_R081_T22KFU_20171120T175608.SAFE`).
+
+        partition_by (str): Partition criteria (See `PARTITION_KINDS`).
+
+    Returns:
+        str: Partition of the scene (e.g., `2020-07` or `223081`).
+
+    Raises:
+        ValueError: If the `partition_by` is not valid or the scene id is not a Landsat-8/OLI or Sentinel-2/MSI id.
+    """
+    if partition_by not in PARTITION_KINDS:
+        raise ValueError(f"Invalid partition criteria `{partition_by}` (available: {', '.join(PARTITION_KINDS)}).")
+
+    scene_id_parts = scene_id.replace(".SAFE", "").split("_")
+
+    if scene_id.startswith("LC08") and len(scene_id_parts) >= 4:
+        acquisition_date, tile = scene_id_parts[3], scene_id_parts[2]
+
+    elif scene_id.startswith("S2") and len(scene_id_parts) >= 6:
+        acquisition_date, tile = scene_id_parts[2], scene_id_parts[5]
+
+    else:
+        raise ValueError(f"The scene id `{scene_id}` is not a Landsat-8/OLI or Sentinel-2/MSI scene id.")
+
+    return f"{acquisition_date[:4]}-{acquisition_date[4:6]}" if partition_by == "month" else tile
+
+
+def list_partitions(scene_ids: List[str], partition_by: str) -> List[str]:
+    """List the partitions of the scenes (sorted, without duplicates).
+
+    Args:
+        scene_ids (List[str]): Scene ids.
+
+        partition_by (str): Partition criteria (See `PARTITION_KINDS`).
+
+    Returns:
+        List[str]: Partitions of the scenes.
+    """
+    return sorted({scene_partition(scene_id, partition_by) for scene_id in scene_ids})
+
+
+def partition_scenes(scene_ids: List[str], partition_by: str, partition: str) -> List[str]:
+    """Select the scenes of a partition.
+
+    Args:
+        scene_ids (List[str]): Scene ids.
+
+        partition_by (str): Partition criteria (See `PARTITION_KINDS`).
+
+        partition (str): Partition (e.g., `2020-07`).
+
+    Returns:
+        List[str]: Scenes of the partition (in the input order).
+    """
+    return [scene_id for scene_id in scene_ids if scene_partition(scene_id, partition_by) == partition]
+
+
+def partition_pairs(pairs: List[Tuple[str, str]], partition_by: str, partition: str) -> List[Tuple[str, str]]:
+    """Select the pairs validated in the run of a partition.
+
+    A pair is validated in the run of the latest partition of its scenes (in the order of `list_partitions`), so
+    when the partitions are processed in order, the scenes of both sensors are already processed. For example, a
+    `2020-07-30` Landsat-8 scene paired with a `2020-08-01` Sentinel-2 scene is validated in the `2020-08` run, and
+    the Landsat-8/Sentinel-2 pairs are validated in the runs of the Sentinel-2 tiles (sorted after the path/rows).
+
+    Args:
+        pairs (List[Tuple[str, str]]): Pairs of scene ids (See `research_processing.validation.validation_funcs`).
+
+        partition_by (str): Partition criteria (See `PARTITION_KINDS`).
+
+        partition (str): Partition (e.g., `2020-07`).
+
+    Returns:
+        List[Tuple[str, str]]: Pairs of the partition (in the input order).
+    """
+    return [
+        pair for pair in pairs if max(scene_partition(scene_id, partition_by) for scene_id in pair) == partition
+    ]
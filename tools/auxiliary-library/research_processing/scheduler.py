@@ -0,0 +1,258 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Optional, Union
+
+_MEMORY_UNITS = {
+    "b": 1,
+    "k": 1024,
+    "m": 1024 ** 2,
+    "g": 1024 ** 3
+}
+
+
+def parse_memory(memory: Union[int, str]) -> int:
+    """Convert a memory size to bytes.
+
+    Args:
+        memory (Union[int, str]): Memory size in bytes or in the Docker format (e.g., `512m`, `8g`).
+
+    Returns:
+        int: Memory size in bytes.
+
+    Raises:
+        ValueError: If the memory size is not valid.
+    """
+    if isinstance(memory, int):
+        return memory
+
+    memory = memory.strip().lower()
+
+    if memory and memory[-1] in _MEMORY_UNITS:
+        return int(float(memory[:-1]) * _MEMORY_UNITS[memory[-1]])
+    return int(memory)
+
+
+def _wake_up(waiter: asyncio.Future):
+    """Wake up a coroutine waiting for resources (if it is still waiting)."""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class ResourceReservation:
+    """Resources reserved to a container.
+
+    Args:
+        cpus (float): Number of CPUs reserved.
+
+        memory (int): Memory reserved (in bytes).
+    """
+
+    def __init__(self, cpus: float, memory: int):
+        self.cpus = cpus
+        self.memory = memory
+
+    @classmethod
+    def from_profile(cls, profile: Dict) -> "ResourceReservation":
+        """Create a reservation from a resource profile (See `EnvironmentConfig.RESOURCE_PROFILES`)."""
+        return cls(float(profile.get("cpus", 0)), parse_memory(profile.get("memory", 0)))
+
+    @classmethod
+    def from_container(cls, profile: Dict, kwargs: Dict) -> "ResourceReservation":
+        """Create the reservation of a container (the resources defined in its parameters override the profile).
+
+        Args:
+            profile (Dict): Resource profile of the container image (See `EnvironmentConfig.RESOURCE_PROFILES`).
+
+            kwargs (Dict): Container parameters, with the optional `cpus` (CPUs reserved, without limiting the
+            container), `nano_cpus` and `mem_limit` limits.
+
+        Returns:
+            ResourceReservation: Resources reserved to the container.
+        """
+        reservation = cls.from_profile(profile)
+
+        if kwargs.get("cpus"):
+            reservation.cpus = float(kwargs["cpus"])
+
+        if kwargs.get("nano_cpus"):
+            reservation.cpus = kwargs["nano_cpus"] / 1e9
+
+        if kwargs.get("mem_limit"):
+            reservation.memory = parse_memory(kwargs["mem_limit"])
+        return reservation
+
+    def container_limits(self, limit_cpus: bool = False) -> Dict:
+        """Define the `docker.DockerClient.containers.create` parameters that limit the container resources.
+
+        Args:
+            limit_cpus (bool): Flag indicating if the CPUs of the reservation are also a limit of the container. By
+            default, the CPUs are only used in the admission of the containers (See `ResourceScheduler`).
+
+        Returns:
+            Dict: Parameters `nano_cpus` and `mem_limit` (only the limits defined in the reservation are returned).
+        """
+        limits = {}
+
+        if limit_cpus and self.cpus:
+            limits["nano_cpus"] = int(self.cpus * 1e9)
+
+        if self.memory:
+            limits["mem_limit"] = self.memory
+        return limits
+
+    def __repr__(self):
+        return f"ResourceReservation(cpus={self.cpus}, memory={self.memory})"
+
+
+class ResourceScheduler:
+    """Admission control of containers based on a CPU and memory budget.
+
+    Before a container is started, its resources are reserved in the scheduler. The reservation is only granted when
+    it fits in the remaining budget, otherwise the caller waits until the resources of other containers are
+    released. This way, the containers are packed on the host without exceeding the available resources (e.g., several
+    `Sen2Cor` containers running at the same time and exhausting the host memory).
+
+    Args:
+        cpus (Optional[float]): Number of CPUs available to the containers. `None` disables the CPU accounting.
+
+        memory (Optional[int]): Memory (in bytes) available to the containers. `None` disables the memory accounting.
+
+    Note:
+        A reservation larger than the whole budget is granted only when no other container is running, so it is
+        executed alone instead of waiting forever.
+
+    Note:
+        The scheduler can be used by threads (`reserve`) and by coroutines (`reserve_async`) at the same time. The
+        coroutines waiting for resources do not block the event loop, so a single loop can wait for the
+        reservations of many containers.
+    """
+
+    def __init__(self, cpus: Optional[float] = None, memory: Optional[int] = None):
+        self.cpus = cpus
+        self.memory = memory
+
+        self._used_cpus = 0.0
+        self._used_memory = 0
+        self._running = 0
+        self._condition = threading.Condition()
+        self._async_waiters = []
+
+    def _fits(self, reservation: ResourceReservation) -> bool:
+        """Check if a reservation fits in the remaining budget."""
+        if self._running == 0:
+            return True
+
+        if self.cpus is not None and self._used_cpus + reservation.cpus > self.cpus:
+            return False
+
+        if self.memory is not None and self._used_memory + reservation.memory > self.memory:
+            return False
+        return True
+
+    def acquire(self, reservation: ResourceReservation):
+        """Reserve resources, waiting until the reservation fits in the budget.
+
+        Args:
+            reservation (ResourceReservation): Resources to be reserved.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._fits(reservation))
+            self._grant(reservation)
+
+    async def acquire_async(self, reservation: ResourceReservation):
+        """Reserve resources, waiting (without blocking the event loop) until the reservation fits in the budget.
+
+        Args:
+            reservation (ResourceReservation): Resources to be reserved.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            with self._condition:
+                if self._fits(reservation):
+                    self._grant(reservation)
+                    return
+
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+
+            try:
+                await waiter
+            finally:
+                with self._condition:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+
+    def _grant(self, reservation: ResourceReservation):
+        """Account a reservation in the used resources."""
+        self._used_cpus += reservation.cpus
+        self._used_memory += reservation.memory
+        self._running += 1
+
+    def release(self, reservation: ResourceReservation):
+        """Release resources reserved with `acquire`.
+
+        Args:
+            reservation (ResourceReservation): Resources to be released.
+        """
+        with self._condition:
+            self._used_cpus -= reservation.cpus
+            self._used_memory -= reservation.memory
+            self._running -= 1
+
+            self._condition.notify_all()
+
+            for loop, waiter in self._async_waiters:
+                loop.call_soon_threadsafe(_wake_up, waiter)
+            self._async_waiters = []
+
+    @contextmanager
+    def reserve(self, reservation: ResourceReservation):
+        """Context manager that holds a reservation while the block is executed.
+
+        Args:
+            reservation (ResourceReservation): Resources to be reserved.
+        """
+        self.acquire(reservation)
+        try:
+            yield reservation
+        finally:
+            self.release(reservation)
+
+    @asynccontextmanager
+    async def reserve_async(self, reservation: ResourceReservation):
+        """Asynchronous context manager that holds a reservation while the block is executed.
+
+        Args:
+            reservation (ResourceReservation): Resources to be reserved.
+        """
+        await self.acquire_async(reservation)
+        try:
+            yield reservation
+        finally:
+            self.release(reservation)
+
+    @property
+    def usage(self) -> Dict:
+        """Dict: Resources currently reserved (`cpus`, `memory` and number of `containers`)."""
+        with self._condition:
+            return {"cpus": self._used_cpus, "memory": self._used_memory, "containers": self._running}
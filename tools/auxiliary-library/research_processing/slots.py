@@ -0,0 +1,165 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import fcntl
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Union
+
+from .scheduler import parse_memory
+
+
+def host_memory() -> int:
+    """Physical memory of the host (in bytes)."""
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def memory_slots(memory: Union[int, str], unit: Union[int, str]) -> int:
+    """Define how many slots of a memory budget are held by a task.
+
+    Args:
+        memory (Union[int, str]): Memory used by the task, in bytes or in the Docker format (e.g., `8g`).
+
+        unit (Union[int, str]): Memory of each slot, in bytes or in the Docker format.
+
+    Returns:
+        int: Number of slots (at least 1).
+    """
+    unit = max(parse_memory(unit), 1)
+
+    return max(1, -(-parse_memory(memory) // unit))
+
+
+def slots_for_memory(memory: Union[int, str], total_memory: Optional[int] = None) -> int:
+    """Define how many tasks fit in the host memory (and in the host CPUs).
+
+    Args:
+        memory (Union[int, str]): Memory used by each task, in bytes or in the Docker format (e.g., `8g`).
+
+        total_memory (Optional[int]): Memory available (in bytes). When `None`, the physical memory of the host is used.
+
+    Returns:
+        int: Number of tasks (at least 1).
+    """
+    total_memory = total_memory or host_memory()
+
+    return max(1, min(total_memory // max(parse_memory(memory), 1), os.cpu_count() or 1))
+
+
+class ProcessSlots:
+    """Slots shared by the processes of a host, used to limit the tasks of a kind executed concurrently.
+
+    Each slot is a lock file (`<lock_dir>/<name>.<slot>.lock`) held with an exclusive `flock` while the task is
+    executed, so the limit is shared by independent processes (e.g., the solids of a multiprocess pipeline
+    execution). The locks are released by the operating system when a process exits, so the slots of a process that
+    crashed are not lost.
+
+    Args:
+        lock_dir (str): Directory of the lock files.
+
+        name (str): Name of the kind of task (e.g., `validation`).
+
+        slots (int): Number of slots (e.g., the maximum number of tasks executed concurrently, or the units of a
+        memory budget shared by the tasks).
+
+        poll_interval (float): Interval (in seconds) between the attempts to acquire a slot.
+
+    Note:
+        The slots use `fcntl` locks, so they are only available in Unix systems.
+    """
+
+    def __init__(self, lock_dir: str, name: str, slots: int, poll_interval: float = 1.0):
+        if slots < 1:
+            raise ValueError("The `slots` must be greater than or equal to 1.")
+
+        self.lock_dir = lock_dir
+        self.name = name
+        self.slots = slots
+        self.poll_interval = poll_interval
+
+        os.makedirs(lock_dir, exist_ok=True)
+
+    def _lock_file(self, slot: int) -> str:
+        """Path to the lock file of a slot."""
+        return os.path.join(self.lock_dir, f"{self.name}.{slot}.lock")
+
+    def _try_acquire(self, count: int) -> Optional[List]:
+        """Lock `count` free slots, without waiting.
+
+        Returns:
+            Optional[List]: Lock streams of the slots held, or `None` when there are not enough free slots.
+        """
+        lock_streams = []
+
+        for slot in range(self.slots):
+            lock_stream = open(self._lock_file(slot), "a")
+
+            try:
+                fcntl.flock(lock_stream, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_stream.close()
+                continue
+
+            lock_streams.append(lock_stream)
+            if len(lock_streams) == count:
+                return lock_streams
+
+        self._release(lock_streams)
+        return None
+
+    @staticmethod
+    def _release(lock_streams: List):
+        """Release the slots held."""
+        for lock_stream in lock_streams:
+            fcntl.flock(lock_stream, fcntl.LOCK_UN)
+            lock_stream.close()
+
+    @contextmanager
+    def acquire(self, count: int = 1) -> Iterator[int]:
+        """Context manager that holds slots while the block is executed (waiting until they are free).
+
+        The slots of a task are locked all at once (under the `<lock_dir>/<name>.lock` lock), so the tasks that
+        hold several slots do not wait for each other while each one holds part of them.
+
+        Args:
+            count (int): Number of slots held by the task (limited to the number of slots, so a task larger than the
+            limit is executed alone).
+
+        Yields:
+            int: Number of slots held.
+        """
+        count = max(1, min(count, self.slots))
+
+        while True:
+            with open(os.path.join(self.lock_dir, f"{self.name}.lock"), "a") as guard_stream:
+                fcntl.flock(guard_stream, fcntl.LOCK_EX)
+                lock_streams = self._try_acquire(count)
+
+            if lock_streams is not None:
+                break
+
+            time.sleep(self.poll_interval)
+
+        try:
+            yield count
+        finally:
+            self._release(lock_streams)
+
+    def __repr__(self):
+        return f"ProcessSlots(name={self.name!r}, slots={self.slots})"
@@ -0,0 +1,534 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import atexit
+import errno
+import fcntl
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+
+from .config import EnvironmentConfig
+from .manifest import fingerprint_paths
+from .scheduler import parse_memory
+
+
+def _path_size(path: str) -> int:
+    """Size (in bytes) of a file or of the files of a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+
+
+def _remove_path(path: str):
+    """Remove a file or directory (if it exists)."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def move_atomic(source: str, target: str):
+    """Move a file or directory to the `target` path, replacing it atomically.
+
+    The source is first moved (or copied, when it is in another file system) to a temporary path alongside the
+    target, so the target is only replaced when its content is complete.
+
+    Args:
+        source (str): File or directory to be moved.
+
+        target (str): Destination path.
+    """
+    temporary = os.path.join(os.path.dirname(target), f".{os.path.basename(target)}.{uuid.uuid4().hex}.tmp")
+
+    try:
+        os.rename(source, temporary)
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+
+        # different file systems: the content is copied before the rename
+        try:
+            if os.path.isdir(source):
+                shutil.copytree(source, temporary, symlinks=True)
+            else:
+                shutil.copy2(source, temporary)
+        except BaseException:
+            _remove_path(temporary)
+            raise
+
+        _remove_path(source)
+
+    if os.path.isdir(target) and not os.path.islink(target):
+        # directories can't be replaced, so the previous one is renamed before it is removed
+        replaced = f"{temporary}.old"
+
+        os.rename(target, replaced)
+        os.rename(temporary, target)
+        shutil.rmtree(replaced, ignore_errors=True)
+    else:
+        os.replace(temporary, target)
+
+
+class StagedScene:
+    """Scene staged in the scratch directory (See `ScratchSpace.stage_scene`).
+
+    Args:
+        scratch (ScratchSpace): Scratch space where the scene was staged.
+
+        container_kwargs (Dict): Container parameters, with the volumes pointing to the scratch directory.
+
+        input_source (Optional[str]): Input staged (`None` when the input is read from its original directory).
+
+        scratch_output_dir (Optional[str]): Scratch directory where the container writes the outputs.
+
+        output_dir (Optional[str]): Directory where the outputs are moved to.
+    """
+
+    def __init__(self, scratch: "ScratchSpace", container_kwargs: Dict, input_source: Optional[str],
+                 scratch_output_dir: Optional[str], output_dir: Optional[str]):
+        self.scratch = scratch
+        self.container_kwargs = container_kwargs
+        self.input_source = input_source
+        self.scratch_output_dir = scratch_output_dir
+        self.output_dir = output_dir
+
+    def commit(self) -> List[str]:
+        """Move the outputs written in the scratch directory to the output directory.
+
+        Returns:
+            List[str]: Full path to each output moved.
+        """
+        if self.scratch_output_dir is None:
+            return []
+
+        outputs = []
+        for name in sorted(os.listdir(self.scratch_output_dir)):
+            output = os.path.join(self.output_dir, name)
+
+            move_atomic(os.path.join(self.scratch_output_dir, name), output)
+            outputs.append(output)
+
+        return outputs
+
+    def clear_outputs(self):
+        """Remove the outputs written in the scratch directory (e.g., partial outputs of a failed execution)."""
+        if self.scratch_output_dir is not None:
+            for name in os.listdir(self.scratch_output_dir):
+                _remove_path(os.path.join(self.scratch_output_dir, name))
+
+    def close(self):
+        """Release the staged input and remove the scratch outputs (not committed)."""
+        if self.input_source is not None:
+            self.scratch.release(self.input_source)
+
+        if self.scratch_output_dir is not None:
+            self.scratch.remove_outputs(self.scratch_output_dir)
+
+
+class ScratchSpace:
+    """Fast local directory used to stage the inputs and the outputs of the containers.
+
+    The inputs (e.g., `.SAFE` directories in a network storage) are copied to the scratch directory before the
+    container execution and the containers write the outputs in the scratch directory. When a scene is processed with
+    success, its outputs are moved atomically to the output directory (See `move_atomic`).
+
+    The scratch space is shared by all the processes that use the same `scratch_dir` (e.g., the solids of a
+    multiprocess pipeline execution). The staged inputs and the outputs are registered in an index
+    (`<scratch_dir>/research-processing/index.json`, updated under an exclusive `flock`), so the byte `budget` is
+    accounted once for all the processes and a staged input is reused by the steps of any process.
+
+    The staged inputs are kept while they fit in the `budget`, so they can be reused by the next steps. When a new
+    input does not fit, the least recently used inputs (not in use by a container) are evicted. If it still does not
+    fit, the input is not staged and the container reads it from its original directory. A staged input is copied
+    again when the original input changes. The outputs are accounted until they are committed (or removed), by their
+    size in the scratch directory, and at least by the size of the scene input while the container is writing them.
+
+    The staged inputs in use are held with a shared `flock` (and the outputs with an exclusive one), so the locks of
+    a process that crashed are released by the operating system and its inputs and outputs are evicted.
+
+    Args:
+        scratch_dir (str): Scratch directory.
+
+        budget (Union[int, str]): Maximum size of the staged inputs and outputs, in bytes or in the Docker format
+        (e.g., `200g`).
+    """
+
+    # Volume bindings of the container inputs and outputs (the same in all the processing images).
+    INPUT_BIND = "/mnt/input-dir"
+    OUTPUT_BIND = "/mnt/output-dir"
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, scratch_dir: str, budget: Union[int, str]):
+        self.budget = parse_memory(budget)
+
+        self.scratch_dir = os.path.join(scratch_dir, "research-processing")
+        self.inputs_dir = os.path.join(self.scratch_dir, "inputs")
+        self.outputs_dir = os.path.join(self.scratch_dir, "outputs")
+
+        self._index_file = os.path.join(self.scratch_dir, "index.json")
+        self._index_lock_file = os.path.join(self.scratch_dir, "index.lock")
+
+        os.makedirs(self.inputs_dir, exist_ok=True)
+        os.makedirs(self.outputs_dir, exist_ok=True)
+
+        # locks held by this process: the pins of the staged inputs in use and the outputs not committed
+        self._pins = {}
+        self._outputs = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> Optional["ScratchSpace"]:
+        """Get the scratch space defined by `EnvironmentConfig.SCRATCH_DIR` and `EnvironmentConfig.SCRATCH_BUDGET`.
+
+        Returns:
+            Optional[ScratchSpace]: Shared scratch space. `None` is returned when the staging is disabled.
+        """
+        with cls._default_lock:
+            if cls._default is None and EnvironmentConfig.SCRATCH_DIR:
+                cls._default = cls(EnvironmentConfig.SCRATCH_DIR, EnvironmentConfig.SCRATCH_BUDGET)
+
+                atexit.register(cls._default.close)
+
+            return cls._default
+
+    @contextmanager
+    def _index(self) -> Iterator[Dict]:
+        """Context manager that loads the index under an exclusive lock, and saves it when the block is executed.
+
+        Yields:
+            Dict: Index, with the `inputs` (source -> `name`, `size`, `fingerprint`, `last_used` and `ready`) and the
+            `outputs` (name -> estimated size).
+        """
+        with open(self._index_lock_file, "a") as lock_stream:
+            fcntl.flock(lock_stream, fcntl.LOCK_EX)
+
+            try:
+                with open(self._index_file) as index_stream:
+                    index = json.load(index_stream)
+            except (OSError, ValueError):
+                index = {"inputs": {}, "outputs": {}}
+
+            yield index
+
+            temporary = f"{self._index_file}.{os.getpid()}.tmp"
+            with open(temporary, "w") as index_stream:
+                json.dump(index, index_stream)
+
+            os.replace(temporary, self._index_file)
+
+    @staticmethod
+    def _is_free(lock_file: str) -> bool:
+        """Check if a lock file is not held by any process (so its input or output is not in use)."""
+        try:
+            with open(lock_file, "a") as lock_stream:
+                fcntl.flock(lock_stream, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+        except BlockingIOError:
+            return False
+
+    def _pin_file(self, entry: Dict) -> str:
+        """Path to the pin (lock file) of a staged input."""
+        return os.path.join(self.inputs_dir, f"{entry['name']}.pin")
+
+    def _remove_input(self, index: Dict, source: str):
+        """Remove a staged input (not in use)."""
+        entry = index["inputs"].pop(source)
+
+        _remove_path(os.path.join(self.inputs_dir, entry["name"]))
+        _remove_path(self._pin_file(entry))
+
+    def _used(self, index: Dict) -> int:
+        """Size (in bytes) of the staged inputs and of the outputs not committed (removing the orphan outputs)."""
+        used = sum(entry["size"] for entry in index["inputs"].values())
+
+        for name, estimate in list(index["outputs"].items()):
+            output_dir = os.path.join(self.outputs_dir, name)
+
+            if self._is_free(f"{output_dir}.lock"):
+                # outputs of a process that crashed
+                del index["outputs"][name]
+
+                _remove_path(output_dir)
+                _remove_path(f"{output_dir}.lock")
+                continue
+
+            used += max(estimate, _path_size(output_dir) if os.path.isdir(output_dir) else 0)
+        return used
+
+    def _evict(self, index: Dict, size: int) -> bool:
+        """Evict the least recently used inputs (not in use) until `size` bytes fit in the budget."""
+        used = self._used(index)
+
+        for source, entry in sorted(index["inputs"].items(), key=lambda item: item[1]["last_used"]):
+            if used + size <= self.budget:
+                break
+
+            # the inputs being copied are also pinned, so only the complete (or orphan) ones are evicted
+            if self._is_free(self._pin_file(entry)):
+                self._remove_input(index, source)
+                used -= entry["size"]
+
+        return used + size <= self.budget
+
+    @property
+    def usage(self) -> int:
+        """int: Size (in bytes) of the staged inputs and of the outputs not committed, in all the processes."""
+        with self._index() as index:
+            return self._used(index)
+
+    def _pin(self, source: str, pin_stream):
+        """Register the pin of a staged input held by this process."""
+        with self._lock:
+            self._pins.setdefault(source, []).append(pin_stream)
+
+    def stage(self, source: str) -> Optional[str]:
+        """Copy an input to the scratch directory.
+
+        The staged input is in use until it is released (See `release`), so it is not evicted while the container
+        is running.
+
+        Args:
+            source (str): File or directory to be staged.
+
+        Returns:
+            Optional[str]: Path to the staged copy of the input, which has the same name of the source. `None` is
+            returned when the input does not fit in the budget.
+        """
+        source = os.path.abspath(source)
+        fingerprint = fingerprint_paths([source])
+
+        with self._index() as index:
+            entry = index["inputs"].get(source)
+
+            if entry is not None and entry["fingerprint"] != fingerprint:
+                # the input changed: the staged copy is replaced (or not used, if a container is still using it)
+                if not self._is_free(self._pin_file(entry)):
+                    return None
+
+                self._remove_input(index, source)
+                entry = None
+
+            copying = entry is None
+
+            if copying:
+                size = _path_size(source)
+
+                if not self._evict(index, size):
+                    return None
+
+                entry = index["inputs"][source] = {
+                    "name": uuid.uuid4().hex, "size": size, "fingerprint": fingerprint, "ready": False
+                }
+
+            entry["last_used"] = time.time()
+
+            # the copy is pinned with an exclusive lock, so the other containers wait until it is complete
+            pin_stream = open(self._pin_file(entry), "a")
+            if copying:
+                fcntl.flock(pin_stream, fcntl.LOCK_EX)
+
+        staged_path = os.path.join(self.inputs_dir, entry["name"], os.path.basename(source))
+
+        if not copying:
+            # the input is staged (or being copied by another container)
+            fcntl.flock(pin_stream, fcntl.LOCK_SH)
+
+            with self._index() as index:
+                ready = index["inputs"].get(source, {}).get("name") == entry["name"] and \
+                    index["inputs"][source]["ready"]
+
+            if not ready:
+                pin_stream.close()
+                return None
+
+            self._pin(source, pin_stream)
+            return staged_path
+
+        try:
+            self._copy(source, staged_path)
+        except OSError:
+            # e.g., no space left in the scratch directory: the input is read from the original directory
+            with self._index() as index:
+                if source in index["inputs"]:
+                    self._remove_input(index, source)
+
+            pin_stream.close()
+            return None
+
+        with self._index() as index:
+            index["inputs"][source]["ready"] = True
+
+            # the lock is shared with the other containers (under the index lock, so the input is not evicted)
+            fcntl.flock(pin_stream, fcntl.LOCK_SH)
+
+        self._pin(source, pin_stream)
+        return staged_path
+
+    @staticmethod
+    def _copy(source: str, staged_path: str):
+        """Copy an input to its scratch directory (through a temporary directory, renamed when complete)."""
+        staged_dir = os.path.dirname(staged_path)
+        temporary = f"{staged_dir}.tmp"
+
+        try:
+            os.makedirs(temporary)
+
+            if os.path.isdir(source):
+                shutil.copytree(source, os.path.join(temporary, os.path.basename(staged_path)), symlinks=True)
+            else:
+                shutil.copy2(source, temporary)
+
+            os.rename(temporary, staged_dir)
+        except BaseException:
+            shutil.rmtree(temporary, ignore_errors=True)
+            raise
+
+    def release(self, source: str):
+        """Release an input staged with `stage`.
+
+        Args:
+            source (str): Staged file or directory.
+        """
+        with self._lock:
+            pin_streams = self._pins.get(os.path.abspath(source))
+            pin_stream = pin_streams.pop() if pin_streams else None
+
+        if pin_stream is not None:
+            pin_stream.close()
+
+    def _create_outputs(self, estimate: int) -> Optional[str]:
+        """Create a scratch output directory, accounted in the budget by at least `estimate` bytes.
+
+        Returns:
+            Optional[str]: Scratch output directory. `None` is returned when the outputs do not fit in the budget.
+        """
+        name = uuid.uuid4().hex
+        output_dir = os.path.join(self.outputs_dir, name)
+
+        lock_stream = open(f"{output_dir}.lock", "a")
+        fcntl.flock(lock_stream, fcntl.LOCK_EX)
+
+        with self._index() as index:
+            fits = self._evict(index, estimate)
+
+            if fits:
+                index["outputs"][name] = estimate
+
+        if not fits:
+            _remove_path(f"{output_dir}.lock")
+            lock_stream.close()
+            return None
+
+        os.makedirs(output_dir)
+
+        with self._lock:
+            self._outputs[output_dir] = lock_stream
+        return output_dir
+
+    def remove_outputs(self, output_dir: str):
+        """Remove a scratch output directory (with the outputs not committed), so it is no longer accounted.
+
+        Args:
+            output_dir (str): Scratch output directory (See `stage_scene`).
+        """
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+        with self._index() as index:
+            index["outputs"].pop(os.path.basename(output_dir), None)
+
+        with self._lock:
+            lock_stream = self._outputs.pop(output_dir, None)
+
+        if lock_stream is not None:
+            _remove_path(f"{output_dir}.lock")
+            lock_stream.close()
+
+    def stage_scene(self, scene_id: str, container_kwargs: Dict) -> StagedScene:
+        """Stage the input and the outputs of the container that processes a scene.
+
+        The scene input (`<input dir>/<scene_id>`, mounted in `INPUT_BIND`) is staged and the output directory
+        (mounted in `OUTPUT_BIND`) is replaced by an empty scratch directory, when they fit in the budget.
+
+        Args:
+            scene_id (str): Scene id.
+
+            container_kwargs (Dict): Parameters of the `ContainerManager.run_container_async` method used to process
+            the scene.
+
+        Returns:
+            StagedScene: Staged scene, with the container parameters that must be used.
+        """
+        input_source, staged_path, scratch_output_dir, output_dir = None, None, None, None
+        volumes = container_kwargs.get("volumes", {})
+
+        input_dir, scene_output_dir = [
+            next((host_path for host_path, volume in volumes.items() if volume["bind"] == bind), None)
+            for bind in (self.INPUT_BIND, self.OUTPUT_BIND)
+        ]
+        scene_input = os.path.join(input_dir, scene_id) if input_dir is not None else None
+
+        if scene_input is not None and not os.path.exists(scene_input):
+            scene_input = None
+
+        # the outputs are reserved first, estimated with the size of the scene input until they are written (the
+        # outputs that do not fit in the budget are written directly in the output directory)
+        if scene_output_dir is not None:
+            scratch_output_dir = self._create_outputs(_path_size(scene_input) if scene_input is not None else 0)
+            output_dir = scene_output_dir if scratch_output_dir is not None else None
+
+        if scene_input is not None:
+            staged_path = self.stage(scene_input)
+            input_source = scene_input if staged_path is not None else None
+
+        staged_volumes = {}
+        for host_path, volume in volumes.items():
+            if host_path == input_dir and staged_path is not None:
+                host_path = os.path.dirname(staged_path)
+
+            elif host_path == scene_output_dir and scratch_output_dir is not None:
+                host_path = scratch_output_dir
+
+            staged_volumes[host_path] = volume
+
+        return StagedScene(self, {**container_kwargs, "volumes": staged_volumes}, input_source, scratch_output_dir,
+                           output_dir)
+
+    def close(self):
+        """Release the inputs and remove the outputs held by this process (the staged inputs are kept for the other
+        processes)."""
+        with self._lock:
+            sources = [source for source, pin_streams in self._pins.items() for _ in pin_streams]
+            output_dirs = list(self._outputs)
+
+        for source in sources:
+            self.release(source)
+
+        for output_dir in output_dirs:
+            self.remove_outputs(output_dir)
@@ -1,115 +1,277 @@
-#
-# This file is part of Brazil Data Cube compendium-harmonization.
-# Copyright (C) 2022 INPE.
-#
-# This program is free software: you can redistribute it and/or modify
-# it under the terms of the GNU General Public License as published by
-# the Free Software Foundation, either version 3 of the License, or
-# (at your option) any later version.
-#
-# This program is distributed in the hope that it will be useful,
-# but WITHOUT ANY WARRANTY; without even the implied warranty of
-# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
-# GNU General Public License for more details.
-#
-# You should have received a copy of the GNU General Public License
-# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
-#
-
-import os
-from typing import List
-
-from .config import EnvironmentConfig
-from .environment import ContainerManager
-
-
-def sen2cor(input_dir: str, output_dir: str, scene_ids: List[str]) -> List:
-    """Instantiate a docker container (`EnvironmentConfig.SEN2COR_IMAGE`) to generate Surface Reflectance products (Sen2cor atmosphere correction) for Sentinel-2 scenes.
-
-    Args:
-        input_dir (str): Directory where the directories of the scenes to be
-        processed are located.
-
-        output_dir (str): Directory where the results will be saved.
-
-        scene_ids (List[str]): List with the scene_ids that should be processed.
-        The scene_ids defined must be equivalent to the scene directory names in
-        the `input_dir`.
-
-    Returns:
-        List: List with full path to each output scene.
-    """
-    for scene_id in scene_ids:
-        ContainerManager.run_container(
-            image=EnvironmentConfig.SEN2COR_IMAGE,
-            auto_remove=True,
-            volumes={
-                input_dir: {
-                    "bind": "/mnt/input-dir",
-                    "mode": "rw"
-                },
-                output_dir: {
-                    "bind": "/mnt/output-dir",
-                    "mode": "rw"
-                }
-            },
-            command=scene_id
-        )
-
-    return [
-        os.path.join(output_dir, fs_object) for fs_object in os.listdir(output_dir)
-    ]
-
-
-def lasrc(input_dir: str, output_dir: str, scene_ids: List[str],
-          aux_data_dir: str) -> List:
-    """Instantiate a docker container (`EnvironmentConfig.LASRC_IMAGE`) to generate Surface Reflectance (LaSRC atmosphere correction) products for Sentinel-2 scenes.
-
-    Args:
-        input_dir (str): Directory where the directories of the scenes to be
-        processed are located.
-
-        output_dir (str): Directory where the results will be saved.
-
-        scene_ids (List[str]): List with the scene_ids that should be processed.
-        The scene_ids defined must be equivalent to the scene directory names in
-        the `input_dir`.
-
-        aux_data_dir (str):Path to the directory where all the LaSRC auxiliary
-        data directory `L8` is available.
-
-    Returns:
-        List: List with full path to each output scene.
-
-    See:
-        LaSRC Auxiliary Data: https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/
-
-    Note:
-        The auxiliary data directory should contain all the content that is in
-        the `L8` directory (https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/L8/)
-        provided by the USGS.
-    """
-    for scene_id in scene_ids:
-        ContainerManager.run_container(
-            image=EnvironmentConfig.LASRC_IMAGE,
-            auto_remove=True,
-            volumes={
-                input_dir: {
-                    "bind": "/mnt/input-dir",
-                    "mode": "rw"
-                },
-                output_dir: {
-                    "bind": "/mnt/output-dir",
-                    "mode": "rw"
-                },
-                aux_data_dir: {
-                    "bind": "/mnt/atmcor-aux/lasrc/L8",
-                    "mode": "ro"
-                }
-            },
-            command=scene_id
-        )
-
-    return [
-        os.path.join(output_dir, fs_object) for fs_object in os.listdir(output_dir)
-    ]
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import os
+from typing import Callable, Dict, List, Optional
+
+from .auxiliary import lasrc_subset_info, prepare_lasrc_auxiliary_data
+from .config import EnvironmentConfig
+from .execution import SceneStage, run_scene_containers, scene_outputs
+from .logs import SceneLogs, parse_lasrc_progress, parse_sen2cor_progress
+from .manifest import SceneManifest
+from .telemetry import TelemetryRecorder
+
+
+def _sen2cor_output_prefix(scene_id: str) -> str:
+    """Define the prefix of the Sen2Cor output name of a Sentinel-2 L1C scene.
+
+    Sen2Cor replaces the processing level (`MSIL1C` -> `MSIL2A`) and the baseline number (`N9999`) of the scene
+    name. The product discriminator (last part of the name) is defined with the processing date.
+
+    Args:
+        scene_id (str): Sentinel-2 L1C scene id.
+
+    Returns:
+        str: Prefix of the Sen2Cor output name.
+    """
+    scene_id_parts = scene_id.replace(".SAFE", "").split("_")[:6]
+
+    scene_id_parts[1] = scene_id_parts[1].replace("L1C", "L2A")
+    scene_id_parts[3] = "N9999"
+
+    return "_".join(scene_id_parts)
+
+
+def sen2cor_stage(input_dir: str, output_dir: str,
+                  progress_callback: Optional[Callable[[str, float], None]] = None) -> SceneStage:
+    """Define the Sen2Cor processing step (`EnvironmentConfig.SEN2COR_IMAGE`) of Sentinel-2 scenes.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+        progress_callback (Optional[Callable[[str, float], None]]): Called with the scene id and progress (%).
+
+    Returns:
+        SceneStage: Processing step.
+    """
+    manifest = SceneManifest(
+        output_dir, EnvironmentConfig.SEN2COR_IMAGE,
+        scene_inputs=lambda scene_id: [os.path.join(input_dir, scene_id)],
+        output_prefix=_sen2cor_output_prefix
+    )
+    scene_logs = SceneLogs(output_dir, parse_sen2cor_progress, progress_callback)
+    telemetry = TelemetryRecorder(output_dir, EnvironmentConfig.SEN2COR_IMAGE)
+
+    def container(scene_id: str) -> Dict:
+        return dict(
+            image=EnvironmentConfig.SEN2COR_IMAGE,
+            auto_remove=True,
+            volumes={
+                input_dir: {
+                    "bind": "/mnt/input-dir",
+                    "mode": "rw"
+                },
+                output_dir: {
+                    "bind": "/mnt/output-dir",
+                    "mode": "rw"
+                }
+            },
+            command=scene_id,
+            log_handler=scene_logs.scene(scene_id),
+            telemetry=telemetry.scene(scene_id)
+        )
+
+    return SceneStage("sen2cor", container, manifest, staged=True)
+
+
+def lasrc_stage(input_dir: str, output_dir: str, aux_data_dir: str,
+                progress_callback: Optional[Callable[[str, float], None]] = None,
+                aux_subset_dir: Optional[str] = None) -> SceneStage:
+    """Define the LaSRC processing step (`EnvironmentConfig.LASRC_IMAGE`) of Sentinel-2 scenes.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+        aux_data_dir (str):Path to the directory where all the LaSRC auxiliary
+        data directory `L8` is available.
+
+        progress_callback (Optional[Callable[[str, float], None]]): Called with the scene id and progress (%).
+
+        aux_subset_dir (Optional[str]): Subset of the auxiliary data mounted instead of the `aux_data_dir` (See
+        `research_processing.auxiliary.prepare_lasrc_auxiliary_data`).
+
+    Returns:
+        SceneStage: Processing step.
+    """
+    aux_volumes = {
+        aux_subset_dir or aux_data_dir: {
+            "bind": "/mnt/atmcor-aux/lasrc/L8",
+            "mode": "ro"
+        }
+    }
+
+    subset_info = lasrc_subset_info(aux_subset_dir) if aux_subset_dir is not None else None
+
+    # the symbolic links of the subset point to the auxiliary data directory, mounted in the same path
+    if subset_info is not None and subset_info["symlinked"]:
+        aux_volumes = {
+            subset_info["source"]: {
+                "bind": subset_info["source"],
+                "mode": "ro"
+            },
+            **aux_volumes
+        }
+
+    manifest = SceneManifest(
+        output_dir, EnvironmentConfig.LASRC_IMAGE,
+        scene_inputs=lambda scene_id: [os.path.join(input_dir, scene_id)],
+        output_prefix=lambda scene_id: scene_id.replace(".SAFE", "")
+    )
+    scene_logs = SceneLogs(output_dir, parse_lasrc_progress, progress_callback)
+    telemetry = TelemetryRecorder(output_dir, EnvironmentConfig.LASRC_IMAGE)
+
+    def container(scene_id: str) -> Dict:
+        return dict(
+            image=EnvironmentConfig.LASRC_IMAGE,
+            auto_remove=True,
+            volumes={
+                input_dir: {
+                    "bind": "/mnt/input-dir",
+                    "mode": "rw"
+                },
+                output_dir: {
+                    "bind": "/mnt/output-dir",
+                    "mode": "rw"
+                },
+                **aux_volumes
+            },
+            command=scene_id,
+            log_handler=scene_logs.scene(scene_id),
+            telemetry=telemetry.scene(scene_id)
+        )
+
+    return SceneStage("lasrc", container, manifest, staged=True)
+
+
+def sen2cor(input_dir: str, output_dir: str, scene_ids: List[str], max_workers: int = 1,
+            batch_size: int = 1, skip_processed: bool = True,
+            progress_callback: Optional[Callable[[str, float], None]] = None,
+            continue_on_failure: bool = False,
+            failure_callback: Optional[Callable[[str, BaseException], None]] = None,
+            concurrent_steps: int = 1) -> Dict[str, List[str]]:
+    """Instantiate a docker container (`EnvironmentConfig.SEN2COR_IMAGE`) to generate Surface Reflectance products (Sen2cor atmosphere correction) for Sentinel-2 scenes.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+        scene_ids (List[str]): List with the scene_ids that should be processed.
+        The scene_ids defined must be equivalent to the scene directory names in
+        the `input_dir`.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        batch_size (int): Maximum number of scenes processed by each container.
+
+        skip_processed (bool): Skip the scenes with a valid manifest.
+
+        progress_callback (Optional[Callable[[str, float], None]]): Called with the scene id and progress (%).
+
+        continue_on_failure (bool): Keep processing the other scenes when a scene fails.
+
+        failure_callback (Optional[Callable[[str, BaseException], None]]): Called with each failed scene and error.
+
+        concurrent_steps (int): Number of processing steps executed concurrently, which share the CPUs (See
+        `research_processing.parallelism.plan_parallelism`).
+
+    Returns:
+        Dict[str, List[str]]: Full path of the outputs of each scene.
+    """
+    stage = sen2cor_stage(input_dir, output_dir, progress_callback)
+
+    results = run_scene_containers({
+        scene_id: stage.container(scene_id) for scene_id in scene_ids
+    }, max_workers=max_workers, batch_size=batch_size, manifest=stage.manifest, skip_processed=skip_processed,
+        continue_on_failure=continue_on_failure, staged=stage.staged, concurrent_steps=concurrent_steps)
+
+    return scene_outputs(results, failure_callback)
+
+
+def lasrc(input_dir: str, output_dir: str, scene_ids: List[str],
+          aux_data_dir: str, max_workers: int = 1, batch_size: int = 1, skip_processed: bool = True,
+          progress_callback: Optional[Callable[[str, float], None]] = None,
+          continue_on_failure: bool = False,
+          failure_callback: Optional[Callable[[str, BaseException], None]] = None,
+          subset_aux_data: bool = True, concurrent_steps: int = 1,
+          aux_subset_dir: Optional[str] = None) -> Dict[str, List[str]]:
+    """Instantiate a docker container (`EnvironmentConfig.LASRC_IMAGE`) to generate Surface Reflectance (LaSRC atmosphere correction) products for Sentinel-2 scenes.
+
+    Args:
+        input_dir (str): Directory where the directories of the scenes to be
+        processed are located.
+
+        output_dir (str): Directory where the results will be saved.
+
+        scene_ids (List[str]): List with the scene_ids that should be processed.
+        The scene_ids defined must be equivalent to the scene directory names in
+        the `input_dir`.
+
+        aux_data_dir (str):Path to the directory where all the LaSRC auxiliary
+        data directory `L8` is available.
+
+        max_workers (int): Maximum number of containers executed concurrently.
+
+        batch_size (int): Maximum number of scenes processed by each container.
+
+        skip_processed (bool): Skip the scenes with a valid manifest.
+
+        progress_callback (Optional[Callable[[str, float], None]]): Called with the scene id and progress (%).
+
+        continue_on_failure (bool): Keep processing the other scenes when a scene fails.
+
+        failure_callback (Optional[Callable[[str, BaseException], None]]): Called with each failed scene and error.
+
+        subset_aux_data (bool): Mount only the auxiliary data of the `scene_ids` (See
+        `research_processing.auxiliary.prepare_lasrc_auxiliary_data`).
+
+        concurrent_steps (int): Number of processing steps executed concurrently, which share the CPUs (See
+        `research_processing.parallelism.plan_parallelism`).
+
+        aux_subset_dir (Optional[str]): Subset of the auxiliary data already prepared for the scenes (e.g., once for
+        all the scenes of a run). When defined, it is mounted instead of creating a subset of the `scene_ids`.
+
+    Returns:
+        Dict[str, List[str]]: Full path of the outputs of each scene.
+
+    See:
+        LaSRC Auxiliary Data: https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/
+
+    Note:
+        The auxiliary data directory should contain all the content that is in
+        the `L8` directory (https://edclpdsftp.cr.usgs.gov/downloads/auxiliaries/lasrc_auxiliary/L8/)
+        provided by the USGS.
+    """
+    if aux_subset_dir is None and subset_aux_data:
+        aux_subset_dir, _ = prepare_lasrc_auxiliary_data(aux_data_dir, scene_ids, EnvironmentConfig.LASRC_AUX_SUBSET_DIR)
+
+    stage = lasrc_stage(input_dir, output_dir, aux_data_dir, progress_callback, aux_subset_dir)
+
+    results = run_scene_containers({
+        scene_id: stage.container(scene_id) for scene_id in scene_ids
+    }, max_workers=max_workers, batch_size=batch_size, manifest=stage.manifest, skip_processed=skip_processed,
+        continue_on_failure=continue_on_failure, staged=stage.staged, concurrent_steps=concurrent_steps)
+
+    return scene_outputs(results, failure_callback)
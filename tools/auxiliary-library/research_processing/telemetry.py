@@ -0,0 +1,196 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from .config import EnvironmentConfig
+
+_TELEMETRY_METRICS = ["cpu_percent", "memory_rss", "io_read_bytes", "io_write_bytes"]
+
+
+def parse_container_stats(stats: Dict) -> Dict:
+    """Extract the resource usage of a container from the Docker stats API response.
+
+    Args:
+        stats (Dict): Response of the `docker.models.containers.Container.stats` method (with `stream=False`).
+
+    Returns:
+        Dict: CPU usage (`cpu_percent`, where 100% is one CPU), resident memory (`memory_rss`, in bytes) and
+        accumulated block I/O (`io_read_bytes` and `io_write_bytes`).
+
+    Note:
+        Both cgroups v1 and v2 statistics are supported.
+    """
+    cpu_stats = stats.get("cpu_stats", {})
+    precpu_stats = stats.get("precpu_stats", {})
+
+    cpu_delta = cpu_stats.get("cpu_usage", {}).get("total_usage", 0) - \
+        precpu_stats.get("cpu_usage", {}).get("total_usage", 0)
+    system_delta = cpu_stats.get("system_cpu_usage", 0) - precpu_stats.get("system_cpu_usage", 0)
+    online_cpus = cpu_stats.get("online_cpus") or len(cpu_stats.get("cpu_usage", {}).get("percpu_usage") or [1])
+
+    cpu_percent = (cpu_delta / system_delta) * online_cpus * 100 if system_delta > 0 and cpu_delta > 0 else 0.0
+
+    memory_stats = stats.get("memory_stats", {})
+    memory_rss = memory_stats.get("stats", {}).get("rss", memory_stats.get("stats", {}).get("anon"))
+
+    if memory_rss is None:
+        memory_rss = memory_stats.get("usage", 0) - memory_stats.get("stats", {}).get("cache", 0)
+
+    io_bytes = {"read": 0, "write": 0}
+    for io_entry in stats.get("blkio_stats", {}).get("io_service_bytes_recursive") or []:
+        operation = io_entry.get("op", "").lower()
+
+        if operation in io_bytes:
+            io_bytes[operation] += io_entry.get("value", 0)
+
+    return {
+        "cpu_percent": round(cpu_percent, 2),
+        "memory_rss": memory_rss,
+        "io_read_bytes": io_bytes["read"],
+        "io_write_bytes": io_bytes["write"]
+    }
+
+
+class SceneTelemetry:
+    """Resource usage samples of the container that processed a scene.
+
+    Args:
+        scene_id (str): Scene id.
+
+        telemetry_file (str): Path to the file (JSON) where the telemetry is saved.
+
+        image (str): Image used to process the scene.
+
+        interval (float): Interval (in seconds) between the samples.
+    """
+
+    def __init__(self, scene_id: str, telemetry_file: str, image: str, interval: float):
+        self.scene_id = scene_id
+        self.telemetry_file = telemetry_file
+        self.image = image
+        self.interval = interval
+
+        self.samples = []
+        self.start_time = None
+        self.wall_time = None
+
+    def start(self):
+        """Mark the start of the scene processing (the samples of previous executions are discarded)."""
+        self.start_time = time.monotonic()
+        self.samples = []
+
+    def add_sample(self, stats: Dict):
+        """Add a sample to the telemetry.
+
+        Args:
+            stats (Dict): Response of the Docker stats API (See `parse_container_stats`).
+        """
+        self.samples.append({
+            "elapsed": round(time.monotonic() - self.start_time, 3),
+            **parse_container_stats(stats)
+        })
+
+    def peaks(self) -> Dict:
+        """Peak value of each metric sampled.
+
+        Returns:
+            Dict: Peak CPU usage, resident memory and block I/O. The block I/O values are accumulated, so the peak is
+            the total I/O of the scene processing.
+        """
+        return {
+            metric: max((sample[metric] for sample in self.samples), default=None) for metric in _TELEMETRY_METRICS
+        }
+
+    def save(self) -> Dict:
+        """Save the telemetry of the scene processing.
+
+        Returns:
+            Dict: Telemetry content.
+        """
+        self.wall_time = time.monotonic() - self.start_time
+
+        telemetry = {
+            "scene_id": self.scene_id,
+            "image": self.image,
+            "interval": self.interval,
+            "wall_time": round(self.wall_time, 3),
+            "peaks": self.peaks(),
+            "samples": self.samples,
+            "created_at": datetime.now().isoformat()
+        }
+
+        with open(self.telemetry_file + ".tmp", "w") as telemetry_stream:
+            json.dump(telemetry, telemetry_stream, indent=2)
+        os.replace(self.telemetry_file + ".tmp", self.telemetry_file)
+
+        return telemetry
+
+
+class TelemetryRecorder:
+    """Telemetry of the scenes of a processing step.
+
+    During the processing of each scene, the Docker stats API is sampled every `interval` seconds and the time series
+    of the resource usage (and its peaks) is saved in the `.telemetry` directory, created alongside the `output_dir`:
+
+        base directory
+            ├── .telemetry
+            │   └── <output_dir name>
+            │       └── <scene_id>.json
+            └── <output_dir name>
+
+    Args:
+        output_dir (str): Directory where the results of the processing step are saved.
+
+        image (str): Image used in the processing step.
+
+        interval (Optional[float]): Interval (in seconds) between the samples. `0` disables the telemetry. When
+        `None`, the `EnvironmentConfig.TELEMETRY_INTERVAL` is used.
+    """
+
+    def __init__(self, output_dir: str, image: str, interval: Optional[float] = None):
+        self.image = image
+        self.interval = EnvironmentConfig.TELEMETRY_INTERVAL if interval is None else interval
+
+        self.telemetry_dir = os.path.join(os.path.dirname(os.path.normpath(output_dir)), ".telemetry",
+                                          os.path.basename(os.path.normpath(output_dir)))
+
+    def path(self, scene_id: str) -> str:
+        """Path to the telemetry file of a scene."""
+        return os.path.join(self.telemetry_dir, f"{scene_id}.json")
+
+    def scene(self, scene_id: str) -> Optional[SceneTelemetry]:
+        """Create the telemetry of a scene.
+
+        Args:
+            scene_id (str): Scene id.
+
+        Returns:
+            Optional[SceneTelemetry]: Scene telemetry, that can be used as the `telemetry` of the `ContainerManager`
+            methods. `None` is returned when the telemetry is disabled.
+        """
+        if not self.interval:
+            return None
+
+        os.makedirs(self.telemetry_dir, exist_ok=True)
+
+        return SceneTelemetry(scene_id, self.path(scene_id), self.image, self.interval)
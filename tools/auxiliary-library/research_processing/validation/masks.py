@@ -0,0 +1,217 @@
+#
+# This file is part of Brazil Data Cube compendium-harmonization.
+# Copyright (C) 2022 INPE.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/gpl-3.0.html>.
+#
+
+import os
+import tempfile
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy
+import rasterio
+
+from research_processing.validation import navigate, validation_funcs
+
+# Grids of the masks used by the validations: the native grid of the cloud rasters (`None`, 30m for the Landsat-8
+# `QA_PIXEL` and 20m for the Sentinel-2 `SCL`) and the 10m grid.
+MASK_RESOLUTIONS = (None, 10)
+
+
+def _l8_invalid_pixels(cloud_arr: numpy.ndarray) -> numpy.ndarray:
+    """Invalid pixels (fill, clouds, cirrus, shadows and snow) of a Landsat-8 `QA_PIXEL` array."""
+    return validation_funcs.mask_pixel_bitwise(cloud_arr.astype(int), nodata=0)
+
+
+# Sensors with cloud masks: function to find the cloud raster of a scene and function to classify its pixels.
+SENSOR_CLOUD_MASKS: Dict[str, Tuple[Callable[[str, str], str], Callable[[numpy.ndarray], numpy.ndarray]]] = {
+    "landsat8": (navigate.path_to_l8cloud, _l8_invalid_pixels),
+    "sentinel2": (navigate.path_to_s2l2a_cloud, validation_funcs.mask_pixel_scl)
+}
+
+
+def _open_cloud_raster(cloud_path: str, res: Optional[int] = None) -> rasterio.io.DatasetReader:
+    """Open a cloud raster, resampled to `res` (when defined)."""
+    cloud_ds = rasterio.open(cloud_path)
+
+    return validation_funcs.resample_raster(cloud_ds, res) if res is not None else cloud_ds
+
+
+def prepare_scene_mask(cloud_path: str, mask_file: str, invalid_pixels: Callable[[numpy.ndarray], numpy.ndarray],
+                       res: Optional[int] = None) -> str:
+    """Prepare the validity mask of a scene.
+
+    The mask is a 1-bit GeoTIFF (deflate compressed), with `1` in the valid pixels and `0` in the invalid ones (the
+    `nodata`), in the same grid of the cloud raster resampled to `res`. So, the pixels outside of the scene are also
+    invalid when the masks of a pair are intersected (See `SceneMasks`).
+
+    Args:
+        cloud_path (str): Path to the cloud raster of the scene (e.g., Landsat-8 `QA_PIXEL` or Sentinel-2 `SCL`).
+
+        mask_file (str): Path to the mask file that will be written.
+
+        invalid_pixels (Callable[[numpy.ndarray], numpy.ndarray]): Function classifying the invalid pixels of the
+        cloud raster (e.g., `research_processing.validation.validation_funcs.mask_pixel_scl`).
+
+        res (Optional[int]): Resolution of the mask. When `None`, the native resolution of the cloud raster is used.
+
+    Returns:
+        str: Path to the mask file.
+    """
+    cloud_ds = _open_cloud_raster(cloud_path, res)
+    valid = numpy.logical_not(invalid_pixels(cloud_ds.read(1))).astype(numpy.uint8)
+
+    profile = dict(
+        driver="GTiff",
+        height=cloud_ds.height,
+        width=cloud_ds.width,
+        count=1,
+        dtype="uint8",
+        crs=cloud_ds.crs,
+        transform=cloud_ds.transform,
+        nodata=0,
+        nbits=1,
+        compress="deflate",
+        tiled=True
+    )
+    cloud_ds.close()
+
+    # the mask is renamed when complete, so a failed preparation does not leave an incomplete mask
+    os.makedirs(os.path.dirname(mask_file), exist_ok=True)
+    file_descriptor, temporary_file = tempfile.mkstemp(prefix=".tmp-", suffix=".tif",
+                                                       dir=os.path.dirname(mask_file))
+    os.close(file_descriptor)
+
+    try:
+        with rasterio.open(temporary_file, "w", **profile) as mask_ds:
+            mask_ds.write(valid, 1)
+        os.replace(temporary_file, mask_file)
+    finally:
+        if os.path.exists(temporary_file):
+            os.remove(temporary_file)
+
+    return mask_file
+
+
+def prepare_masks(cloud_dir: str, mask_dir: str, scene_ids: List[str], sensor: str,
+                  resolutions: Tuple[Optional[int], ...] = MASK_RESOLUTIONS) -> Dict[str, List[str]]:
+    """Prepare the validity masks of the scenes, once per grid, to be shared by the validations.
+
+    The masks already prepared, and newer than the cloud raster of the scene, are kept (e.g., the masks of the scenes
+    of previous partitions).
+
+    Args:
+        cloud_dir (str): Directory where the cloud rasters of the scenes are located (e.g., the Landsat-8 input
+        directory or the Sen2Cor output directory).
+
+        mask_dir (str): Directory where the masks will be saved (See `navigate.path_to_mask`).
+
+        scene_ids (List[str]): Scene ids.
+
+        sensor (str): Sensor of the scenes (See `SENSOR_CLOUD_MASKS`).
+
+        resolutions (Tuple[Optional[int], ...]): Resolutions of the masks (`None` is the native resolution).
+
+    Returns:
+        Dict[str, List[str]]: Dictionary mapping each scene id to the path of its masks.
+
+    Raises:
+        ValueError: If the `sensor` is not valid.
+    """
+    if sensor not in SENSOR_CLOUD_MASKS:
+        raise ValueError(f"Invalid sensor `{sensor}` (available: {', '.join(SENSOR_CLOUD_MASKS)}).")
+
+    path_to_cloud, invalid_pixels = SENSOR_CLOUD_MASKS[sensor]
+
+    scene_masks = {}
+    for scene_id in scene_ids:
+        cloud_path = path_to_cloud(cloud_dir, scene_id)
+        scene_masks[scene_id] = []
+
+        for res in resolutions:
+            mask_file = navigate.path_to_mask(mask_dir, scene_id, res)
+
+            if not os.path.isfile(mask_file) or os.path.getmtime(mask_file) < os.path.getmtime(cloud_path):
+                prepare_scene_mask(cloud_path, mask_file, invalid_pixels, res)
+
+            scene_masks[scene_id].append(mask_file)
+    return scene_masks
+
+
+class SceneMasks:
+    """Cloud masks of the scenes of a sensor, used in the validations.
+
+    The masks are read from the masks prepared with `prepare_masks` (when the `mask_dir` is defined) or computed from
+    the cloud rasters of the scenes, in each validation.
+
+    Args:
+        sensor (str): Sensor of the scenes (See `SENSOR_CLOUD_MASKS`).
+
+        cloud_dir (str): Directory where the cloud rasters of the scenes are located.
+
+        mask_dir (Optional[str]): Directory of the prepared masks.
+    """
+
+    def __init__(self, sensor: str, cloud_dir: str, mask_dir: Optional[str] = None):
+        if sensor not in SENSOR_CLOUD_MASKS:
+            raise ValueError(f"Invalid sensor `{sensor}` (available: {', '.join(SENSOR_CLOUD_MASKS)}).")
+
+        self.sensor = sensor
+        self.cloud_dir = cloud_dir
+        self.mask_dir = mask_dir
+
+    def dataset(self, scene_id: str, res: Optional[int] = None) -> rasterio.io.DatasetReader:
+        """Open the mask (or the cloud raster) of a scene, in the grid with resolution `res`."""
+        if self.mask_dir is not None:
+            return rasterio.open(navigate.path_to_mask(self.mask_dir, scene_id, res))
+
+        path_to_cloud, _ = SENSOR_CLOUD_MASKS[self.sensor]
+        return _open_cloud_raster(path_to_cloud(self.cloud_dir, scene_id), res)
+
+    def invalid_pixels(self, arr: numpy.ndarray) -> numpy.ndarray:
+        """Classify the invalid pixels of an array read from the `dataset`."""
+        if self.mask_dir is not None:
+            return arr == 0
+
+        _, invalid_pixels = SENSOR_CLOUD_MASKS[self.sensor]
+        return invalid_pixels(arr)
+
+
+def pair_mask(masks1: SceneMasks, scene1_id: str, masks2: SceneMasks, scene2_id: str,
+              res: Optional[int] = None) -> numpy.ndarray:
+    """Combine the masks of a pair of scenes, in the intersection of the scenes.
+
+    Args:
+        masks1 (SceneMasks): Masks of the sensor of the first scene.
+
+        scene1_id (str): First scene id.
+
+        masks2 (SceneMasks): Masks of the sensor of the second scene.
+
+        scene2_id (str): Second scene id.
+
+        res (Optional[int]): Resolution of the masks. When `None`, the native resolution of the cloud rasters is used.
+
+    Returns:
+        numpy.ndarray: Boolean array in which `True` should be masked (invalid in any of the scenes).
+    """
+    cloud1_ds = masks1.dataset(scene1_id, res)
+    cloud2_ds = masks2.dataset(scene2_id, res)
+
+    cloud1_arr, cloud2_arr = validation_funcs.raster_intersection(cloud1_ds, cloud2_ds)
+    cloud1_ds.close()
+    cloud2_ds.close()
+
+    return numpy.logical_or(masks1.invalid_pixels(cloud1_arr), masks2.invalid_pixels(cloud2_arr))
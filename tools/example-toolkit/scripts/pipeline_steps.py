@@ -235,7 +235,8 @@ def create_dagit_yaml_file(raw_data_dir: str, derived_data_dir: str, output_file
         "resources": {
             "lasrc_data": {
                 "config": {
-                    "lasrc_auxiliary_data_dir": lasrc_auxiliary_data_dir
+                    "lasrc_auxiliary_data_dir": lasrc_auxiliary_data_dir,
+                    "sentinel2_sceneid_list": sentinel2_sceneid_list
                 }
             },
             "repository": {